@@ -0,0 +1,106 @@
+"""
+Benchmark the compression drivers on `tests/data/types.*` repeated to a
+realistic size.  Reports compressed size, write and read throughput through
+`gpsdio.open()`, and raw decompression throughput of the compression driver
+alone, since reading is usually bound by parsing.  Drivers whose optional
+dependencies are not installed are skipped.
+
+    $ python benchmarks/bench_compression.py [messages]
+"""
+
+
+from __future__ import print_function
+
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import gpsdio
+import gpsdio.drivers
+
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'data', 'types.json')
+
+# (compression driver, label, compression options for reading and writing)
+CASES = (
+    (None, 'none', {}),
+    ('GZIP', 'gzip', {}),
+    ('GZIP', 'gzip T4', {'threads': 4}),
+    ('BZ2', 'bz2', {}),
+    ('ZSTD', 'zstd', {}),
+    ('ZSTD', 'zstd -19', {'level': 19}),
+    ('ZSTD', 'zstd -3 T4', {'threads': 4}),
+    ('ZSTD', 'zstd -19 long', {'level': 19, 'long_distance': True}),
+    ('LZ4', 'lz4', {}),
+    ('LZ4', 'lz4 -9 4MB', {'level': 9, 'block_size': '4MB'}),
+    ('XZ', 'xz', {}),
+    ('XZ', 'xz 1MB T4', {'block_size': 1024 ** 2, 'threads': 4}),
+)
+
+
+def available(compression):
+    if compression is None:
+        return True
+    try:
+        gpsdio.drivers._COMPRESSION[compression]().open(os.devnull, 'w').close()
+        return True
+    except ImportError:
+        return False
+
+
+def main(count=200000):
+
+    with gpsdio.open(DATA) as src:
+        sample = list(src)
+    msgs = list(itertools.islice(itertools.cycle(sample), count))
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for driver in ('NewlineJSON', 'MsgPack'):
+            print("{} messages with {}".format(count, driver))
+            print("{:>15} {:>12} {:>14} {:>14} {:>16}".format(
+                '', 'bytes', 'write msg/s', 'read msg/s', 'decompress MB/s'))
+            for compression, label, co in CASES:
+                if not available(compression):
+                    print("{:>15}: not installed".format(label))
+                    continue
+                pth = os.path.join(tmpdir, 'bench')
+                kwargs = dict(driver=driver, compression=compression or False)
+
+                start = time.time()
+                with gpsdio.open(pth, 'w', co=co, **kwargs) as dst:
+                    for msg in msgs:
+                        dst.write(msg)
+                write = time.time() - start
+
+                start = time.time()
+                with gpsdio.open(pth, co=co, **kwargs) as src:
+                    for _ in src:
+                        pass
+                read = time.time() - start
+
+                start = time.time()
+                size = 0
+                if compression is None:
+                    f = open(pth, 'rb')
+                else:
+                    f = gpsdio.drivers._COMPRESSION[compression]()
+                    f.start(pth, 'r', **co)
+                with f:
+                    for chunk in iter(lambda: f.read(1024 ** 2), b''):
+                        size += len(chunk)
+                decompress = time.time() - start
+
+                print("{:>15}: {:>12,} {:>14,.0f} {:>14,.0f} {:>16,.0f}".format(
+                    label, os.path.getsize(pth), count / write, count / read,
+                    size / decompress / 1024 ** 2))
+                os.remove(pth)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
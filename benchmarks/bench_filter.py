@@ -0,0 +1,104 @@
+"""
+Benchmark `gpsdio.ops.filter()` and `gpsdio etl --filter`.
+
+Compares the compiled expressions against re-evaluating the expression
+strings with a copied local scope for every message, which is how filtering
+used to work, and vectorized evaluation with `batch_size`.  Reading a file,
+compares pushing the expressions down to messages before they are validated
+with and without `batch_size`.
+
+    $ python benchmarks/bench_filter.py [messages]
+"""
+
+
+from __future__ import print_function
+
+import functools
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from click.testing import CliRunner
+
+import gpsdio
+import gpsdio.ops
+from gpsdio.cli.main import main_group
+
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'data', 'types.json')
+EXPRESSIONS = ("type in (1, 2, 3)", "mmsi > 300000000")
+COMPOUND = ("type in (1, 2, 3) and mmsi > 300000000 and mmsi != 366268061 and type != 2",)
+
+
+def legacy_filter(expressions, stream):
+    global_scope = {'__builtins__': __builtins__}
+    for msg in stream:
+        local_scope = msg.copy()
+        local_scope['msg'] = msg
+        for expr in expressions:
+            try:
+                result = eval(expr, global_scope, local_scope)
+            except NameError:
+                result = False
+            if not result:
+                break
+        else:
+            yield msg
+
+
+def timed(func):
+    start = time.time()
+    func()
+    return time.time() - start
+
+
+def main(count=1000000):
+
+    with gpsdio.open(DATA) as src:
+        sample = list(src)
+    msgs = list(itertools.islice(itertools.cycle(sample), count))
+
+    for expressions in (EXPRESSIONS, COMPOUND):
+        print("Filtering {} messages in memory with: {}".format(count, expressions))
+        for name, func in (('eval str', legacy_filter),
+                           ('compiled', gpsdio.ops.filter),
+                           ('batched', functools.partial(gpsdio.ops.filter, batch_size=10000))):
+            elapsed = timed(lambda: list(func(expressions, msgs)))
+            print("{:>10}: {:>12,.0f} msg/s".format(name, count / elapsed))
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        infile = os.path.join(tmpdir, 'input.json')
+        outfile = os.path.join(tmpdir, 'output.json')
+        with gpsdio.open(infile, 'w') as dst:
+            for msg in msgs:
+                dst.write(msg)
+
+        def pushdown(expressions, batch_size):
+            with gpsdio.open(infile) as src:
+                assert src.pushdown(expressions, batch_size=batch_size) == ()
+                for _ in src:
+                    pass
+
+        for expressions in (EXPRESSIONS, COMPOUND):
+            print("Reading {} messages with pushdown: {}".format(count, expressions))
+            for name, batch_size in (('compiled', None), ('batched', 10000)):
+                elapsed = timed(lambda: pushdown(expressions, batch_size))
+                print("{:>10}: {:>12,.0f} msg/s".format(name, count / elapsed))
+
+        args = ['etl', infile, outfile]
+        for expr in EXPRESSIONS:
+            args += ['--filter', expr]
+        for name, extra in (('etl', []), ('etl batch', ['--filter-batch-size', '10000'])):
+            elapsed = timed(lambda: CliRunner().invoke(
+                main_group, args + extra, catch_exceptions=False))
+            print("{:>10}: {:>12,.0f} msg/s".format(name, count / elapsed))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
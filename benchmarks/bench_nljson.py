@@ -0,0 +1,75 @@
+"""
+Benchmark decoding newline JSON with the bulk reader, which requires
+`orjson`, and with `newlinejson`, on `tests/data/types.json` repeated to a
+realistic size.  Reports lines/second through the driver alone and through
+`gpsdio.open()` with validation.
+
+    $ python benchmarks/bench_nljson.py [lines]
+"""
+
+
+from __future__ import print_function
+
+import gzip
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import gpsdio
+
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'data', 'types.json')
+
+# (label, driver options, compression)
+CASES = (
+    ('newlinejson', {'bulk': False}, False),
+    ('bulk', {}, False),
+    ('newlinejson gzip', {'bulk': False}, 'GZIP'),
+    ('bulk gzip', {}, 'GZIP'),
+)
+
+
+def main(count=500000):
+
+    with open(DATA) as f:
+        sample = [line for line in f if line.strip()]
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        data = ''.join(itertools.islice(itertools.cycle(sample), count))
+        paths = {False: os.path.join(tmpdir, 'bench.json'),
+                 'GZIP': os.path.join(tmpdir, 'bench.json.gz')}
+        with open(paths[False], 'w') as f:
+            f.write(data)
+        with gzip.open(paths['GZIP'], 'wt') as f:
+            f.write(data)
+
+        print("{} lines".format(count))
+        print("{:>18} {:>14} {:>16}".format('', 'driver lines/s', 'validated msg/s'))
+        for label, do, compression in CASES:
+            pth = paths[compression]
+            kwargs = dict(driver='NewlineJSON', compression=compression, do=do)
+
+            start = time.time()
+            with gpsdio.open(pth, _check=False, **kwargs) as src:
+                for _ in src:
+                    pass
+            driver = time.time() - start
+
+            start = time.time()
+            with gpsdio.open(pth, **kwargs) as src:
+                for _ in src:
+                    pass
+            validated = time.time() - start
+
+            print("{:>18}: {:>14,.0f} {:>16,.0f}".format(
+                label, count / driver, count / validated))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
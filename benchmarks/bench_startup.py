@@ -0,0 +1,41 @@
+"""
+Benchmark startup time for `import gpsdio` and `gpsdio --help`.
+
+Each command runs in a fresh interpreter so import caching doesn't hide
+anything.
+
+    $ python benchmarks/bench_startup.py [runs]
+"""
+
+
+from __future__ import print_function
+
+import subprocess
+import sys
+import time
+
+
+COMMANDS = (
+    ('python', [sys.executable, '-c', 'pass']),
+    ('import gpsdio', [sys.executable, '-c', 'import gpsdio']),
+    ('gpsdio --help', [
+        sys.executable, '-c', 'from gpsdio.cli.main import main_group; main_group()', '--help']),
+    ('gpsdio env drivers', [
+        sys.executable, '-c', 'from gpsdio.cli.main import main_group; main_group()',
+        'env', 'drivers']),
+)
+
+
+def main(runs=20):
+    print("Best of {} runs".format(runs))
+    for name, cmd in COMMANDS:
+        timings = []
+        for _ in range(runs):
+            start = time.time()
+            subprocess.check_call(cmd, stdout=subprocess.PIPE)
+            timings.append(time.time() - start)
+        print("{:>20}: {:>8.1f} ms".format(name, 1000 * min(timings)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,65 @@
+"""
+Benchmark message validation.
+
+Compares the per-field dictionary comprehension `validate_msg()` used to run
+against the per-type functions produced by `gpsdio.validate.compile_validator()`.
+
+    $ python benchmarks/bench_validate.py
+"""
+
+
+from __future__ import print_function
+
+import glob
+import os
+import sys
+import timeit
+
+import six
+
+import gpsdio
+import gpsdio.schema
+from gpsdio.validate import build_validator
+from gpsdio.validate import compile_validator
+
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'data')
+REPEAT = 5
+
+
+def load_messages():
+    msgs = []
+    for path in sorted(glob.glob(os.path.join(DATA, 'types.*'))):
+        if '.nmea' in path:
+            continue
+        with gpsdio.open(path, _check=False) as src:
+            msgs.extend(src)
+    return msgs
+
+
+def main(passes=2000):
+
+    msgs = load_messages()
+    validator = build_validator(gpsdio.schema.build_schema())
+    compiled = compile_validator(validator)
+
+    def per_field():
+        for msg in msgs:
+            {n: v(msg[n]) for n, v in six.iteritems(validator[msg['type']])}
+
+    def per_type():
+        for msg in msgs:
+            compiled[msg['type']](msg)
+
+    count = len(msgs) * passes
+    print("Validating {} messages {} times".format(len(msgs), passes))
+    results = {}
+    for name, func in (('per-field', per_field), ('compiled', per_type)):
+        elapsed = min(timeit.repeat(func, number=passes, repeat=REPEAT))
+        results[name] = count / elapsed
+        print("{:>10}: {:>12,.0f} msg/s".format(name, results[name]))
+    print("{:>10}: {:>12.2f}x".format('speedup', results['compiled'] / results['per-field']))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -7,6 +7,7 @@ AIS I/O with Python, dictionaries, and the GPSd AIVDM schema.
 
 
 from gpsdio.io import open
+from gpsdio.io import open_many
 from gpsdio.io import GPSDIOReader
 from gpsdio.io import GPSDIOWriter
 
@@ -16,7 +17,7 @@ logging.basicConfig()
 logger = logging.getLogger('gpsdio')
 
 
-__all__ = ('open', 'GPSDIOReader', 'GPSDIOWriter')
+__all__ = ('open', 'open_many', 'GPSDIOReader', 'GPSDIOWriter')
 
 
 __version__ = '0.0.9-dev'
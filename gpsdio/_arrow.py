@@ -0,0 +1,405 @@
+"""
+Apache Arrow based storage for `gpsdio.drivers.ParquetDriver()` and
+`gpsdio.drivers.ArrowDriver()`.
+
+Every field in the schema becomes a column with a type derived from its
+validator by `gpsdio.validate.validator_dtype()`.  Fields a message type does
+not have are null.  Numeric fields whose validator returns `bool` values
+unchanged, like `In([0, 1])`, also get a `<field>:bool` column recording which
+values were `bool`, so they are returned as `bool` rather than `int`.  When reading, each message is rebuilt with exactly the
+fields the schema defines for its type, so messages validate like those from
+any other driver.  Messages of a type the schema doesn't define are rebuilt
+from their non-null columns.  There is nowhere to store fields that aren't in
+the schema, so writing a message with one raises an exception rather than
+silently dropping it.  Timestamps are stored as Arrow timestamps but returned
+as strings, like the other drivers.
+"""
+
+
+import datetime
+
+import six
+
+from gpsdio.validate import datetime2str
+from gpsdio.validate import str2datetime
+from gpsdio.validate import validator_dtype
+
+
+BOOL_SUFFIX = ':bool'
+
+
+def _keeps_bool(validator):
+    try:
+        return validator(True) is True
+    except Exception:
+        return False
+
+
+def columns(schema):
+
+    """
+    Derive columns from a schema.
+
+    Returns
+    -------
+    list
+        `(name, dtype)` tuples where `dtype` is a NumPy dtype string from
+        `validator_dtype()`, or `?` for the `<field>:bool` column following
+        a numeric field that can hold `bool` values.  `type`, `mmsi`, and
+        `timestamp` come first.
+    """
+
+    dtypes = {}
+    keeps_bool = set()
+    for fields in schema.values():
+        for name, definition in six.iteritems(fields):
+            dtypes.setdefault(name, set()).add(validator_dtype(definition['validate']))
+            if _keeps_bool(definition['validate']):
+                keeps_bool.add(name)
+
+    out = []
+    for name, found in six.iteritems(dtypes):
+        if len(found) == 1:
+            dtype = found.pop()
+        elif found == {'i8', 'f8'}:
+            dtype = 'f8'
+        else:
+            dtype = 'O'
+        out.append((name, dtype))
+
+    first = ('type', 'mmsi', 'timestamp')
+    out = sorted(out, key=lambda c: (first.index(c[0]) if c[0] in first else len(first), c[0]))
+    for idx in reversed(range(len(out))):
+        name, dtype = out[idx]
+        if dtype in ('i8', 'f8') and name in keeps_bool:
+            out.insert(idx + 1, (name + BOOL_SUFFIX, '?'))
+    return out
+
+
+def arrow_schema(cols):
+
+    """
+    Convert `columns()` to an Arrow schema.
+    """
+
+    import pyarrow as pa
+
+    types = {
+        'i8': pa.int64(),
+        'f8': pa.float64(),
+        '?': pa.bool_(),
+        'M8[us]': pa.timestamp('us'),
+        'O': pa.string()
+    }
+    return pa.schema([pa.field(name, types[dtype]) for name, dtype in cols])
+
+
+def to_table(msgs, cols, schema):
+
+    """
+    Convert messages to an Arrow table.
+    """
+
+    import pyarrow as pa
+
+    arrays = []
+    for name, dtype in cols:
+        if dtype == '?':
+            values = [isinstance(m.get(name[:-len(BOOL_SUFFIX)]), bool) for m in msgs]
+        else:
+            values = [m.get(name) for m in msgs]
+        if dtype == 'M8[us]':
+            values = [None if v is None else str2datetime(v) for v in values]
+        elif dtype in ('i8', 'f8'):
+            # Validators like In(0, 1) accept bools, which are recorded in
+            # the field's bool column
+            values = [int(v) if isinstance(v, bool) else v for v in values]
+        arrays.append(pa.array(values, type=schema.field(name).type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def from_table(table, fields_by_type):
+
+    """
+    Convert an Arrow table to messages.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        Must contain a `type` column.
+    fields_by_type : dict
+        `{type: ((field, default), ...)}`.  Fields missing from the table are
+        filled with their default.  Messages of other types get every column
+        that isn't null.
+
+    Yields
+    ------
+    dict
+    """
+
+    values = {}
+    is_bool = {}
+    for name in table.column_names:
+        column = table.column(name).to_pylist()
+        if str(table.schema.field(name).type).startswith('timestamp'):
+            column = [datetime2str(v) if isinstance(v, datetime.datetime) else v
+                      for v in column]
+        if name.endswith(BOOL_SUFFIX):
+            is_bool[name[:-len(BOOL_SUFFIX)]] = column
+        else:
+            values[name] = column
+
+    for name, flags in six.iteritems(is_bool):
+        if name in values:
+            values[name] = [bool(v) if f else v for v, f in zip(values[name], flags)]
+
+    for row, mtype in enumerate(values['type']):
+        fields = fields_by_type.get(mtype)
+        if fields is None:
+            msg = {n: c[row] for n, c in six.iteritems(values) if c[row] is not None}
+            msg['type'] = mtype
+        else:
+            msg = {}
+            for name, default in fields:
+                column = values.get(name)
+                msg[name] = default if column is None else column[row]
+        yield msg
+
+
+def fields_by_type(schema):
+
+    """
+    Get the fields and defaults for every message type in a schema, for
+    `from_table()`.
+    """
+
+    return {
+        mtype: tuple((name, definition.get('default'))
+                     for name, definition in six.iteritems(fields))
+        for mtype, fields in six.iteritems(schema)}
+
+
+def overlaps(statistics, minimum, maximum):
+
+    """
+    Check if a row group's min/max statistics overlap a range.  Missing
+    statistics or bounds always overlap.
+    """
+
+    if statistics is None or not statistics.has_min_max:
+        return True
+    elif minimum is not None and statistics.max < minimum:
+        return False
+    elif maximum is not None and statistics.min > maximum:
+        return False
+    return True
+
+
+class _Writer(object):
+
+    """
+    Buffer messages and write them as Arrow tables of up to `size` rows.
+    With `per_type` every table contains a single message type.  Subclasses
+    implement `_write_table()` and `_close()`.
+    """
+
+    def __init__(self, schema, size, per_type):
+        self._columns = columns(schema)
+        self._schema = arrow_schema(self._columns)
+        self._names = frozenset(name for name, dtype in self._columns if dtype != '?')
+        self._size = size
+        self._per_type = per_type
+        self._buffers = {}
+        self.closed = False
+
+    def _flush(self, key):
+        self._write_table(to_table(self._buffers.pop(key), self._columns, self._schema))
+
+    def write(self, msg):
+        extra = set(msg) - self._names
+        if extra:
+            raise ValueError("Fields not in the schema can't be stored: {}".format(
+                ', '.join(sorted(extra))))
+        key = msg.get('type') if self._per_type else None
+        buf = self._buffers.setdefault(key, [])
+        buf.append(msg)
+        if len(buf) >= self._size:
+            self._flush(key)
+
+    def close(self):
+        if not self.closed:
+            for key in sorted(self._buffers, key=lambda k: (k is None, k)):
+                self._flush(key)
+            self._close()
+            self.closed = True
+
+
+class _Reader(object):
+
+    """
+    Iterate over messages in the tables produced by a subclass's `_tables()`.
+    Only `columns` are read, if given, and other fields are filled with their
+    schema default.
+    """
+
+    def __init__(self, schema, available, columns=None):
+        if columns is None:
+            self._read = list(available)
+        else:
+            self._read = ['type']
+            for name in columns:
+                if name != 'type' and name in available:
+                    self._read.append(name)
+                    if name + BOOL_SUFFIX in available:
+                        self._read.append(name + BOOL_SUFFIX)
+        self._fields_by_type = fields_by_type(schema)
+        self._messages = self._iter_messages()
+        self.closed = False
+
+    def _iter_messages(self):
+        for table in self._tables():
+            for msg in from_table(table, self._fields_by_type):
+                yield msg
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._messages)
+
+    next = __next__
+
+    def close(self):
+        if not self.closed:
+            self._close()
+            self.closed = True
+
+
+class ParquetWriter(_Writer):
+
+    """
+    Write messages as Parquet row groups in message order.  With `per_type`
+    every row group contains a single message type, so readers skipping row
+    groups by statistics skip more, but messages are reordered.
+    """
+
+    def __init__(self, f, schema, row_group_size=65536, per_type=False, **kwargs):
+        import pyarrow.parquet as pq
+        super(ParquetWriter, self).__init__(schema, row_group_size, per_type)
+        self._writer = pq.ParquetWriter(f, self._schema, **kwargs)
+
+    def _write_table(self, table):
+        self._writer.write_table(table, row_group_size=table.num_rows)
+
+    def _close(self):
+        self._writer.close()
+
+
+class ParquetReader(_Reader):
+
+    """
+    Read messages from a Parquet file one row group at a time, skipping row
+    groups whose statistics don't overlap the requested ranges.
+    """
+
+    def __init__(self, f, schema, columns=None, start_time=None, end_time=None, mmsi=None,
+                 bbox=None):
+
+        import pyarrow.parquet as pq
+
+        self._file = pq.ParquetFile(f)
+        super(ParquetReader, self).__init__(schema, self._file.schema_arrow.names, columns)
+
+        ranges = {}
+        if start_time is not None or end_time is not None:
+            ranges['timestamp'] = (
+                None if start_time is None else str2datetime(start_time),
+                None if end_time is None else str2datetime(end_time))
+        if mmsi is not None:
+            mmsi = [mmsi] if isinstance(mmsi, six.integer_types) else list(mmsi)
+            ranges['mmsi'] = (min(mmsi), max(mmsi))
+        if bbox is not None:
+            xmin, ymin, xmax, ymax = bbox
+            ranges['lon'] = (xmin, xmax)
+            ranges['lat'] = (ymin, ymax)
+
+        self.row_groups = [i for i in range(self._file.num_row_groups)
+                           if self._keep(i, ranges)]
+
+    def _keep(self, idx, ranges):
+        row_group = self._file.metadata.row_group(idx)
+        for col in range(row_group.num_columns):
+            column = row_group.column(col)
+            name = column.path_in_schema
+            if name in ranges and not overlaps(column.statistics, *ranges[name]):
+                return False
+        return True
+
+    def _tables(self):
+        for idx in self.row_groups:
+            yield self._file.read_row_group(idx, columns=self._read)
+
+    def _close(self):
+        self._file.close()
+
+
+class ArrowWriter(_Writer):
+
+    """
+    Write messages as record batches in an Arrow IPC file, also known as
+    Feather version 2.  Batches are written in message order.
+    """
+
+    def __init__(self, f, schema, batch_size=65536, per_type=False, compression=None):
+        import pyarrow as pa
+        super(ArrowWriter, self).__init__(schema, batch_size, per_type)
+        self._writer = pa.ipc.new_file(
+            f, self._schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def _write_table(self, table):
+        self._writer.write_table(table)
+
+    def _close(self):
+        self._writer.close()
+
+
+def open_arrow(f, memory_map=True):
+
+    """
+    Open an Arrow IPC file, memory mapping paths so reading is zero-copy
+    unless the file is compressed.
+
+    Returns
+    -------
+    tuple
+        `(source, pyarrow.ipc.RecordBatchFileReader)`.  Close the source when
+        done.
+    """
+
+    import pyarrow as pa
+
+    if isinstance(f, six.string_types):
+        source = pa.memory_map(f, 'r') if memory_map else pa.OSFile(f, 'rb')
+    else:
+        source = pa.PythonFile(f, mode='r')
+    return source, pa.ipc.open_file(source)
+
+
+class ArrowReader(_Reader):
+
+    """
+    Read messages from an Arrow IPC file one record batch at a time.
+    """
+
+    def __init__(self, f, schema, columns=None, memory_map=True):
+        self._source, self._file = open_arrow(f, memory_map=memory_map)
+        super(ArrowReader, self).__init__(schema, self._file.schema.names, columns)
+
+    def _tables(self):
+        import pyarrow as pa
+        for idx in range(self._file.num_record_batches):
+            batch = self._file.get_batch(idx)
+            yield pa.Table.from_batches([batch]).select(self._read)
+
+    def _close(self):
+        self._source.close()
@@ -0,0 +1,476 @@
+"""
+Block based compression helpers shared by the compression drivers.
+"""
+
+
+from collections import deque
+import datetime
+import io
+import json
+import os
+import threading
+import zlib
+
+from six.moves import queue
+
+from gpsdio.validate import datetime2str
+
+
+def gzip_decompress(data, context=None):
+
+    """
+    Decompress a single gzip member.
+    """
+
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+def gzip_member(data, level=9):
+
+    """
+    Compress data as a complete gzip member.  Members can be concatenated
+    into a standard multi-member gzip file.
+    """
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class Pool(object):
+
+    """
+    Run a function on a bounded number of tasks at once with a thread pool,
+    or in the current thread, and get the results in order.  Compression
+    libraries like `zlib` and `lzma` release the GIL, so the work is done in
+    parallel.
+    """
+
+    def __init__(self, func, threads):
+        self.func = func
+        self.threads = threads
+        self.pool = None
+        if threads > 1:
+            from multiprocessing.pool import ThreadPool
+            self.pool = ThreadPool(threads)
+        self.pending = deque()
+
+    def submit(self, *args):
+        if self.pool is None:
+            self.pending.append(self.func(*args))
+        else:
+            self.pending.append(self.pool.apply_async(self.func, args))
+
+    @property
+    def full(self):
+        return len(self.pending) >= max(self.threads * 2, 1)
+
+    def next(self):
+        result = self.pending.popleft()
+        return result if self.pool is None else result.get()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+class BlockReader(io.RawIOBase):
+
+    """
+    Read a series of independently compressed blocks from a file, optionally
+    decompressing several at once with a pool of threads.  `blocks` contains
+    `(offset, size, context)` tuples and `decompress(data, context)` converts
+    a block to bytes.
+    """
+
+    def __init__(self, f, blocks, decompress, threads=1, closefd=True):
+        self._f = f
+        self._closefd = closefd
+        self._blocks = iter(blocks)
+        self._pool = Pool(decompress, threads)
+        self._buffer = b''
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        for offset, size, context in self._blocks:
+            self._f.seek(offset)
+            self._pool.submit(self._f.read(size), context)
+            if self._pool.full:
+                break
+
+    def readinto(self, b):
+        while self._position >= len(self._buffer):
+            self._fill()
+            if not self._pool.pending:
+                return 0
+            self._buffer = memoryview(self._pool.next())
+            self._position = 0
+        size = min(len(b), len(self._buffer) - self._position)
+        b[:size] = self._buffer[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._pool.close()
+            if self._closefd:
+                self._f.close()
+        super(BlockReader, self).close()
+
+
+class ReadAhead(io.RawIOBase):
+
+    """
+    Read a file in chunks of `chunk_size` bytes on a background thread,
+    keeping up to `chunks` of them waiting in a queue.  Libraries like `zlib`
+    and `bz2` release the GIL, so decompressing in the background overlaps
+    with parsing and validating in the current thread.  Exceptions raised
+    while reading are raised by the next read.
+    """
+
+    def __init__(self, f, chunks, chunk_size=1024 ** 2):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=chunks)
+        self._stop = threading.Event()
+        self._buffer = b''
+        self._position = 0
+        self._done = False
+        self._thread = threading.Thread(target=self._run, name='gpsdio-read-ahead')
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def name(self):
+        return self._f.name
+
+    def readable(self):
+        return True
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self):
+        try:
+            while True:
+                data = self._f.read(self._chunk_size)
+                if not self._put(data) or not data:
+                    break
+        except Exception as e:
+            self._put(e)
+
+    def readinto(self, b):
+        while self._position >= len(self._buffer):
+            if self._done:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._done = True
+                raise item
+            elif not item:
+                self._done = True
+                return 0
+            self._buffer = memoryview(item)
+            self._position = 0
+        size = min(len(b), len(self._buffer) - self._position)
+        b[:size] = self._buffer[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._f.close()
+        super(ReadAhead, self).close()
+
+
+class WriteBehind(object):
+
+    """
+    Write to a file on a background thread, keeping up to `chunks` writes
+    waiting in a queue, so compressing with a library that releases the GIL,
+    like `zlib` or `bz2`, overlaps with serializing in the current thread.
+    An exception raised while writing is raised by the next call to
+    `write()`, `flush()`, or `close()`, and again by every call after that,
+    so nothing is written after a failure.
+    """
+
+    def __init__(self, f, chunks):
+        self._f = f
+        self._queue = queue.Queue(maxsize=chunks)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='gpsdio-write-behind')
+        self._thread.daemon = True
+        self._thread.start()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def name(self):
+        return getattr(self._f, 'name', '<unknown name>')
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            try:
+                if data is None:
+                    return
+                elif self._error is None:
+                    self._f.write(data)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, data):
+        self._raise()
+        self._queue.put(data)
+        return len(data)
+
+    def flush(self):
+
+        """
+        Wait for every queued write and flush the file.
+        """
+
+        self._queue.join()
+        self._raise()
+        if hasattr(self._f, 'flush'):
+            self._f.flush()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._queue.put(None)
+            self._thread.join()
+            try:
+                self._raise()
+            finally:
+                self._f.close()
+
+
+class BlockWriter(io.RawIOBase):
+
+    """
+    Write a file as a series of independently compressed blocks, starting a
+    new one once `block_size` bytes have been written.  `compress` converts
+    a block to bytes that can be concatenated, like a gzip member or an XZ
+    stream.  Blocks only end between calls to `write()`, so blocks written a
+    message at a time always begin with a complete message, and `flush()`
+    also ends the current block.  Blocks are optionally compressed in
+    parallel with a pool of threads.
+
+    Every block written is described in `blocks` by a dictionary containing
+    its `offset` and `size` in the file, `uncompressed_size`, the `count` of
+    calls to `write()`, and the `first` and `last` values given to `note()`.
+    Noted values are only assigned to a block by the following `write()`, so
+    a `flush()` from another thread in between can't move them to the wrong
+    block.
+    """
+
+    def __init__(self, f, compress, block_size, threads=1, closefd=True):
+        self._f = f
+        self._closefd = closefd
+        self._block_size = block_size
+        self._pool = Pool(compress, threads)
+        self._chunks = []
+        self._size = 0
+        self._count = 0
+        self._first = None
+        self._last = None
+        self._note = None
+        self._pending = deque()
+        try:
+            self._offset = f.tell()
+        except (AttributeError, IOError, OSError):
+            self._offset = 0
+        self.blocks = []
+
+    def writable(self):
+        return True
+
+    def _drain(self, wait):
+        while self._pool.pending and (wait or self._pool.full):
+            data = self._pool.next()
+            block = self._pending.popleft()
+            block.update(offset=self._offset, size=len(data))
+            self._f.write(data)
+            self._offset += len(data)
+            self.blocks.append(block)
+
+    def _end_block(self):
+        self._pool.submit(b''.join(self._chunks))
+        self._pending.append({
+            'uncompressed_size': self._size,
+            'count': self._count,
+            'first': self._first,
+            'last': self._last})
+        self._chunks = []
+        self._size = 0
+        self._count = 0
+        self._first = self._last = None
+        self._drain(wait=False)
+
+    def note(self, value):
+
+        """
+        Record a value, like a timestamp, for the message about to be written.
+        """
+
+        self._note = value,
+
+    def write(self, b):
+        if self._note is not None:
+            value, = self._note
+            self._note = None
+            if self._first is None:
+                self._first = value
+            self._last = value
+        self._chunks.append(bytes(b))
+        self._size += len(b)
+        self._count += 1
+        if self._size >= self._block_size:
+            self._end_block()
+        return len(b)
+
+    def flush(self):
+
+        """
+        End the current block, wait for every pending block to be written,
+        and flush the file, so everything written so far can be read.
+        Flushing often produces small blocks that compress poorly.
+        """
+
+        if not self.closed and not self._f.closed:
+            if self._chunks:
+                self._end_block()
+            self._drain(wait=True)
+            self._f.flush()
+
+    def close(self):
+        if not self.closed:
+            try:
+                # An empty block keeps an empty file valid
+                if self._chunks or not (self.blocks or self._pending):
+                    self._end_block()
+                self._drain(wait=True)
+                self._f.flush()
+            finally:
+                self._pool.close()
+                if self._closefd:
+                    self._f.close()
+        super(BlockWriter, self).close()
+
+
+def index_value(value):
+
+    """
+    Convert a value given to `BlockWriter.note()` to something that can be
+    stored in an index and compared as a string, like a timestamp.
+    """
+
+    if isinstance(value, datetime.datetime):
+        return datetime2str(value)
+    return value
+
+
+def read_index(path):
+
+    """
+    Read a sidecar index written by `write_index()`.
+
+    Returns
+    -------
+    list
+        One dictionary per block.
+    """
+
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_index(path, blocks, mode='w'):
+
+    """
+    Write a sidecar index for `BlockWriter.blocks` as newline delimited JSON.
+    Each block is described by its `offset`, `size`, `uncompressed_size`,
+    `first_message`, message `count`, `first_timestamp`, and `last_timestamp`.
+    When appending, message numbers continue from the existing index.
+    """
+
+    first_message = 0
+    if mode == 'a' and os.path.exists(path):
+        first_message = sum(b['count'] for b in read_index(path))
+
+    with open(path, mode) as f:
+        for block in blocks:
+            f.write(json.dumps({
+                'offset': block['offset'],
+                'size': block['size'],
+                'uncompressed_size': block['uncompressed_size'],
+                'first_message': first_message,
+                'count': block['count'],
+                'first_timestamp': index_value(block['first']),
+                'last_timestamp': index_value(block['last'])
+            }, sort_keys=True) + '\n')
+            first_message += block['count']
+
+
+def select_blocks(blocks, start_block=0, num_blocks=None, start_message=None,
+                  start_time=None, end_time=None):
+
+    """
+    Select blocks from an index.  Time ranges assume the file is sorted by
+    timestamp and are block granular, so the selection may include messages
+    outside the range.  Blocks lacking timestamps are always included.
+
+    Returns
+    -------
+    tuple
+        `(blocks, number of messages to skip in the first block)`
+    """
+
+    blocks = blocks[start_block:]
+    if num_blocks is not None:
+        blocks = blocks[:num_blocks]
+
+    if start_message is not None:
+        blocks = [b for b in blocks if b['first_message'] + b['count'] > start_message]
+
+    if start_time is not None:
+        start_time = index_value(start_time)
+        while blocks and blocks[0]['last_timestamp'] is not None \
+                and blocks[0]['last_timestamp'] < start_time:
+            blocks = blocks[1:]
+
+    if end_time is not None:
+        end_time = index_value(end_time)
+        while blocks and blocks[-1]['first_timestamp'] is not None \
+                and blocks[-1]['first_timestamp'] > end_time:
+            blocks = blocks[:-1]
+
+    skip = 0
+    if start_message is not None and blocks:
+        skip = max(0, start_message - blocks[0]['first_message'])
+
+    return blocks, skip
@@ -0,0 +1,149 @@
+"""
+Write buffering for `gpsdio.drivers.NewlineJSONDriver()` and
+`gpsdio.drivers.MsgPackDriver()`.
+"""
+
+
+import threading
+
+import six
+
+
+class WriteBuffer(object):
+
+    """
+    Accumulate serialized messages and write them to a file-like object, like
+    a compression driver, in chunks of at least `buffer_size`, so each small
+    write doesn't separately cross into the compressor.  Messages are always
+    written whole.
+    """
+
+    def __init__(self, f, buffer_size=1024 ** 2):
+        self._f = f
+        self._buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+        self.closed = False
+
+    @property
+    def name(self):
+        return getattr(self._f, 'name', '<unknown name>')
+
+    @property
+    def mode(self):
+        return getattr(self._f, 'mode', None)
+
+    def _write(self):
+        if self._chunks:
+            data = self._chunks[0][:0].join(self._chunks)
+            self._chunks = []
+            self._size = 0
+            self._f.write(data)
+
+    def write(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self._buffer_size:
+            self._write()
+        return len(data)
+
+    def flush(self):
+
+        """
+        Write all buffered messages and flush the file.
+        """
+
+        self._write()
+        if hasattr(self._f, 'flush'):
+            self._f.flush()
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._write()
+            finally:
+                self._f.close()
+                self.closed = True
+
+
+class TimedWriteBuffer(WriteBuffer):
+
+    """
+    Like `WriteBuffer()`, but buffered messages are written and the file
+    flushed no more than `flush_interval` seconds after a message is
+    written, even if nothing else is written, so a slow stream is never held
+    in a buffer for long.  A timer thread flushes during quiet periods and any
+    exception it raises is raised by every later call to `write()`, `flush()`,
+    or `close()`, so nothing is written after a failure.
+    """
+
+    def __init__(self, f, buffer_size=1024 ** 2, flush_interval=1):
+        super(TimedWriteBuffer, self).__init__(f, buffer_size)
+        self._flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._timer = None
+        self._error = None
+
+    def _raise(self):
+        if self._error is not None:
+            raise self._error
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+            if not self.closed:
+                try:
+                    super(TimedWriteBuffer, self).flush()
+                except Exception as e:
+                    self._error = e
+
+    def write(self, data):
+        with self._lock:
+            self._raise()
+            super(TimedWriteBuffer, self).write(data)
+            if self._timer is None:
+                self._timer = threading.Timer(self._flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return len(data)
+
+    def flush(self):
+        with self._lock:
+            self._raise()
+            super(TimedWriteBuffer, self).flush()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.closed:
+                return
+            if self._error is not None:
+                self._chunks = []
+                self._size = 0
+            try:
+                self._raise()
+            finally:
+                super(TimedWriteBuffer, self).close()
+
+
+def open_buffered(name, mode, buffer_size, flush_interval=None):
+
+    """
+    Open a path or wrap a file-like object to buffer writes.  Paths are
+    opened with a `buffer_size` buffer, which is cheaper than `WriteBuffer()`
+    unless a `flush_interval` is needed.
+
+    Returns
+    -------
+    file or WriteBuffer or TimedWriteBuffer
+    """
+
+    if isinstance(name, six.string_types):
+        if flush_interval is None:
+            return open(name, mode=mode, buffering=buffer_size)
+        name = open(name, mode=mode)
+    if flush_interval is None:
+        return WriteBuffer(name, buffer_size=buffer_size)
+    return TimedWriteBuffer(name, buffer_size=buffer_size, flush_interval=flush_interval)
@@ -0,0 +1,42 @@
+"""
+Entry-point discovery without importing `pkg_resources`, which is slow.
+"""
+
+
+def iter_entry_points(group):
+
+    """
+    Get the entry-points registered for a group.  Uses `importlib.metadata`
+    when available and falls back to `pkg_resources`.
+
+    Parameters
+    ----------
+    group : str
+        Entry-point group name.
+
+    Returns
+    -------
+    list
+        Objects with a `name` attribute and a `load()` method.
+    """
+
+    try:
+        from importlib import metadata
+    except ImportError:
+        from pkg_resources import iter_entry_points as _iter_entry_points
+        return list(_iter_entry_points(group))
+
+    eps = metadata.entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:
+        eps = eps.get(group, ())
+
+    # The same distribution can be found more than once on the path
+    out = []
+    seen = set()
+    for ep in eps:
+        if (ep.name, ep.value) not in seen:
+            seen.add((ep.name, ep.value))
+            out.append(ep)
+    return out
@@ -0,0 +1,100 @@
+"""
+Bulk newline delimited JSON decoding for `gpsdio.drivers.NewlineJSONDriver()`.
+
+Rather than decoding one line per `next()` call, large buffers are read from
+the underlying stream, split on newlines, and every complete line in the
+buffer is decoded with a single call to `orjson.loads()` by joining them into
+a JSON array.
+"""
+
+
+def _read_available(stream):
+
+    """
+    Get a function like `stream.read()` that returns as soon as any data is
+    available, rather than waiting for a full buffer, so streaming input
+    like a pipe or `sys.stdin` isn't held up.  Text streams are read from
+    their underlying binary buffer when possible.
+    """
+
+    for s in (stream, getattr(stream, 'buffer', None)):
+        if hasattr(s, 'read1'):
+            return s.read1
+    return stream.read
+
+
+class BulkReader(object):
+
+    """
+    Read newline delimited JSON from anything with a `read()` method,
+    including compression drivers, in buffers of up to `buffer_size`.
+    Messages are decoded as soon as a read returns, so input arriving slowly
+    through a pipe is decoded as it arrives.  Blank lines are skipped.
+    """
+
+    mode = 'r'
+
+    def __init__(self, stream, buffer_size=1024 ** 2, closefd=True):
+        import orjson
+        self._loads = orjson.loads
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._closefd = closefd
+        self._messages = self._iter_messages()
+        self.closed = False
+
+    @property
+    def name(self):
+        return getattr(self._stream, 'name', '<unknown name>')
+
+    def _decode(self, lines, sep):
+        try:
+            decoded = self._loads(sep[0] + sep[1].join(lines) + sep[2])
+        except ValueError:
+            decoded = None
+        # A line holding several values, like '{...}, {...}', is valid inside
+        # the array but not on its own
+        if decoded is not None and len(decoded) == len(lines):
+            return decoded
+        # Blank line or an error, which is raised for the offending line
+        return [self._loads(line) for line in lines if line.strip()]
+
+    def _iter_messages(self):
+        read = _read_available(self._stream)
+        leftover = None
+        sep = None
+        while True:
+            chunk = read(self._buffer_size)
+            if not chunk:
+                break
+            elif sep is None:
+                sep = ('[', ',', ']', '\n') if isinstance(chunk, str) \
+                    else (b'[', b',', b']', b'\n')
+            if leftover:
+                chunk = leftover + chunk
+
+            end = chunk.rfind(sep[3])
+            if end == -1:
+                leftover = chunk
+                continue
+            leftover = chunk[end + 1:]
+            for msg in self._decode(chunk[:end].split(sep[3]), sep):
+                yield msg
+
+        # Last line without a newline
+        if leftover and leftover.strip():
+            yield self._loads(leftover)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._messages)
+
+    next = __next__
+
+    def close(self):
+        if not self.closed:
+            if self._closefd:
+                self._stream.close()
+            self.closed = True
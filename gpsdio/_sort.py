@@ -0,0 +1,142 @@
+"""
+External merge sort helpers for `gpsdio.ops.sort()` and `gpsdio.ops.merge()`.
+Kept out of `gpsdio.ops` so the modules they need never end up in the scope
+`gpsdio.ops.filter()` expressions are evaluated in.
+"""
+
+
+import datetime
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+
+import msgpack
+
+from gpsdio.validate import datetime2str
+from gpsdio.validate import str2datetime
+
+
+# MsgPack extension type code for datetimes in temporary files
+_DATETIME_EXT = 1
+
+
+def external_sort(stream, key, run_size, tmpdir=None, fan_in=64):
+
+    """
+    Sort messages with sorted runs of `run_size` messages written to temporary
+    MsgPack files in a working directory under `tmpdir` and merged, no more
+    than `fan_in` at once.  The working directory is always removed.
+    """
+
+    stream = iter(stream)
+    workdir = None
+    try:
+        runs = []
+        while True:
+            run = sorted(itertools.islice(stream, run_size), key=key)
+            if not run:
+                break
+            elif not runs and len(run) < run_size:
+                # Everything fits in a single run so don't bother with the disk
+                for msg in run:
+                    yield msg
+                return
+            if workdir is None:
+                workdir = tempfile.mkdtemp(prefix='gpsdio-sort-', dir=tmpdir)
+            runs.append(spill(run, workdir))
+            del run
+
+        # Merging consecutive runs keeps the sort stable
+        while len(runs) > fan_in:
+            merged = []
+            for idx in range(0, len(runs), fan_in):
+                group = runs[idx:idx + fan_in]
+                if len(group) == 1:
+                    merged.extend(group)
+                else:
+                    merged.append(spill(merge_runs(group, key), workdir))
+                    for path in group:
+                        os.remove(path)
+            runs = merged
+
+        messages = merge_runs(runs, key)
+        try:
+            for msg in messages:
+                yield msg
+        finally:
+            messages.close()
+
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def merge_runs(paths, key):
+
+    """
+    Merge runs written by `spill()`, closing them when done.
+    """
+
+    files = [open(path, 'rb') for path in paths]
+    try:
+        for msg in merge([unspill(f) for f in files], key):
+            yield msg
+    finally:
+        for f in files:
+            f.close()
+
+
+def merge(streams, key):
+
+    """
+    Stable k-way merge of sorted streams.  Ties are broken by stream order and
+    then position so messages themselves are never compared.
+    """
+
+    def decorate(idx, stream):
+        for seq, msg in enumerate(stream):
+            yield (key(msg), idx, seq), msg
+
+    for _, msg in heapq.merge(*[decorate(idx, s) for idx, s in enumerate(streams)]):
+        yield msg
+
+
+def spill(msgs, workdir):
+
+    """
+    Write messages to a new temporary MsgPack file in `workdir`.  Datetimes
+    are preserved.
+
+    Returns
+    -------
+    str
+        Path to the file.
+    """
+
+    def default(obj):
+        if isinstance(obj, datetime.datetime):
+            return msgpack.ExtType(_DATETIME_EXT, datetime2str(obj).encode('utf-8'))
+        raise TypeError("Cannot serialize: {}".format(repr(obj)))
+
+    fd, path = tempfile.mkstemp(suffix='.msg', dir=workdir)
+    with os.fdopen(fd, 'wb') as f:
+        packer = msgpack.Packer(default=default, use_bin_type=True)
+        for msg in msgs:
+            f.write(packer.pack(msg))
+    return path
+
+
+def unspill(f):
+
+    """
+    Read messages written by `spill()`.
+    """
+
+    def ext_hook(code, data):
+        if code == _DATETIME_EXT:
+            return str2datetime(data.decode('utf-8'))
+        return msgpack.ExtType(code, data)
+
+    return msgpack.Unpacker(f, raw=False, ext_hook=ext_hook)
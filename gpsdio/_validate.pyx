@@ -73,10 +73,10 @@ cdef bint _float_exclude_min_include_max(float minimum, float value, float maxim
 
 cdef class IntRange:
 
-    cdef int minimum
-    cdef int maximum
-    cdef bint include_min
-    cdef bint include_max
+    cdef readonly int minimum
+    cdef readonly int maximum
+    cdef readonly bint include_min
+    cdef readonly bint include_max
 
     def __init__(self, int minimum=MININT, int maximum=MAXINT, bint include_min=True, bint include_max=True):
         self.minimum = minimum
@@ -114,10 +114,10 @@ cdef class IntRange:
 
 cdef class FloatRange:
 
-    cdef float minimum
-    cdef float maximum
-    cdef bint include_min
-    cdef bint include_max
+    cdef readonly float minimum
+    cdef readonly float maximum
+    cdef readonly bint include_min
+    cdef readonly bint include_max
 
     def __init__(self, float minimum=MINFLOAT, float maximum=MAXFLOAT, bint include_min=True, bint include_max=True):
         self.minimum = minimum
@@ -161,6 +161,10 @@ cdef class IntIn:
         self.a = array.array('I', values)
         self.a_len = len(values)
 
+    @property
+    def values(self):
+        return list(self.a)
+
     def coerce(self, obj):
         return int(obj)
 
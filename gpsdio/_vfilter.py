@@ -0,0 +1,506 @@
+"""
+Vectorized evaluation of `gpsdio.ops.filter()` expressions with NumPy.
+
+Only a common subset of expressions is supported: comparisons between fields
+and constants, `in` and `not in`, `and`, `or`, `not`, `'field' in msg`, and
+`field.year`-style attribute access on datetimes.  Each expression is compiled
+into a function computing a boolean mask for a batch of messages.  A message
+lacking a field would raise a `NameError` when evaluated by `eval()`, so masks
+are computed alongside an error mask to replicate how `and` and `or` short
+circuit around missing fields.
+
+Anything that can't be vectorized, either because of the expression itself or
+the values in a batch, like a field containing `None` or mixed types, raises
+`Unsupported` so the caller can fall back to evaluating messages one by one
+and get the exact same result, or exception.
+"""
+
+
+import ast
+import datetime
+import operator
+
+import numpy as np
+import six
+
+
+class Unsupported(Exception):
+
+    """
+    An expression or batch can't be vectorized.
+    """
+
+
+_COMPARE = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+_DATETIME_ATTRS = ('year', 'month', 'day', 'hour', 'minute', 'second', 'microsecond')
+
+
+def _is_numeric(value):
+    return isinstance(value, (bool, float) + six.integer_types)
+
+
+def _is_string(value):
+    return isinstance(value, six.string_types)
+
+
+def _compatible(kind, value):
+
+    """
+    Check if comparing a column of the given dtype kind with a constant gives
+    the same result in NumPy as in Python without raising an exception.
+    """
+
+    if kind in 'biuf':
+        return _is_numeric(value)
+    elif kind == 'U':
+        return _is_string(value)
+    else:
+        return False
+
+
+class _Missing(object):
+
+    """
+    Placeholder for fields a message doesn't have.  Only equal to itself.
+    """
+
+    __slots__ = ()
+
+
+_MISSING = _Missing()
+
+
+class Columns(object):
+
+    """
+    Lazily builds columns for the fields referenced by the expressions being
+    evaluated against a batch of messages.
+    """
+
+    def __init__(self, msgs):
+        self.msgs = msgs
+        self.size = len(msgs)
+        self._raw = {}
+        self._present = {}
+        self._columns = {}
+
+    def _get(self, name):
+
+        """
+        Get a field from every message, or `_MISSING`.
+        """
+
+        if name not in self._raw:
+            self._raw[name] = [m.get(name, _MISSING) for m in self.msgs]
+        return self._raw[name]
+
+    def present(self, name):
+
+        """
+        Mask of messages containing a field.
+        """
+
+        if name not in self._present:
+            raw = self._get(name)
+            if _MISSING in raw:
+                self._present[name] = np.array([v is not _MISSING for v in raw], dtype=bool)
+            else:
+                self._present[name] = np.ones(self.size, dtype=bool)
+        return self._present[name]
+
+    def values(self, name):
+
+        """
+        Get the values of a field as an array with an arbitrary value for
+        messages lacking the field.
+        """
+
+        if name not in self._columns:
+            present = self.present(name)
+            values = self._get(name)
+            if not present.all():
+                values = [v for v in values if v is not _MISSING]
+            types = set(map(type, values))
+
+            if types == {datetime.datetime}:
+                if any(v.tzinfo is not None for v in values):
+                    raise Unsupported("Timezone aware datetimes: {}".format(name))
+                dtype = 'M8[us]'
+            elif types <= {bool} | set(six.integer_types):
+                dtype = 'i8' if types - {bool} else '?'
+            elif types <= {bool, float} | set(six.integer_types):
+                # Integers can't be exactly represented as floats past 2 ** 53
+                if any(abs(v) > 2 ** 53 for v in values if type(v) is not float):
+                    raise Unsupported("Large integers mixed with floats: {}".format(name))
+                dtype = 'f8'
+            elif types <= set(six.string_types):
+                dtype = 'U'
+            else:
+                raise Unsupported("Field doesn't contain a single type: {}".format(name))
+
+            try:
+                array = np.array(values, dtype=dtype)
+            except OverflowError:
+                raise Unsupported("Values overflow: {}".format(name))
+
+            column = np.zeros(self.size, dtype=array.dtype)
+            column[present] = array
+            self._columns[name] = column
+
+        return self._columns[name]
+
+
+class RawColumns(Columns):
+
+    """
+    Columns for messages that have not been validated yet, for
+    `gpsdio.ops.prefilter()`.  Like validation, only the fields in `fields`,
+    the set of fields the validator has for each message's type or `None`
+    for an unknown type, are visible.  A batch containing a message that
+    lacks a field its type requires can't be vectorized.
+    """
+
+    def __init__(self, msgs, fields):
+        super(RawColumns, self).__init__(msgs)
+        self._fields = fields
+
+    @property
+    def unknown(self):
+
+        """
+        Mask of messages with an unknown type.
+        """
+
+        return np.array([f is None for f in self._fields], dtype=bool)
+
+    def _get(self, name):
+        if name not in self._raw:
+            values = []
+            for msg, fields in zip(self.msgs, self._fields):
+                if fields is None or name not in fields:
+                    values.append(_MISSING)
+                elif name in msg:
+                    values.append(msg[name])
+                else:
+                    raise Unsupported("Message lacks a required field: {}".format(name))
+            self._raw[name] = values
+        return self._raw[name]
+
+
+class _Node(object):
+
+    """
+    Result of evaluating part of an expression against a batch.  `error` is
+    `True` for messages where `eval()` would have raised a `NameError`.
+    """
+
+    __slots__ = ('value', 'error', 'is_const')
+
+    def __init__(self, value, error=None, is_const=False):
+        self.value = value
+        self.error = error
+        self.is_const = is_const
+
+
+def _constant(node):
+
+    """
+    Get the value of a constant node or raise `Unsupported`.
+    """
+
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        return tuple(_constant(n) for n in node.elts)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant(node.operand)
+        if not _is_numeric(value):
+            raise Unsupported("Unary operator on non-number")
+        return -value if isinstance(node.op, ast.USub) else value
+    elif hasattr(ast, 'Constant') and isinstance(node, ast.Constant):
+        return node.value
+    elif isinstance(node, getattr(ast, 'Num', ())):
+        return node.n
+    elif isinstance(node, getattr(ast, 'Str', ())):
+        return node.s
+    elif isinstance(node, getattr(ast, 'NameConstant', ())):
+        return node.value
+    raise Unsupported("Not a constant: {}".format(ast.dump(node)))
+
+
+class _Compiler(object):
+
+    def __init__(self, global_names):
+        self.global_names = global_names
+
+    def compile(self, node):
+
+        """
+        Convert an AST node into a function taking `Columns()` and returning
+        a `_Node()`.
+        """
+
+        if isinstance(node, ast.Expression):
+            return self.truth(node.body)
+
+        elif isinstance(node, ast.Name):
+            if node.id == 'msg':
+                raise Unsupported("Name is not a field: {}".format(node.id))
+            name = node.id
+            shadows = name in self.global_names
+
+            def func(cols):
+                present = cols.present(name)
+                # Names like `type` resolve to a builtin if the field is missing
+                if shadows and not present.all():
+                    raise Unsupported("Field shadows a global: {}".format(name))
+                return _Node(cols.values(name), ~present)
+            return func
+
+        elif isinstance(node, ast.Attribute):
+            if not isinstance(node.value, ast.Name) or node.attr not in _DATETIME_ATTRS:
+                raise Unsupported("Unsupported attribute: {}".format(node.attr))
+            field = self.compile(node.value)
+            attr = node.attr
+
+            def func(cols):
+                col = field(cols)
+                if col.value.dtype.kind != 'M':
+                    raise Unsupported("Attribute access on non-datetime")
+                return _Node(_datetime_attr(col.value, attr), col.error)
+            return func
+
+        elif isinstance(node, ast.BoolOp):
+            funcs = [self.truth(v) for v in node.values]
+            combine = _and if isinstance(node.op, ast.And) else _or
+
+            def func(cols):
+                out = funcs[0](cols)
+                for f in funcs[1:]:
+                    out = combine(out, f(cols))
+                return out
+            return func
+
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self.truth(node.operand)
+
+            def func(cols):
+                out = operand(cols)
+                return _Node(~out.value, out.error)
+            return func
+
+        elif isinstance(node, ast.Compare):
+            return self.compare(node)
+
+        else:
+            value = _constant(node)
+            return lambda cols: _Node(value, is_const=True)
+
+    def truth(self, node):
+
+        """
+        Like `compile()` but the result is converted to a boolean mask.
+        """
+
+        func = self.compile(node)
+
+        def truth(cols):
+            out = func(cols)
+            if out.is_const:
+                raise Unsupported("Constant in a boolean context")
+            elif out.value.dtype == bool:
+                return out
+            elif out.value.dtype.kind in 'iuf':
+                return _Node(out.value != 0, out.error)
+            elif out.value.dtype.kind == 'U':
+                return _Node(np.char.str_len(out.value) > 0, out.error)
+            raise Unsupported("Can't get truth value of: {}".format(out.value.dtype))
+        return truth
+
+    def compare(self, node):
+        if len(node.ops) != 1:
+            raise Unsupported("Chained comparison")
+        op = node.ops[0]
+        left = node.left
+        right = node.comparators[0]
+
+        # 'field' in msg
+        if isinstance(op, (ast.In, ast.NotIn)) \
+                and isinstance(right, ast.Name) and right.id == 'msg':
+            name = _constant(left)
+            if not _is_string(name):
+                raise Unsupported("Only field names can be checked for membership in msg")
+            if isinstance(op, ast.In):
+                return lambda cols: _Node(cols.present(name), np.zeros(cols.size, bool))
+            else:
+                return lambda cols: _Node(~cols.present(name), np.zeros(cols.size, bool))
+
+        lfunc = self.compile(left)
+        rfunc = self.compile(right)
+
+        if isinstance(op, (ast.In, ast.NotIn)):
+            invert = isinstance(op, ast.NotIn)
+
+            def func(cols):
+                lhs = lfunc(cols)
+                rhs = rfunc(cols)
+                if lhs.is_const or not rhs.is_const or not isinstance(rhs.value, tuple):
+                    raise Unsupported("Only `field in (constants, ...)` is supported")
+                kind = lhs.value.dtype.kind
+                if not all(_compatible(kind, v) for v in rhs.value):
+                    raise Unsupported("Incompatible types for membership test")
+                mask = np.isin(lhs.value, list(rhs.value)) if rhs.value \
+                    else np.zeros(cols.size, bool)
+                return _Node(~mask if invert else mask, lhs.error)
+            return func
+
+        elif type(op) in _COMPARE:
+            compare = _COMPARE[type(op)]
+
+            def func(cols):
+                lhs = lfunc(cols)
+                rhs = rfunc(cols)
+                if lhs.is_const and rhs.is_const:
+                    raise Unsupported("Comparison between constants")
+                elif lhs.is_const or rhs.is_const:
+                    col, const = (rhs, lhs) if lhs.is_const else (lhs, rhs)
+                    if not _compatible(col.value.dtype.kind, const.value):
+                        raise Unsupported("Incompatible types for comparison")
+                    error = col.error
+                else:
+                    kinds = lhs.value.dtype.kind + rhs.value.dtype.kind
+                    if not (set(kinds) <= set('biuf') or kinds == 'UU'):
+                        raise Unsupported("Incompatible types for comparison")
+                    # Python evaluates left first, but a NameError from either
+                    # side is still a NameError
+                    error = lhs.error | rhs.error
+                return _Node(np.asarray(compare(lhs.value, rhs.value), dtype=bool), error)
+            return func
+
+        raise Unsupported("Unsupported comparison: {}".format(type(op).__name__))
+
+
+def _and(a, b):
+    # `b` is only evaluated if `a` is True
+    error = a.error | (a.value & ~a.error & b.error)
+    return _Node(a.value & b.value & ~error, error)
+
+
+def _or(a, b):
+    # `b` is only evaluated if `a` is False
+    b_evaluated = ~a.value & ~a.error
+    error = a.error | (b_evaluated & b.error)
+    return _Node((a.value | (b_evaluated & b.value)) & ~error, error)
+
+
+def _datetime_attr(values, attr):
+
+    """
+    Get an attribute like `year` or `hour` from an array of datetimes.
+    """
+
+    if attr == 'year':
+        return values.astype('M8[Y]').astype('i8') + 1970
+    elif attr == 'month':
+        return values.astype('M8[M]').astype('i8') % 12 + 1
+    elif attr == 'day':
+        return (values.astype('M8[D]') - values.astype('M8[M]')).astype('i8') + 1
+    elif attr == 'hour':
+        return (values.astype('M8[h]') - values.astype('M8[D]')).astype('i8')
+    elif attr == 'minute':
+        return (values.astype('M8[m]') - values.astype('M8[h]')).astype('i8')
+    elif attr == 'second':
+        return (values.astype('M8[s]') - values.astype('M8[m]')).astype('i8')
+    else:
+        return (values - values.astype('M8[s]')).astype('i8')
+
+
+def compile_expression(expression, global_names):
+
+    """
+    Compile a filter expression into a function that computes a mask of
+    passing messages from `Columns()`.
+
+    Parameters
+    ----------
+    expression : str
+        A `gpsdio.ops.filter()` expression.
+    global_names : container
+        Names in the expression's global scope, including builtins.  Fields
+        with these names are only vectorized if every message in a batch
+        has the field.
+
+    Raises
+    ------
+    Unsupported
+        If the expression can't be vectorized.  Can also be raised by the
+        returned function if a batch can't be vectorized.
+
+    Returns
+    -------
+    callable
+    """
+
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        raise Unsupported("Invalid syntax")
+    func = _Compiler(global_names).compile(tree)
+
+    def predicate(cols):
+        out = func(cols)
+        return out.value & ~out.error
+
+    return predicate
+
+
+def filter_batch(msgs, predicates, fallbacks, cols=None, always=None):
+
+    """
+    Filter a batch of messages.
+
+    Parameters
+    ----------
+    msgs : list
+        GPSd messages.
+    predicates : list
+        Output from `compile_expression()` or `None` for each expression.
+    fallbacks : list
+        Functions evaluating a single message for each expression.  Used if
+        the predicate is `None` or raises `Unsupported`.
+    cols : Columns, optional
+        Columns for `msgs`.  Defaults to `Columns(msgs)`.
+    always : numpy.ndarray, optional
+        Mask of messages to keep regardless of the expressions.
+
+    Returns
+    -------
+    list
+        Messages passing all expressions.
+    """
+
+    cols = Columns(msgs) if cols is None else cols
+    keep = np.ones(len(msgs), dtype=bool)
+    for predicate, fallback in zip(predicates, fallbacks):
+        mask = None
+        if predicate is not None:
+            try:
+                mask = predicate(cols)
+            except Unsupported:
+                pass
+        if mask is None:
+            for idx in np.flatnonzero(keep):
+                if not fallback(msgs[idx]):
+                    keep[idx] = False
+        else:
+            keep &= mask
+    if always is not None:
+        keep |= always
+    return [msgs[idx] for idx in np.flatnonzero(keep)]
@@ -0,0 +1,137 @@
+"""
+Block level access to XZ files for `gpsdio.drivers.XZDriver()`.
+
+An XZ file is one or more concatenated streams, each containing any number
+of independently compressed blocks and ending with an index of their sizes.
+Reading the indexes from the end of the file locates every block, which can
+then be decompressed on its own, in parallel, or skipped entirely.
+"""
+
+
+from collections import namedtuple
+import lzma
+import struct
+
+import six
+
+
+_HEADER_MAGIC = b'\xfd7zXZ\x00'
+_FOOTER_MAGIC = b'YZ'
+_HEADER_SIZE = 12
+_FOOTER_SIZE = 12
+
+
+XZBlock = namedtuple(
+    'XZBlock', ('offset', 'size', 'uncompressed_offset', 'uncompressed_size', 'header'))
+XZBlock.__doc__ = """
+A single block in an XZ file.  `offset` and `size` locate the compressed
+block, `uncompressed_offset` and `uncompressed_size` locate its data in the
+decompressed file, and `header` is the header of the stream containing the
+block, which is required to decompress it.
+"""
+
+
+def _round4(size):
+    return (size + 3) // 4 * 4
+
+
+def _varint(buf, offset):
+
+    """
+    Decode a multibyte integer from an XZ index.
+
+    Returns
+    -------
+    tuple
+        `(value, offset of the next byte)`
+    """
+
+    value = 0
+    shift = 0
+    while True:
+        byte = six.indexbytes(buf, offset)
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def index(f):
+
+    """
+    Read the location of every block in an XZ file.
+
+    Parameters
+    ----------
+    f : file
+        Seekable file opened in binary mode.
+
+    Raises
+    ------
+    IOError
+        The file is not a valid XZ file.
+
+    Returns
+    -------
+    list
+        `XZBlock()` for every block in the order they appear in the file.
+    """
+
+    f.seek(0, 2)
+    position = f.tell()
+    streams = []
+
+    while position > 0:
+
+        # Streams can be followed by null padding in multiples of 4 bytes
+        f.seek(position - 4)
+        if f.read(4) == b'\x00' * 4:
+            position -= 4
+            continue
+
+        f.seek(position - _FOOTER_SIZE)
+        footer = f.read(_FOOTER_SIZE)
+        if len(footer) != _FOOTER_SIZE or footer[10:] != _FOOTER_MAGIC:
+            raise IOError("Invalid XZ stream footer at byte {}".format(position - _FOOTER_SIZE))
+        index_size = (struct.unpack('<I', footer[4:8])[0] + 1) * 4
+        index_start = position - _FOOTER_SIZE - index_size
+
+        f.seek(index_start)
+        buf = f.read(index_size)
+        count, offset = _varint(buf, 1)
+        records = []
+        for _ in range(count):
+            size, offset = _varint(buf, offset)
+            uncompressed_size, offset = _varint(buf, offset)
+            records.append((_round4(size), uncompressed_size))
+
+        start = index_start - sum(size for size, _ in records) - _HEADER_SIZE
+        f.seek(start)
+        header = f.read(_HEADER_SIZE)
+        if start < 0 or not header.startswith(_HEADER_MAGIC):
+            raise IOError("Invalid XZ stream header at byte {}".format(start))
+
+        streams.append((start, header, records))
+        position = start
+
+    blocks = []
+    uncompressed_offset = 0
+    for start, header, records in reversed(streams):
+        offset = start + _HEADER_SIZE
+        for size, uncompressed_size in records:
+            blocks.append(XZBlock(
+                offset, size, uncompressed_offset, uncompressed_size, header))
+            offset += size
+            uncompressed_offset += uncompressed_size
+
+    return blocks
+
+
+def decompress_block(data, header):
+
+    """
+    Decompress a single block given the header of its stream.
+    """
+
+    return lzma.LZMADecompressor(format=lzma.FORMAT_XZ).decompress(header + data)
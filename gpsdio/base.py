@@ -11,15 +11,24 @@ import six
 import gpsdio
 import gpsdio.errors
 from gpsdio.validate import datetime2str
-from gpsdio.validate import build_validator
+from gpsdio.validate import cached_build_validator
+from gpsdio.validate import cached_compile_inplace_validator
+from gpsdio.validate import cached_compile_validator
 
 
 logger = logging.getLogger('gpsdio')
 
 
+def _schema_error(error, msg):
+    return gpsdio.errors.SchemaError(
+        "Missing field '{}' from message OR type is undefined in the schema / "
+        "validator: {}".format(error.args[0], msg))
+
+
 class GPSDIOBaseStream(object):
 
-    def __init__(self, stream, mode='r', schema=None, _validator=None, _check=True):
+    def __init__(self, stream, mode='r', schema=None, validator=None, _validator=None,
+                 _check=True):
 
         """
         Read or write a stream of AIS data.
@@ -30,12 +39,20 @@ class GPSDIOBaseStream(object):
             Expects one dictionary per iteration.
         mode : str, optional
             Determines if stream is operating in read, write, or append mode.
+        schema : dict, optional
+            Validate messages against this schema.
+        validator : dict, optional
+            A dictionary that matches the output of `build_validator()`.  Can
+            be used to bypass building a full schema.  Building and compiling
+            a validator is cached, so re-using the same `schema` or `validator`
+            across streams is cheap.  Replacing a field's validator in either
+            is detected, but call `gpsdio.schema.clear_cache()` after
+            modifying a validator object itself.
 
         Experimental Parameters
         -----------------------
         _validator : dict, optional
-            A dictionary that matches the output of `build_validator()`.  Can
-            be used to bypass building a full schema.
+            Deprecated alias for `validator`.
         _check : bool, optional
             Should messages be checked against the schema?
 
@@ -47,11 +64,13 @@ class GPSDIOBaseStream(object):
             If a write mode is used.
         """
 
-        if schema and _validator:
+        validator = validator or _validator
+        if schema and validator:
             raise ValueError("Cannot supply both schema and validator.")
 
         self._schema = schema
-        self._validator = _validator or build_validator(self._schema)
+        self._validator = validator or cached_build_validator(self._schema)
+        self._compiled = cached_compile_validator(self._validator) if _check else None
         self._stream = stream
         self._iterator = stream
         self._check = _check
@@ -84,13 +103,57 @@ class GPSDIOBaseStream(object):
 
         if self._check:
             try:
-                return {n: v(msg[n]) for n, v in six.iteritems(self._validator[msg['type']])}
+                return self._compiled[msg['type']](msg)
             except KeyError as e:
-                raise gpsdio.errors.SchemaError(
-                    "Missing field '{}' from message OR type is undefined in the schema / "
-                    "validator: {}".format(e.args[0], msg))
+                raise _schema_error(e, msg)
         else:
             return msg
+
+    def _validate_in_place(self):
+
+        """
+        Validate messages in place when possible rather than building a
+        second validated message.  Only safe for streams producing freshly
+        decoded messages that nothing else references, so drivers opt in.
+        """
+
+        self._compiled = cached_compile_inplace_validator(self._validator)
+
+    def validate_msgs(self, msgs):
+
+        """
+        Validate a batch of messages against the supplied schema.  Equivalent
+        to calling `validate_msg()` on each message but avoids the per-call
+        overhead.
+
+        Parameters
+        ----------
+        msgs : iter
+            GPSd messages.
+
+        Raises
+        ------
+        SchemaError
+            A message does not match the schema.
+
+        Returns
+        -------
+        list
+            GPSd messages.
+        """
+
+        if not self._check:
+            return list(msgs)
+
+        msgs = msgs if isinstance(msgs, list) else list(msgs)
+        compiled = self._compiled
+        try:
+            return [compiled[msg['type']](msg) for msg in msgs]
+        except KeyError:
+            # Find the offending message to get the same error as validate_msg()
+            for msg in msgs:
+                self.validate_msg(msg)
+            raise
     #
     # def default_msg(self, type_):
     #
@@ -169,6 +232,9 @@ class BaseDriver(six.with_metaclass(_DriverRegistry, object)):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    def __iter__(self):
+        return self
+
     def __next__(self):
         return self.load(next(self.f))
 
@@ -177,6 +243,10 @@ class BaseDriver(six.with_metaclass(_DriverRegistry, object)):
     def write(self, msg):
         return self.f.write(self.dump(msg))
 
+    def flush(self):
+        if hasattr(self._f, 'flush'):
+            self._f.flush()
+
     @property
     def name(self):
         return self._f.name
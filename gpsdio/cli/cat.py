@@ -20,6 +20,9 @@ logger = logging.getLogger('gpsdio')
 
 @click.command(name='cat')
 @click.argument('infile', required=True)
+@click.option(
+    '--filter', 'filter_expr', metavar='EXPR', multiple=True,
+    help="Apply a filtering expression to the messages.  See `gpsdio etl`.")
 @click.option(
     '--geojson', is_flag=True,
     help="Experimental.  Print messages as GeoJSON.  Non-positional messages are dropped.")
@@ -29,7 +32,7 @@ logger = logging.getLogger('gpsdio')
 @options.input_compression_opts
 @options.output_driver_opts
 @click.pass_context
-def cat(ctx, infile, input_driver, geojson,
+def cat(ctx, infile, input_driver, filter_expr, geojson,
         input_compression, input_driver_opts, input_compression_opts, output_driver_opts):
 
     """
@@ -61,9 +64,13 @@ def cat(ctx, infile, input_driver, geojson,
             }
             kwargs.update(**ctx.obj['odefine'])
 
+        # Cheap expressions are evaluated before validation
+        filter_expr = src.pushdown(filter_expr)
+        messages = ops.filter(filter_expr, src) if filter_expr else src
+
         out = click.get_text_stream('stdout')
         with outlib.open(out, 'w', **kwargs) as dst:
-            for msg in src:
+            for msg in messages:
                 if geojson:
                     if 'lat' in msg and 'lon' in msg:
                         # Dump datetimes to string
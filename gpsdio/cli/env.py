@@ -100,6 +100,7 @@ def fields_cmd(field, indent):
         $ gpsdio env schema ${FIELD}
     """
 
+    gpsdio.schema.load_extensions()
     all_fields = gpsdio.schema.merge_fields(
         gpsdio.schema._FIELDS, gpsdio.schema.FIELD_EXTENSIONS)
 
@@ -129,6 +130,7 @@ def types_cmd(msg_type, indent, describe):
         $ gpsdio env schema ${TYPE}
     """
 
+    gpsdio.schema.load_extensions()
     all_types = gpsdio.schema.merge_fields_by_type(
         gpsdio.schema._FIELDS_BY_TYPE, gpsdio.schema.FIELDS_BY_TYPE_EXTENSIONS)
 
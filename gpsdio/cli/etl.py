@@ -3,11 +3,17 @@ gpsdio etl
 """
 
 
+import functools
+import io
 import logging
+import multiprocessing
+import os
 
 import click
 
 import gpsdio
+import gpsdio.drivers
+import gpsdio.io
 import gpsdio.ops
 from gpsdio.cli import options
 
@@ -15,16 +21,161 @@ from gpsdio.cli import options
 logger = logging.getLogger('gpsdio')
 
 
+# Upper limit for the amount of newline JSON a single --jobs task reads
+_MAX_TASK_BYTES = 64 * 1024 ** 2
+
+
+def _byte_ranges(path, chunks):
+
+    """
+    Split a newline delimited file into byte ranges that start and stop on
+    line boundaries.
+
+    Parameters
+    ----------
+    path : str
+        File to split.
+    chunks : int
+        Desired number of ranges.  Fewer may be produced for small files.
+
+    Returns
+    -------
+    list
+        `(start, stop)` offsets.
+    """
+
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for idx in range(1, chunks):
+            offset = size * idx // chunks
+            if offset <= bounds[-1]:
+                continue
+            f.seek(offset - 1)
+            f.readline()
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _etl_task(task, filter_expr, open_kwargs, batch_size=None):
+
+    """
+    Read and filter one `--jobs` task in a worker process.  Tasks are either
+    `(path, None)` to read an entire file or `(path, (start, stop))` to read a
+    byte range from a newline JSON or MsgPack file.
+    """
+
+    path, byte_range = task
+    if byte_range is None:
+        src = gpsdio.open(path, **open_kwargs)
+    elif gpsdio.io._detect_drivers(
+            path, open_kwargs.get('compression'), open_kwargs.get('driver')
+    )[1].driver_name == 'MsgPack':
+        start, stop = byte_range
+        do = dict(open_kwargs.get('do') or {}, start=start, stop=stop, mmap=True)
+        src = gpsdio.open(path, **dict(open_kwargs, do=do))
+    else:
+        start, stop = byte_range
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(stop - start).decode('utf-8')
+        open_kwargs = dict(open_kwargs, driver='NewlineJSON', compression=False)
+        src = gpsdio.open(io.StringIO(data), **open_kwargs)
+
+    with src:
+        filter_expr = src.pushdown(filter_expr, batch_size=batch_size)
+        return list(gpsdio.ops.filter(filter_expr, src, batch_size=batch_size)
+                    if filter_expr else src)
+
+
+def _etl_tasks(infiles, jobs, input_driver, input_compression):
+
+    """
+    Split the inputs into `--jobs` tasks.  Multiple inputs are split by file
+    and a single uncompressed newline JSON or MsgPack input is split by byte
+    range.
+    """
+
+    if len(infiles) == 1:
+        cmp_driver, io_driver = gpsdio.io._detect_drivers(
+            infiles[0], input_compression, input_driver)
+        chunks = max(jobs * 4, os.path.getsize(infiles[0]) // _MAX_TASK_BYTES + 1)
+        if cmp_driver is None and io_driver.driver_name == 'NewlineJSON':
+            return [(infiles[0], r) for r in _byte_ranges(infiles[0], chunks)]
+        elif cmp_driver is None and io_driver.driver_name == 'MsgPack':
+            return [(infiles[0], r)
+                    for r in gpsdio.drivers.MsgPackDriver.byte_ranges(infiles[0], chunks)]
+    return [(path, None) for path in infiles]
+
+
+def _etl_parallel(infiles, jobs, ordered, filter_expr, open_kwargs,
+                  input_driver, input_compression, batch_size=None):
+
+    """
+    Read and filter inputs with a pool of `jobs` processes and yield the
+    surviving messages.  No more than `2 * jobs` tasks are read ahead of the
+    messages being written, so memory is bounded by the task size.
+    """
+
+    tasks = _etl_tasks(infiles, jobs, input_driver, input_compression)
+    logger.debug("Split input into %s tasks for %s jobs", len(tasks), jobs)
+
+    worker = functools.partial(
+        _etl_task, filter_expr=filter_expr, open_kwargs=open_kwargs, batch_size=batch_size)
+    pool = multiprocessing.Pool(jobs)
+    try:
+        for msgs in gpsdio.io._imap_bounded(pool, worker, tasks, 2 * jobs, ordered=ordered):
+            for msg in msgs:
+                yield msg
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _etl_serial(infiles, filter_expr, open_kwargs, batch_size=None):
+
+    """
+    Read and filter inputs in the current process and yield the surviving
+    messages.
+    """
+
+    for path in infiles:
+        with gpsdio.open(path, **open_kwargs) as src:
+            remaining = src.pushdown(filter_expr, batch_size=batch_size)
+            for msg in gpsdio.ops.filter(remaining, src, batch_size=batch_size) \
+                    if remaining else src:
+                yield msg
+
+
 @click.command()
-@click.argument('infile', required=True)
+@click.argument('infiles', nargs=-1, required=True)
 @click.argument('outfile', required=True)
 @click.option(
     '--filter', 'filter_expr', metavar='EXPR', multiple=True,
     help="Apply a filtering expression to the messages.")
+@click.option(
+    '--filter-batch-size', type=click.IntRange(1), metavar='INTEGER',
+    help="Evaluate filters against batches of this many messages with NumPy.  Requires "
+         "numpy.")
 @click.option(
     '--sort', 'sort_field', metavar='FIELD',
-    help="Sort output messages by field.  Holds the entire file in memory and drops messages "
-         "lacking the specified field.")
+    help="Sort output messages by field.  Holds the entire file in memory unless "
+         "--sort-run-size is given.")
+@click.option(
+    '--sort-run-size', type=click.IntRange(1), metavar='INTEGER',
+    help="Sort with bounded memory by spilling sorted runs of this many messages to "
+         "temporary files and merging them.")
+@click.option(
+    '-j', '--jobs', type=click.IntRange(1), default=1, show_default=True,
+    help="Read and filter with this many processes.  Multiple inputs are split by file and "
+         "a single uncompressed newline JSON or MsgPack input is split by byte range.  "
+         "Cannot be used when reading from stdin.")
+@click.option(
+    '--unordered', is_flag=True,
+    help="With --jobs, write messages as soon as they are ready rather than in input order.")
 @options.input_driver
 @options.input_driver_opts
 @options.input_compression
@@ -33,10 +184,14 @@ logger = logging.getLogger('gpsdio')
 @options.output_driver_opts
 @options.output_compression
 @options.output_compression_opts
+@options.prefetch
+@options.write_behind
 @click.pass_context
-def etl(ctx, infile, outfile, filter_expr, sort_field,
-        input_driver, input_driver_opts, input_compression, input_compression_opts,
-        output_driver, output_driver_opts, output_compression, output_compression_opts):
+def etl(ctx, infiles, outfile, filter_expr, filter_batch_size, sort_field, sort_run_size,
+        jobs, unordered, input_driver, input_driver_opts, input_compression,
+        input_compression_opts,
+        output_driver, output_driver_opts, output_compression, output_compression_opts,
+        prefetch, write_behind):
 
     """
     Format conversion, filtering, and sorting.
@@ -53,6 +208,19 @@ def etl(ctx, infile, outfile, filter_expr, sort_field,
     Since fields differ by message type any expression that raises a `NameError`
     when evaluated is considered a failure.
 
+    Expressions that only reference integer and string fields, like `type` and
+    `mmsi`, are evaluated before messages are validated, so messages they
+    reject are never validated.  Use `--filter-batch-size` to evaluate
+    expressions against batches of messages with NumPy, which is faster for
+    compound expressions but may be slower for a single simple comparison.
+
+    Multiple input files are concatenated in the order they are given.  Use
+    `--jobs` to read and filter in parallel.  Messages are still written in
+    input order unless `--unordered` is given.
+
+    Use `--prefetch` and `--write-behind` to decompress input and compress
+    output on background threads, so parsing and compression overlap.
+
     Any Python expression that evalues as `True` or `False` can be used so so
     expressions can be combined into a single filter using `and` or split into
     multiple by using one instance of `--filter` for each side of the `and`.
@@ -81,22 +249,37 @@ def etl(ctx, infile, outfile, filter_expr, sort_field,
     logger.setLevel(ctx.obj['verbosity'])
     logger.debug('Starting etl')
 
+    open_kwargs = dict(
+        driver=input_driver,
+        compression=input_compression,
+        do=input_driver_opts,
+        co=input_compression_opts,
+        **ctx.obj['idefine'])
+    if prefetch:
+        open_kwargs['prefetch'] = prefetch
+
+    write_kwargs = dict(ctx.obj['odefine'])
+    if write_behind:
+        write_kwargs['write_behind'] = write_behind
+
+    if jobs > 1 and '-' in infiles:
+        raise click.BadParameter("Cannot read from stdin with multiple jobs.", param_hint='--jobs')
+    elif jobs > 1:
+        iterator = _etl_parallel(
+            infiles, jobs, not unordered, filter_expr, open_kwargs,
+            input_driver, input_compression, batch_size=filter_batch_size)
+    else:
+        iterator = _etl_serial(infiles, filter_expr, open_kwargs, batch_size=filter_batch_size)
+
     with gpsdio.open(
-            infile,
-            driver=input_driver,
-            compression=input_compression,
-            do=input_driver_opts,
-            co=input_compression_opts,
-            **ctx.obj['idefine']) as src:
-
-        with gpsdio.open(
-                outfile, 'w',
-                driver=output_driver,
-                compression=output_compression,
-                do=output_driver_opts,
-                co=output_compression_opts,
-                **ctx.obj['odefine']) as dst:
-
-            iterator = gpsdio.ops.filter(filter_expr, src) if filter_expr else src
-            for msg in gpsdio.ops.sort(iterator, sort_field) if sort_field else iterator:
-                dst.write(msg)
+            outfile, 'w',
+            driver=output_driver,
+            compression=output_compression,
+            do=output_driver_opts,
+            co=output_compression_opts,
+            **write_kwargs) as dst:
+
+        if sort_field:
+            iterator = gpsdio.ops.sort(iterator, sort_field, run_size=sort_run_size)
+        for msg in iterator:
+            dst.write(msg)
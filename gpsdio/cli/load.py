@@ -21,17 +21,26 @@ logger = logging.getLogger('gpsdio')
 @options.output_compression
 @options.output_driver_opts
 @options.output_compression_opts
+@options.write_behind
 @click.pass_context
 def load(ctx, outfile, input_driver_opts,
-         output_driver, output_driver_opts, output_compression, output_compression_opts):
+         output_driver, output_driver_opts, output_compression, output_compression_opts,
+         write_behind):
 
     """
     Load newline JSON msgs from stdin to a file.
+
+    Use `--write-behind` to compress output on a background thread while
+    parsing input.
     """
 
     logger.setLevel(ctx.obj['verbosity'])
     logger.debug('Starting load')
 
+    write_kwargs = dict(ctx.obj['odefine'])
+    if write_behind:
+        write_kwargs['write_behind'] = write_behind
+
     with gpsdio.open(
             '-',
             driver='NewlineJSON',
@@ -45,7 +54,7 @@ def load(ctx, outfile, input_driver_opts,
                 compression=output_compression,
                 co=output_compression_opts,
                 do=output_driver_opts,
-                **ctx.obj['odefine']) as dst:
+                **write_kwargs) as dst:
 
             for msg in src:
                 dst.write(msg)
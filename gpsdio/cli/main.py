@@ -5,24 +5,121 @@ other commands.
 
 
 import logging
-from pkg_resources import iter_entry_points
 import sys
 
 import click
-from click_plugins import with_plugins
+from click_plugins.core import BrokenCommand
 from str2type.ext import click_cb_key_val
 
 import gpsdio
-import gpsdio.drivers
+from gpsdio._entry_points import iter_entry_points
 
 
-entry_points = list(iter_entry_points('gpsdio.gpsdio_commands')) \
-    + list(iter_entry_points('gpsdio.gpsdio_plugins')) \
-    + list(iter_entry_points('gpsdio.cli_plugins'))
+class _PluginGroup(click.Group):
+
+    """
+    A `click.Group()` that only imports commands registered through the
+    entry-points below when they are needed.  Running `gpsdio cat` only
+    imports `gpsdio cat` rather than every command and plugin.  `gpsdio --help`
+    reads the short help for commands that haven't been loaded from their
+    docstrings without importing them.
+    """
+
+    entry_point_groups = (
+        'gpsdio.gpsdio_commands', 'gpsdio.gpsdio_plugins', 'gpsdio.cli_plugins')
+
+    def __init__(self, *args, **kwargs):
+        super(_PluginGroup, self).__init__(*args, **kwargs)
+        self._entry_points = None
+
+    @property
+    def entry_points(self):
+        if self._entry_points is None:
+            self._entry_points = {}
+            for group in self.entry_point_groups:
+                for ep in iter_entry_points(group):
+                    self._entry_points.setdefault(ep.name, ep)
+        return self._entry_points
+
+    def list_commands(self, ctx):
+        return sorted(
+            set(super(_PluginGroup, self).list_commands(ctx)) | set(self.entry_points))
+
+    def format_commands(self, ctx, formatter):
+        commands = []
+        for name in self.list_commands(ctx):
+            cmd = self.commands.get(name)
+            if cmd is None:
+                commands.append((name, None))
+            elif not getattr(cmd, 'hidden', False):
+                commands.append((name, cmd))
+
+        if commands:
+            limit = formatter.width - 6 - max(len(name) for name, _ in commands)
+            rows = []
+            for name, cmd in commands:
+                short_help = None
+                if cmd is None:
+                    short_help = _entry_point_short_help(self.entry_points[name], limit)
+                    if short_help is None:
+                        cmd = self.get_command(ctx, name)
+                if short_help is None:
+                    short_help = cmd.get_short_help_str(limit)
+                rows.append((name, short_help))
+            with formatter.section('Commands'):
+                formatter.write_dl(rows)
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.entry_points:
+            ep = self.entry_points[cmd_name]
+            try:
+                self.add_command(ep.load(), cmd_name)
+            except Exception:
+                # Catch this so a busted plugin doesn't take down the CLI.
+                self.add_command(BrokenCommand(ep.name), cmd_name)
+        return super(_PluginGroup, self).get_command(ctx, cmd_name)
+
+
+def _entry_point_short_help(ep, limit):
+
+    """
+    Get a command's short help from the docstring of the function an
+    entry-point refers to by parsing its module rather than importing it.
+
+    Returns
+    -------
+    str or None
+        `None` if the help can't be determined this way, like when the
+        command sets `help` or `short_help` explicitly or isn't a function.
+    """
+
+    import ast
+
+    from click.utils import make_default_short_help
+
+    try:
+        import importlib.util
+        module, _, attr = ep.value.partition(':')
+        spec = importlib.util.find_spec(module.strip())
+        with open(spec.origin) as f:
+            tree = ast.parse(f.read())
+    except Exception:
+        return None
+
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == attr.strip():
+            for decorator in node.decorator_list:
+                func = getattr(decorator, 'func', None)
+                name = getattr(func, 'attr', getattr(func, 'id', None))
+                if name in ('command', 'group') and any(
+                        k.arg in ('help', 'short_help') for k in decorator.keywords):
+                    return None
+            doc = ast.get_docstring(node) or ''
+            return make_default_short_help(doc.split('\f', 1)[0], limit)
+    return None
 
 
-@with_plugins(plugins=entry_points)
-@click.group()
+@click.group(cls=_PluginGroup)
 @click.version_option(gpsdio.__version__)
 @click.option('-v', '--verbose', count=True, help="Increase verbosity.")
 @click.option('-q', '--quiet', count=True, help="Decrease verbosity.")
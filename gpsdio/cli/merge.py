@@ -0,0 +1,80 @@
+"""
+gpsdio merge
+"""
+
+
+import logging
+
+import click
+
+import gpsdio
+import gpsdio.ops
+from gpsdio.cli import options
+
+
+logger = logging.getLogger('gpsdio')
+
+
+@click.command(name='merge')
+@click.argument('infiles', nargs=-1, required=True)
+@click.argument('outfile', required=True)
+@click.option(
+    '--field', metavar='FIELD', default='timestamp', show_default=True,
+    help="Field the inputs are sorted by.")
+@click.option(
+    '--check-sorted', is_flag=True,
+    help="Fail if an input is not sorted by the field.")
+@options.input_driver
+@options.input_driver_opts
+@options.input_compression
+@options.input_compression_opts
+@options.output_driver
+@options.output_driver_opts
+@options.output_compression
+@options.output_compression_opts
+@click.pass_context
+def merge(ctx, infiles, outfile, field, check_sorted,
+          input_driver, input_driver_opts, input_compression, input_compression_opts,
+          output_driver, output_driver_opts, output_compression, output_compression_opts):
+
+    """
+    Merge files that are already sorted into a single sorted file.
+
+    Only one message per input file is held in memory, so this is much
+    cheaper than concatenating and sorting with `gpsdio etl --sort`.
+
+    \b
+        $ gpsdio merge receiver1.msg.gz receiver2.msg.gz merged.msg.gz
+    """
+
+    logger.setLevel(ctx.obj['verbosity'])
+    logger.debug('Starting merge')
+
+    srcs = []
+    try:
+        for path in infiles:
+            srcs.append(gpsdio.open(
+                path,
+                driver=input_driver,
+                compression=input_compression,
+                do=input_driver_opts,
+                co=input_compression_opts,
+                **ctx.obj['idefine']))
+
+        with gpsdio.open(
+                outfile, 'w',
+                driver=output_driver,
+                compression=output_compression,
+                do=output_driver_opts,
+                co=output_compression_opts,
+                **ctx.obj['odefine']) as dst:
+
+            try:
+                for msg in gpsdio.ops.merge(srcs, field=field, check=check_sorted):
+                    dst.write(msg)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+
+    finally:
+        for src in srcs:
+            src.close()
@@ -10,6 +10,10 @@ import str2type.ext
 import gpsdio.drivers
 
 
+# Driver names are used as choices so external drivers must be registered
+gpsdio.drivers.load_external_drivers()
+
+
 input_driver = click.option(
     '--i-drv', 'input_driver', metavar='NAME',
     help='Specify the input driver.  Normally auto-detected from file path.',
@@ -50,6 +54,15 @@ output_compression_opts = click.option(
     callback=str2type.ext.click_cb_key_val,
     help='Output compression driver options.  JSON values are automatically decoded.',
 )
+prefetch = click.option(
+    '--prefetch', type=click.IntRange(1), metavar='CHUNKS',
+    help='Read compressed input on a background thread, keeping this many chunks ahead.'
+)
+write_behind = click.option(
+    '--write-behind', type=click.IntRange(1), metavar='CHUNKS',
+    help='Compress and write output on a background thread, queueing up to this many '
+         'chunks.'
+)
 
 
 def _cb_indent(ctx, param, value):
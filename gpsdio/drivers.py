@@ -6,8 +6,11 @@ Drivers for reading and writing a variety of formats and compression.
 
 
 import bz2
+import functools
+import io
 import logging
 import gzip
+import os
 import sys
 
 import msgpack
@@ -20,12 +23,50 @@ from gpsdio.base import BaseCompressionDriver as _BaseCompressionDriver
 logger = logging.getLogger('gpsdio')
 
 
+def _buffer_size(name, buffer_size, flush_interval):
+
+    """
+    Number of bytes a driver should buffer when writing to `name`, or `None`
+    to write to it directly.  Compression drivers writing blocks already
+    buffer, and only end blocks and count messages between writes, so they
+    need every message written separately, but are still wrapped to flush
+    them on a timer when there is a `flush_interval`.
+    """
+
+    from gpsdio import _blocks
+
+    if isinstance(getattr(name, 'f', None), _blocks.BlockWriter):
+        return None if flush_interval is None else 0
+    return buffer_size or None
+
+
 class NewlineJSONDriver(_BaseDriver):
 
     """
     Access data stored as newline delimited JSON.  Driver options are passed to
     ``newlinejson.open()``.
 
+    When ``orjson`` is installed, files are read in large buffers that are
+    split into lines and decoded in bulk, which is much faster than decoding
+    a line at a time.  Blank lines are skipped.  Messages are encoded with
+    ``ujson`` and written in large buffers.  Passing any options for
+    ``newlinejson.open()``, like ``json_lib`` or ``skip_failures``, reads and
+    writes with ``newlinejson`` instead.
+
+    Additional driver options:
+
+        bulk : bool
+            Decode in bulk if possible.  Default: True.
+        buffer_size : int
+            Number of bytes to read and decode at once, or to buffer before
+            writing.  Buffered messages are written when the stream is
+            flushed or closed.  ``0`` disables write buffering.
+            Default: 1 MiB.
+        flush_interval : float
+            Also write buffered messages and flush the file no more than
+            this many seconds after they were buffered, even if nothing else
+            is written.  Default: None.
+
     https://github.com/geowurster/NewlineJSON
     """
 
@@ -33,12 +74,42 @@ class NewlineJSONDriver(_BaseDriver):
     extensions = ('json', 'nljson')
     io_modes = ('r', 'w', 'a')
 
-    def open(self, name, mode='r', **kwargs):
-        import newlinejson as nlj
+    # Set when messages are encoded by dump() rather than newlinejson
+    _encode = None
+
+    def open(self, name, mode='r', bulk=True, buffer_size=1024 ** 2, flush_interval=None,
+             **kwargs):
+
+        if mode == 'r' and bulk and not kwargs \
+                and (isinstance(name, six.string_types) or hasattr(name, 'read')):
+            try:
+                import orjson  # noqa
+            except ImportError:
+                pass
+            else:
+                from gpsdio import _nljson
+                if isinstance(name, six.string_types):
+                    name = open(name, 'rb')
+                return _nljson.BulkReader(name, buffer_size=buffer_size)
+
         import ujson
+
+        size = None if kwargs else _buffer_size(name, buffer_size, flush_interval)
+        if mode in ('w', 'a') and size is not None:
+            from gpsdio import _buffer
+            self._encode = ujson.dumps
+            return _buffer.open_buffered(name, mode, size, flush_interval)
+
+        import newlinejson as nlj
         kwargs.update(json_lib=kwargs.get('json_lib', ujson))
         return nlj.open(name, mode=mode, **kwargs)
 
+    def dump(self, msg):
+        msg = super(NewlineJSONDriver, self).dump(msg)
+        if self._encode is not None:
+            msg = self._encode(msg) + '\n'
+        return msg
+
 
 class GZIPDriver(_BaseCompressionDriver):
 
@@ -47,6 +118,38 @@ class GZIPDriver(_BaseCompressionDriver):
     options are passed to ``gzip.open()``, unless the input path is a file-like
     object, in which case they are passed to ``gzip.GzipFile()``.
     Input file is automatically opened in ``rb`` mode when reading in Python3.
+
+    Setting the ``threads`` option when writing compresses independent blocks
+    in parallel, like ``pigz``, and writes each as a gzip member.  The output
+    is a standard multi-member gzip file that any ``gunzip`` can read.  Only
+    the ``compresslevel`` and ``block_size`` options, in uncompressed bytes,
+    are supported in this mode.  Default block size: 1 MiB.
+
+    Setting ``index=True`` when writing also writes blocks, and describes
+    them in a sidecar index named after the file with an ``.idx`` extension.
+    The index records the location, number of messages, and first and last
+    timestamp of every block, which can be retrieved with
+    ``GZIPDriver.index()``.  Appending to an indexed file keeps its index up
+    to date and overwriting it without ``index=True`` removes the index.
+    When reading an indexed file these options seek directly to the relevant
+    blocks without decompressing the rest:
+
+        start_block : int
+            Start reading at this block.
+        num_blocks : int
+            Only read this many blocks.
+        start_message : int
+            Start reading at this message number.
+        start_time : str or datetime.datetime
+            Skip blocks ending before this timestamp.
+        end_time : str or datetime.datetime
+            Skip blocks starting after this timestamp.
+        threads : int
+            Decompress this many blocks at once.  Files without an index,
+            or with an index that doesn't match the file, are read normally.
+
+    Time ranges assume the file is sorted by timestamp and select entire
+    blocks, so messages just outside the range may be included.
     https://docs.python.org/3/library/gzip.html
     """
 
@@ -54,15 +157,129 @@ class GZIPDriver(_BaseCompressionDriver):
     extensions = 'gz',
     io_modes = ('r', 'w', 'a')
 
-    def open(self, name, mode='r', **kwargs):
+    # Read by gpsdio.open() to connect the reader and writer to the index
+    index_message = None
+    skip_messages = 0
+    _index_path = None
+
+    def open(self, name, mode='r', threads=None, block_size=1024 ** 2, index=False,
+             start_block=0, num_blocks=None, start_message=None, start_time=None,
+             end_time=None, **kwargs):
+
+        from gpsdio import _blocks
+
+        seek = start_block or any(
+            o is not None for o in (num_blocks, start_message, start_time, end_time))
+        is_path = isinstance(name, six.string_types)
+        index_path = name + '.idx' if is_path else None
+
+        # Indexed files are also decompressed in parallel by block, but
+        # anything else is read normally
+        blocks = None
+        if mode == 'r' and threads is not None and not seek \
+                and is_path and os.path.exists(index_path):
+            try:
+                blocks = self.index(name)
+                seek = True
+            except IOError as e:
+                logger.debug("Reading GZIP file without its index: %s", e)
+
+        # Don't leave an index that no longer describes the file
+        if mode in ('w', 'a') and is_path and not index and os.path.exists(index_path):
+            if mode == 'a':
+                index = True
+            else:
+                os.remove(index_path)
 
         if name == sys.stdin:
             raise IOError("GZIP can't read directly from stdin")
-        elif isinstance(name, six.string_types):
+
+        elif mode in ('w', 'a') and (threads is not None or index):
+            level = kwargs.pop('compresslevel', 9)
+            if kwargs:
+                raise TypeError("Unsupported options for parallel GZIP: {}".format(
+                    ', '.join(sorted(kwargs))))
+            closefd = is_path
+            if index:
+                if not closefd:
+                    raise ValueError("Can only index GZIP files opened by path.")
+                exists = os.path.exists(name) and os.path.getsize(name)
+                if mode == 'a' and exists and not os.path.exists(index_path):
+                    raise IOError("Can't append an index to an unindexed file: {}".format(name))
+                self._index_path = index_path
+                # Any index left behind by an empty or missing file is stale
+                self._index_mode = 'a' if mode == 'a' and exists else 'w'
+                self.index_message = self._index_message
+            if closefd:
+                name = open(name, mode=mode + 'b')
+            return _blocks.BlockWriter(
+                name, functools.partial(_blocks.gzip_member, level=level), block_size,
+                threads=threads or 1, closefd=closefd)
+
+        elif mode == 'r' and seek:
+            if not is_path:
+                raise ValueError("Can only seek in GZIP files opened by path.")
+            if blocks is None:
+                blocks = self.index(name)
+            blocks, self.skip_messages = _blocks.select_blocks(
+                blocks, start_block=start_block, num_blocks=num_blocks,
+                start_message=start_message, start_time=start_time, end_time=end_time)
+            return io.BufferedReader(_blocks.BlockReader(
+                open(name, 'rb'), [(b['offset'], b['size'], None) for b in blocks],
+                _blocks.gzip_decompress, threads=threads or 1))
+
+        elif is_path:
             return gzip.open(name, mode=mode, **kwargs)
         else:
             return gzip.GzipFile(fileobj=name, mode=mode, **kwargs)
 
+    @staticmethod
+    def index(name):
+
+        """
+        Read the sidecar index for a GZIP file written with ``index=True``.
+
+        Parameters
+        ----------
+        name : str
+            Path to the GZIP file.
+
+        Raises
+        ------
+        IOError
+            The file is not indexed, or the index doesn't end where the
+            file does because the file was modified without it.
+
+        Returns
+        -------
+        list
+            One dictionary per block containing ``offset``, ``size``,
+            ``uncompressed_size``, ``first_message``, ``count``,
+            ``first_timestamp``, and ``last_timestamp``.
+        """
+
+        from gpsdio import _blocks
+
+        path = name + '.idx'
+        if not os.path.exists(path):
+            raise IOError("GZIP file is not indexed: {}".format(name))
+        blocks = _blocks.read_index(path)
+        end = blocks[-1]['offset'] + blocks[-1]['size'] if blocks else 0
+        if end != os.path.getsize(name):
+            raise IOError("GZIP index does not match file: {}".format(name))
+        return blocks
+
+    def _index_message(self, msg):
+        self.f.note(msg.get('timestamp'))
+
+    def close(self):
+        from gpsdio import _blocks
+        out = super(GZIPDriver, self).close()
+        if self._index_path is not None:
+            _blocks.write_index(self._index_path, self.f.blocks, mode=self._index_mode)
+            self._index_path = None
+        return out
+
     def load(self, msg):
         if hasattr(msg, 'decode'):
             msg = msg.decode('utf-8')
@@ -104,6 +321,283 @@ class BZ2Driver(_BaseCompressionDriver):
         return super(BZ2Driver, self).dump(msg)
 
 
+class ZSTDDriver(_BaseCompressionDriver):
+
+    """
+    Access data stored as Zstandard with the ``zstandard`` library, which must
+    be installed separately.  Files containing multiple frames, like those
+    produced by appending, are read as a single stream.
+
+    Driver options:
+
+        level : int
+            Compression level.  Default: 3.
+        threads : int
+            Number of compression threads.  ``-1`` uses one per CPU.
+            Default: 0.
+        long_distance : bool
+            Enable long-distance matching when writing.  Default: False.
+        dictionary : str or bytes
+            Path to a dictionary produced by ``ZSTDDriver.train_dictionary()``,
+            or the dictionary itself.  Data compressed with a dictionary can
+            only be read with the same dictionary.
+
+    https://python-zstandard.readthedocs.io
+    """
+
+    driver_name = 'ZSTD'
+    extensions = 'zst',
+    io_modes = ('r', 'w', 'a')
+
+    def open(self, name, mode='r', level=3, threads=0, long_distance=False,
+             dictionary=None):
+
+        import zstandard
+
+        if name == sys.stdin:
+            raise IOError("ZSTD can't read directly from stdin")
+
+        if dictionary is not None:
+            if isinstance(dictionary, six.string_types):
+                with open(dictionary, 'rb') as f:
+                    dictionary = f.read()
+            dictionary = zstandard.ZstdCompressionDict(dictionary)
+
+        closefd = isinstance(name, six.string_types)
+        if closefd:
+            name = open(name, mode='rb' if mode == 'r' else mode + 'b')
+
+        if mode == 'r':
+            dctx = zstandard.ZstdDecompressor(dict_data=dictionary)
+            return io.BufferedReader(
+                dctx.stream_reader(name, read_across_frames=True, closefd=closefd))
+        else:
+            params = zstandard.ZstdCompressionParameters.from_level(
+                level, threads=threads, enable_ldm=bool(long_distance))
+            cctx = zstandard.ZstdCompressor(dict_data=dictionary, compression_params=params)
+            return cctx.stream_writer(name, closefd=closefd)
+
+    @staticmethod
+    def train_dictionary(samples, size=112640):
+
+        """
+        Train a Zstandard dictionary, which dramatically improves compression
+        of small files like hourly shards.  Samples should be serialized the
+        same way as the data being compressed, for instance a few thousand
+        lines from newline JSON files.
+
+            >>> import itertools
+            >>> with open('hourly.json', 'rb') as f:
+            ...     dictionary = ZSTDDriver.train_dictionary(itertools.islice(f, 10000))
+            >>> with open('ais.dict', 'wb') as f:
+            ...     f.write(dictionary)
+
+        Parameters
+        ----------
+        samples : iter
+            Bytes to train on.
+        size : int, optional
+            Maximum size of the dictionary in bytes.
+
+        Returns
+        -------
+        bytes
+        """
+
+        import zstandard
+
+        return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+    def load(self, msg):
+        if hasattr(msg, 'decode'):
+            msg = msg.decode('utf-8')
+        return super(ZSTDDriver, self).load(msg)
+
+    def dump(self, msg):
+        if not isinstance(msg, six.binary_type):
+            msg = msg.encode('utf-8')
+        return msg
+
+    def read(self, *args, **kwargs):
+        return self.f.read(*args, **kwargs)
+
+
+class LZ4Driver(_BaseCompressionDriver):
+
+    """
+    Access data stored in the LZ4 frame format with the ``lz4`` library,
+    which must be installed separately.  Compression is modest but
+    decompression is extremely fast, so it is well suited to data that is
+    read repeatedly.  Files containing multiple frames, like those produced
+    by appending, are read as a single stream.
+
+    Driver options:
+
+        level : int
+            Compression level.  0 is the fastest and 3 or more enables high
+            compression mode.  Default: 0.
+        block_size : str or int
+            Maximum size of the independently compressed blocks: ``64KB``,
+            ``256KB``, ``1MB``, or ``4MB``, or the equivalent number of bytes.
+            Larger blocks compress better.  Default: ``64KB``.
+
+    Any other options are passed to ``lz4.frame.LZ4FrameFile()``, like
+    ``block_linked`` or ``content_checksum``.
+
+    https://python-lz4.readthedocs.io
+    """
+
+    driver_name = 'LZ4'
+    extensions = 'lz4',
+    io_modes = ('r', 'w', 'a')
+
+    block_sizes = ('64KB', '256KB', '1MB', '4MB')
+
+    def open(self, name, mode='r', level=0, block_size='64KB', **kwargs):
+
+        import lz4.frame
+
+        if name == sys.stdin:
+            raise IOError("LZ4 can't read directly from stdin")
+
+        if isinstance(block_size, six.integer_types):
+            size = {64 * 1024: '64KB', 256 * 1024: '256KB',
+                    1024 ** 2: '1MB', 4 * 1024 ** 2: '4MB'}.get(block_size, block_size)
+        else:
+            size = block_size.upper()
+        if size not in self.block_sizes:
+            raise ValueError("Invalid LZ4 block size '{}', must be one of: {}".format(
+                block_size, ', '.join(self.block_sizes)))
+
+        return lz4.frame.LZ4FrameFile(
+            name, mode=mode[0] + 'b',
+            compression_level=level,
+            block_size=getattr(lz4.frame, 'BLOCKSIZE_MAX' + size),
+            **kwargs)
+
+    def load(self, msg):
+        if hasattr(msg, 'decode'):
+            msg = msg.decode('utf-8')
+        return super(LZ4Driver, self).load(msg)
+
+    def dump(self, msg):
+        if not isinstance(msg, six.binary_type):
+            msg = msg.encode('utf-8')
+        return msg
+
+    def read(self, *args, **kwargs):
+        return self.f.read(*args, **kwargs)
+
+
+class XZDriver(_BaseCompressionDriver):
+
+    """
+    Access data stored as XZ with Python's builtin ``lzma`` library.  Files
+    are written as a series of blocks, each starting with a complete message,
+    and every XZ file has an index of its blocks, so blocks can be located
+    with ``XZDriver.index()``, skipped, or decompressed in parallel.  Any XZ
+    file can be read, including those produced by the ``xz`` utility.
+
+    Driver options:
+
+        preset : int
+            Compression level from 0 to 9.  Default: 6.
+        check : str
+            Integrity check: ``crc32``, ``crc64``, ``sha256``, or ``none``.
+            Default: ``crc64``.
+        block_size : int
+            Start a new block after writing this many uncompressed bytes.
+            Default: 8 MiB.
+        threads : int
+            Number of threads to compress or decompress blocks with.
+            Default: 1.
+        start_block : int
+            Start reading at this block.  Default: 0.
+        num_blocks : int
+            Only read this many blocks.  Default: all.
+
+    https://docs.python.org/3/library/lzma.html
+    """
+
+    driver_name = 'XZ'
+    extensions = 'xz',
+    io_modes = ('r', 'w', 'a')
+
+    checks = ('crc32', 'crc64', 'sha256', 'none')
+
+    def open(self, name, mode='r', preset=None, check='crc64', block_size=8 * 1024 ** 2,
+             threads=1, start_block=0, num_blocks=None):
+
+        import lzma
+        from gpsdio import _blocks
+        from gpsdio import _xz
+
+        if name == sys.stdin:
+            raise IOError("XZ can't read directly from stdin")
+        if check not in self.checks:
+            raise ValueError("Invalid XZ check '{}', must be one of: {}".format(
+                check, ', '.join(self.checks)))
+
+        if mode == 'r' and threads == 1 and not start_block and num_blocks is None:
+            return lzma.LZMAFile(name, mode='rb')
+
+        closefd = isinstance(name, six.string_types)
+        if closefd:
+            name = open(name, mode=mode[0] + 'b')
+
+        if mode == 'r':
+            blocks = _xz.index(name)[start_block:]
+            if num_blocks is not None:
+                blocks = blocks[:num_blocks]
+            return io.BufferedReader(_blocks.BlockReader(
+                name, [(b.offset, b.size, b.header) for b in blocks], _xz.decompress_block,
+                threads=threads, closefd=closefd))
+        else:
+            compress = functools.partial(
+                lzma.compress, format=lzma.FORMAT_XZ, preset=preset,
+                check=getattr(lzma, 'CHECK_' + check.upper()))
+            return _blocks.BlockWriter(
+                name, compress, block_size, threads=threads, closefd=closefd)
+
+    @staticmethod
+    def index(name):
+
+        """
+        Locate every block in an XZ file.
+
+        Parameters
+        ----------
+        name : str or file
+            Path to an XZ file, or a seekable file opened in binary mode.
+
+        Returns
+        -------
+        list
+            ``XZBlock()`` named tuples containing ``offset``, ``size``,
+            ``uncompressed_offset``, and ``uncompressed_size``.
+        """
+
+        from gpsdio import _xz
+
+        if isinstance(name, six.string_types):
+            with open(name, 'rb') as f:
+                return _xz.index(f)
+        return _xz.index(name)
+
+    def load(self, msg):
+        if hasattr(msg, 'decode'):
+            msg = msg.decode('utf-8')
+        return super(XZDriver, self).load(msg)
+
+    def dump(self, msg):
+        if not isinstance(msg, six.binary_type):
+            msg = msg.encode('utf-8')
+        return msg
+
+    def read(self, *args, **kwargs):
+        return self.f.read(*args, **kwargs)
+
+
 # class NMEADriver(_BaseDriver):
 #
 #     driver_name = 'NMEA'
@@ -202,6 +696,40 @@ class MsgPackDriver(_BaseDriver):
     bytestrings.  In Python3 input files are automatically opened in ``rb`` if
     opening in ``r`` mode.  When passing in an already open file, the file must
     have been opened in ``rb`` mode.
+
+    Additional driver options when reading:
+
+        mmap : bool
+            Memory map the file rather than reading it through the file
+            object.  The unpacker still copies each ``chunk_size`` slice of
+            the map into its own buffer before decoding.  Requires a path or a
+            file with a ``fileno()``.  Default: False.
+        start : int
+            Start reading at this byte offset, which must be the start of a
+            message, like those from ``MsgPackDriver.byte_ranges()``.
+            Requires a seekable file.  Default: 0.
+        stop : int
+            Stop reading at this byte offset, which must be the end of a
+            message.  Default: end of file.
+        fuse : bool
+            When messages are being validated, validate each decoded message
+            in place rather than building a second validated message.  Only
+            the top-level message is validated, after any filters pushed
+            down by ``GPSDIOReader.pushdown()``.  Disabled when an
+            ``object_hook`` or ``object_pairs_hook`` is given.
+            Default: True.
+
+    Additional driver options when writing:
+
+        buffer_size : int
+            Number of bytes to buffer before writing.  Buffered messages are
+            written when the stream is flushed or closed.  ``0`` disables
+            buffering.  Default: 1 MiB.
+        flush_interval : float
+            Also write buffered messages and flush the file no more than
+            this many seconds after they were buffered, even if nothing else
+            is written.  Default: None.
+
     https://github.com/msgpack/msgpack-python
     """
 
@@ -209,7 +737,11 @@ class MsgPackDriver(_BaseDriver):
     extensions = ('msg', 'msgpack')
     io_modes = ('r', 'w', 'a')
 
-    def open(self, name, mode='r', **kwargs):
+    # Bytes fed to the unpacker at once when reading a byte range
+    chunk_size = 1024 ** 2
+
+    def open(self, name, mode='r', mmap=False, start=0, stop=None, fuse=True,
+             buffer_size=1024 ** 2, flush_interval=None, **kwargs):
 
         # if 'encoding' not in kwargs:
         #     kwargs['encoding'] = 'utf-8'
@@ -217,31 +749,344 @@ class MsgPackDriver(_BaseDriver):
         # We need some additional MsgPack specific objects
         self._unpacker = None
         self._unpacker_args = kwargs
-        self.packer = msgpack.Packer(**kwargs)
+        self._mmap = mmap
+        self._start = start
+        self._stop = stop
+        self._fuse = fuse
+        self.packer = None if mode == 'r' else msgpack.Packer(**kwargs)
+
+        size = None if mode == 'r' else _buffer_size(name, buffer_size, flush_interval)
 
         if mode == 'r':
             mode = 'rb' if six.PY3 else 'r'
-        elif mode == 'w':
-            mode = 'wb'
+        else:
+            mode += 'b'
 
-        if isinstance(name, six.string_types):
+        if size is not None:
+            from gpsdio import _buffer
+            return _buffer.open_buffered(name, mode, size, flush_interval)
+        elif isinstance(name, six.string_types):
             return open(name, mode=mode)
+        return name
+
+    def _unpack_range(self, unpacker):
+
+        """
+        Feed the unpacker bytes ``start`` through ``stop`` from a memory map
+        or the file and yield messages.
+        """
+
+        if self._mmap and not os.fstat(self.f.fileno()).st_size:
+            chunks = ()
+            self._mmap = False
+        elif self._mmap:
+            import mmap
+            buf = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(buf)[self._start:self._stop]
+            chunks = (view[i:i + self.chunk_size] for i in range(0, len(view), self.chunk_size))
         else:
-            return name
+            if self._start:
+                self.f.seek(self._start)
+            size = None if self._stop is None else self._stop - self._start
+
+            def _chunks():
+                remaining = size
+                while remaining is None or remaining > 0:
+                    n = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                    chunk = self.f.read(n)
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+            chunks = _chunks()
+
+        fed = consumed = 0
+        try:
+            for chunk in chunks:
+                unpacker.feed(chunk)
+                fed += len(chunk)
+                for msg in unpacker:
+                    consumed = unpacker.tell()
+                    yield msg
+        finally:
+            # Also runs when the driver closes the generator early
+            if self._mmap:
+                chunk = chunks = None
+                view.release()
+                buf.close()
+
+        # Anything left over is an incomplete message
+        if consumed < fed:
+            raise IOError("Incomplete MsgPack message at byte {}".format(
+                self._start + consumed))
+
+    def inplace_validation(self):
+
+        """
+        Called by ``gpsdio.open()``.  Every decoded message is a new dict, so
+        the reader can validate it in place unless a hook builds messages.
+
+        Returns
+        -------
+        bool
+        """
+
+        return self._fuse and self._mode == 'r' \
+            and 'object_hook' not in self._unpacker_args \
+            and 'object_pairs_hook' not in self._unpacker_args
 
     def __next__(self):
         if self._unpacker is None:
-            self._unpacker = msgpack.Unpacker(self.f, raw=False, **self._unpacker_args)
+            if self._mmap or self._start or self._stop is not None:
+                self._unpacker = self._unpack_range(
+                    msgpack.Unpacker(raw=False, **self._unpacker_args))
+            else:
+                self._unpacker = msgpack.Unpacker(self.f, raw=False, **self._unpacker_args)
         return next(self._unpacker)
 
     next = __next__
 
+    def close(self):
+        # Release a memory map before closing the file it maps
+        close = getattr(self._unpacker, 'close', None)
+        if close is not None:
+            close()
+        return super(MsgPackDriver, self).close()
+
     def dump(self, msg):
         msg = super(MsgPackDriver, self).dump(msg)
         return self.packer.pack(msg)
 
+    @staticmethod
+    def byte_ranges(name, chunks):
+
+        """
+        Split a MsgPack file into byte ranges that start and stop on message
+        boundaries, for reading in parallel with the ``start`` and ``stop``
+        driver options.  Every message is skipped over, but not decoded, to
+        locate the boundaries.
+
+            >>> for start, stop in MsgPackDriver.byte_ranges('data.msg', 4):
+            ...     with gpsdio.open('data.msg', do={'start': start, 'stop': stop}) as src:
+            ...         pass
+
+        Parameters
+        ----------
+        name : str
+            Path to a MsgPack file.
+        chunks : int
+            Desired number of ranges.  Fewer may be produced for small files.
+
+        Returns
+        -------
+        list
+            ``(start, stop)`` byte offsets.
+        """
+
+        size = os.path.getsize(name)
+        bounds = [0]
+        with open(name, 'rb') as f:
+            unpacker = msgpack.Unpacker(f)
+            while True:
+                try:
+                    unpacker.skip()
+                except msgpack.OutOfData:
+                    break
+                position = unpacker.tell()
+                if position >= size * len(bounds) // chunks and position < size:
+                    bounds.append(position)
+        bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+
+class ParquetDriver(_BaseDriver):
+
+    """
+    Read and write data stored as Apache Parquet with the ``pyarrow`` library,
+    which must be installed separately.  Every schema field is a column with
+    a type derived from its validator and fields a message type lacks are
+    null.  Fields that aren't in the schema can't be stored, so writing a
+    message with one raises a ``ValueError``.  Messages of types the schema
+    doesn't define are read with every field that isn't null.  Every row
+    group stores min/max statistics for each column, so readers can skip row
+    groups and columns they don't need.  Parquet has its own internal
+    compression so a compression driver cannot be used.
+
+    Driver options when writing:
+
+        row_group_size : int
+            Maximum number of messages per row group.  Default: 65536.
+        per_type : bool
+            Write a separate row group for every message type, so readers
+            only interested in some types skip more row groups.  Messages
+            are no longer written in order because every type is buffered
+            separately until it fills a row group.  Default: False.
+
+    Any other options are passed to ``pyarrow.parquet.ParquetWriter()``, like
+    ``compression``.
+
+    Driver options when reading:
+
+        columns : list
+            Only read these fields.  Other fields are filled with their
+            schema default.  Default: all.
+        start_time : str or datetime.datetime
+            Skip row groups with every ``timestamp`` before this time.
+        end_time : str or datetime.datetime
+            Skip row groups with every ``timestamp`` after this time.
+        mmsi : int or list
+            Skip row groups with no ``mmsi`` between the minimum and maximum
+            of these values.
+        bbox : list
+            ``[xmin, ymin, xmax, ymax]``.  Skip row groups with every ``lon``
+            or every ``lat`` outside of this box.
+
+    Skipping is row group granular, so other messages can still be returned.
+    Use a filter to select exact messages.
+
+    https://arrow.apache.org/docs/python/parquet.html
+    """
+
+    driver_name = 'Parquet'
+    extensions = 'parquet',
+    io_modes = ('r', 'w')
+
+    def open(self, name, mode='r', **kwargs):
+
+        from gpsdio import _arrow
+
+        if name == sys.stdin:
+            raise IOError("Parquet can't read directly from stdin")
+        if isinstance(name, _BaseCompressionDriver):
+            raise IOError("Parquet can't be combined with a compression driver")
+
+        if mode == 'r':
+            return _arrow.ParquetReader(name, self.schema, **kwargs)
+        else:
+            return _arrow.ParquetWriter(name, self.schema, **kwargs)
+
+    def dump(self, msg):
+        return msg
+
+
+class ArrowDriver(_BaseDriver):
+
+    """
+    Read and write data stored as Apache Arrow record batches in the IPC file
+    format, also known as Feather version 2, with the ``pyarrow`` library,
+    which must be installed separately.  Columns are the same as the
+    ``Parquet`` driver, so fields that aren't in the schema can't be written
+    either, but files are memory mapped when reading, so opening a large file
+    is instant and only the batches that are read are loaded.  Use
+    ``ArrowDriver.read_table()`` for zero-copy columnar access.  Arrow files
+    can't be combined with a compression driver.
+
+    Driver options when writing:
+
+        batch_size : int
+            Maximum number of messages per record batch.  Default: 65536.
+        per_type : bool
+            Write a separate batch for every message type.  Messages are
+            no longer written in order.  Default: False.
+        compression : str
+            Compress batches with ``lz4`` or ``zstd``.  Compressed batches
+            must be copied when reading.  Default: None.
+
+    Driver options when reading:
+
+        columns : list
+            Only read these fields.  Other fields are filled with their
+            schema default.  Default: all.
+        memory_map : bool
+            Memory map paths rather than reading them.  Default: True.
+
+    https://arrow.apache.org/docs/python/ipc.html
+    """
+
+    driver_name = 'Arrow'
+    extensions = ('arrow', 'feather')
+    io_modes = ('r', 'w')
+
+    def open(self, name, mode='r', **kwargs):
+
+        from gpsdio import _arrow
+
+        if name == sys.stdin:
+            raise IOError("Arrow can't read directly from stdin")
+        if isinstance(name, _BaseCompressionDriver):
+            raise IOError("Arrow can't be combined with a compression driver")
+
+        if mode == 'r':
+            return _arrow.ArrowReader(name, self.schema, **kwargs)
+        else:
+            return _arrow.ArrowWriter(name, self.schema, **kwargs)
+
+    @staticmethod
+    def read_table(name, columns=None, memory_map=True):
+
+        """
+        Read an Arrow file as a ``pyarrow.Table()`` without converting to
+        messages or validating.  Memory mapped uncompressed files are not
+        copied, so only the columns that are accessed are ever read from
+        disk.
+
+            >>> table = ArrowDriver.read_table('data.arrow', columns=['mmsi', 'lat', 'lon'])
+            >>> lat = table.column('lat').to_numpy()
+
+        Parameters
+        ----------
+        name : str or file
+            Path to an Arrow file, or a seekable file opened in binary mode.
+        columns : list, optional
+            Only include these columns.
+        memory_map : bool, optional
+            Memory map paths rather than reading them.
+
+        Returns
+        -------
+        pyarrow.Table
+        """
+
+        from gpsdio import _arrow
+
+        table = _arrow.open_arrow(name, memory_map=memory_map)[1].read_all()
+        return table if columns is None else table.select(columns)
+
+    def dump(self, msg):
+        return msg
+
 
 _DRIVERS = _BaseDriver.by_name
 _DRIVERS_BY_EXT = _BaseDriver.by_extension
 _COMPRESSION = _BaseCompressionDriver.by_name
 _COMPRESSION_BY_EXT = _BaseCompressionDriver.by_extension
+
+
+_EXTERNAL_LOADED = False
+
+
+def load_external_drivers():
+
+    """
+    Import modules registered through the `gpsdio.drivers` entry-point.
+    Drivers register themselves when their class is defined, so importing is
+    enough.  Called on first use by `gpsdio.open()` and the CLI rather than
+    on import.  Only the first call does anything.
+    """
+
+    global _EXTERNAL_LOADED
+
+    if _EXTERNAL_LOADED:
+        return
+    _EXTERNAL_LOADED = True
+
+    from gpsdio._entry_points import iter_entry_points
+
+    for ep in iter_entry_points('gpsdio.drivers'):
+        try:
+            ep.load()
+            logger.info("Registered external drivers from '%s'", ep.name)
+        except Exception:
+            logger.exception("Failed to load external drivers from '%s'", ep.name)
@@ -8,6 +8,10 @@ with gpsdio.open(infile) as src, gpsdio.open(outfile, 'w') as dst:
 """
 
 
+import collections
+import functools
+import io
+import itertools
 import logging
 import os
 import sys
@@ -15,11 +19,16 @@ import sys
 import six
 
 import gpsdio.base
+from gpsdio.validate import validator_dtype
 
 
 logger = logging.getLogger('gpsdio')
 
 
+# Fill value for `None` in integer columns
+_NULL_INT = -1
+
+
 def open(
         name,
         mode='r',
@@ -29,6 +38,9 @@ def open(
         co=None,
         schema=None,
         schema_extensions=True,
+        validator=None,
+        prefetch=None,
+        write_behind=None,
         **kwargs):
 
     """
@@ -49,8 +61,25 @@ def open(
         Additional options to pass to the driver.
     co : dict, optional
         Additional options to pass to the compression driver.
+    schema : dict, optional
+        Validate messages against this schema.  Defaults to the output of
+        `gpsdio.schema.build_schema()`, which is cached.
     schema_extensions : bool, optional
         Use external field extensions?  Ignored if a `schema` is given.
+    validator : dict, optional
+        A pre-built validator matching the output of
+        `gpsdio.validate.build_validator()` to use instead of the schema's.
+        Cannot be combined with `schema`.
+    prefetch : int, optional
+        When reading with a compression driver, decompress on a background
+        thread, keeping up to this many 1 MiB chunks ready.  Parsing and
+        validation then overlap with decompression.
+    write_behind : int, optional
+        When writing with a compression driver, compress and write on a
+        background thread, keeping up to this many writes queued.  Errors
+        are raised by a later write or when the stream is closed.
+        Compression drivers already writing blocks with a pool of threads
+        are not affected.
     kwargs : **kwargs, optional
         Additional options to pass to the file-like object.
 
@@ -65,10 +94,9 @@ def open(
     # Drivers have to be imported inside open in order to prevent an import
     # collision when registering external drivers.
     import gpsdio.schema
-    from gpsdio.drivers import _COMPRESSION
-    from gpsdio.drivers import _COMPRESSION_BY_EXT
-    from gpsdio.drivers import _DRIVERS
-    from gpsdio.drivers import _DRIVERS_BY_EXT
+    from gpsdio.drivers import load_external_drivers
+
+    load_external_drivers()
 
     if name == '-' and 'r' in mode:
         logger.debug("")
@@ -81,10 +109,88 @@ def open(
     # Handle defaults
     do = do or {}
     co = co or {}
+    if schema and validator:
+        raise ValueError("Cannot supply both schema and validator.")
+    elif validator:
+        kwargs.update(validator=validator)
     schema = schema or gpsdio.schema.build_schema(extensions=schema_extensions)
 
     in_name = name if isinstance(name, six.string_types) else getattr(name, 'name', None)
 
+    cmp_driver, io_driver = _detect_drivers(in_name, compression, driver)
+
+    logger.debug("compression driver: %s", cmp_driver)
+    logger.debug("I/O driver: %s", io_driver)
+
+    if cmp_driver:
+        cmp_stream = cmp_driver()
+        cmp_stream.start(name=name, mode=mode, **co)
+        logger.debug("Started compression stream")
+        if prefetch and mode == 'r':
+            from gpsdio import _blocks
+            cmp_stream._f = io.BufferedReader(_blocks.ReadAhead(cmp_stream.f, prefetch))
+            logger.debug("Prefetching %s chunks", prefetch)
+        elif write_behind and mode in ('w', 'a'):
+            from gpsdio import _blocks
+            if not isinstance(cmp_stream.f, _blocks.BlockWriter):
+                cmp_stream._f = _blocks.WriteBehind(cmp_stream.f, write_behind)
+                logger.debug("Writing behind %s chunks", write_behind)
+    else:
+        cmp_stream = name
+
+    stream = io_driver(schema=schema)
+    stream.start(name=cmp_stream, mode=mode, **do)
+    logger.debug("Started I/O stream")
+
+    # Compression drivers can skip messages after seeking or index messages
+    # as they are written
+    if mode == 'r':
+        logger.debug("Starting read session")
+        src = GPSDIOReader(stream, mode=mode, schema=None if validator else schema, **kwargs)
+        skip = getattr(cmp_stream, 'skip_messages', 0)
+        if skip:
+            src._iterator = itertools.islice(src._iterator, skip, None)
+        # Drivers decoding a new message every iteration let the reader
+        # validate in place
+        inplace = getattr(stream, 'inplace_validation', None)
+        if src._check and inplace is not None and inplace():
+            src._validate_in_place()
+        return src
+    elif mode in ('w', 'a'):
+        logger.debug("Starting write or append session")
+        dst = GPSDIOWriter(stream, mode=mode, schema=None if validator else schema, **kwargs)
+        dst._index_message = getattr(cmp_stream, 'index_message', None)
+        return dst
+    else:
+        raise ValueError("Mode '{}' is invalid.".format(mode))
+
+
+def _detect_drivers(in_name, compression=None, driver=None):
+
+    """
+    Figure out which compression and I/O driver to use for a file.
+
+    Parameters
+    ----------
+    in_name : str
+        File path.  Only used for detection if `compression` or `driver` are
+        not given.
+    compression : str or False, optional
+        Compression driver name.  `False` to disable compression.
+    driver : str, optional
+        I/O driver name.
+
+    Returns
+    -------
+    tuple
+        `(compression driver or None, I/O driver)`
+    """
+
+    from gpsdio.drivers import _COMPRESSION
+    from gpsdio.drivers import _COMPRESSION_BY_EXT
+    from gpsdio.drivers import _DRIVERS
+    from gpsdio.drivers import _DRIVERS_BY_EXT
+
     # Disable compression checks with False
     if compression is False:
         logger.debug("Disabled auto-checking compression")
@@ -122,28 +228,143 @@ def open(
         io_driver = _DRIVERS_BY_EXT[ext.strip('.')]
         logger.debug("Successfully detected driver")
 
-    logger.debug("compression driver: %s", cmp_driver)
-    logger.debug("I/O driver: %s", io_driver)
+    return cmp_driver, io_driver
 
-    if cmp_driver:
-        cmp_stream = cmp_driver()
-        cmp_stream.start(name=name, mode=mode, **co)
-        logger.debug("Started compression stream")
-    else:
-        cmp_stream = name
 
-    stream = io_driver(schema=schema)
-    stream.start(name=cmp_stream, mode=mode, **do)
-    logger.debug("Started I/O stream")
+def _read_file(path, kwargs):
 
-    if mode == 'r':
-        logger.debug("Starting read session")
-        return GPSDIOReader(stream, mode=mode, schema=schema, **kwargs)
-    elif mode in ('w', 'a'):
-        logger.debug("Starting write or append session")
-        return GPSDIOWriter(stream, mode=mode, schema=schema, **kwargs)
-    else:
-        raise ValueError("Mode '{}' is invalid.".format(mode))
+    """
+    Read an entire file into a list of messages.  Used by `open_many()`'s
+    workers, so it must be importable.
+    """
+
+    with open(path, **kwargs) as src:
+        return list(src)
+
+
+def _call_catching(func, task):
+
+    """
+    Call `func(task)` in a worker for `_imap_bounded()`, returning
+    `(True, result)`, or `(False, exception)` rather than raising so the
+    exception can be raised in the current process.  Python 2's
+    `apply_async()` has no `error_callback`.
+    """
+
+    try:
+        return True, func(task)
+    except Exception as e:
+        return False, e
+
+
+def _imap_bounded(pool, func, tasks, limit, ordered=True):
+
+    """
+    Like `pool.imap()` or `pool.imap_unordered()`, but with no more than
+    `limit` tasks submitted to the pool whose results have not been consumed,
+    so results can't pile up in the current process when they are produced
+    faster than they are consumed.
+
+    Parameters
+    ----------
+    pool : multiprocessing.Pool
+        Process pool.
+    func : callable
+        Picklable function called with each task.
+    tasks : iter
+        Argument for each call to `func()`.
+    limit : int
+        Maximum number of outstanding tasks.
+    ordered : bool, optional
+        Yield results in task order rather than as they finish.
+
+    Yields
+    ------
+    object
+        Results from `func()`.
+    """
+
+    from six.moves import queue
+
+    tasks = enumerate(tasks)
+    call = functools.partial(_call_catching, func)
+    pending = {}
+    order = collections.deque()
+    finished = queue.Queue()
+
+    def submit():
+        for idx, task in itertools.islice(tasks, limit - len(pending)):
+            done = functools.partial(lambda i, _: finished.put(i), idx)
+            # Results that can't be sent back still need to wake up the loop
+            kwargs = {} if six.PY2 else {'error_callback': done}
+            pending[idx] = pool.apply_async(call, (task,), callback=done, **kwargs)
+            order.append(idx)
+
+    submit()
+    while pending:
+        idx = order.popleft() if ordered else finished.get()
+        ok, result = pending.pop(idx).get()
+        if not ok:
+            raise result
+        submit()
+        yield result
+
+
+def open_many(paths, workers=None, ordered=True, **kwargs):
+
+    """
+    Read multiple files in parallel with a pool of processes.  Each worker
+    decompresses, parses, and validates an entire file, so this works best
+    with many reasonably sized files, like hourly or daily shards.
+
+    Every file is returned by its worker as a single list, and no more than
+    twice as many files as there are workers are read ahead of the messages
+    being consumed, so peak memory is roughly `2 * workers` files' worth of
+    messages.
+
+    Parameters
+    ----------
+    paths : iter
+        Files to read.
+    workers : int, optional
+        Number of processes.  Defaults to the number of CPUs.  `1` reads
+        every file in the current process.
+    ordered : bool, optional
+        Yield messages in the same order as `paths`.  If `False` messages are
+        yielded file by file as soon as each file has been read.
+    kwargs : **kwargs, optional
+        Passed to `open()` for every file and must be picklable.  Driver and
+        compression are detected per file unless specified.
+
+    Yields
+    ------
+    dict
+        GPSd messages.
+    """
+
+    import multiprocessing
+
+    if 'mode' in kwargs and kwargs['mode'] != 'r':
+        raise ValueError("Can only read from multiple files.")
+
+    reader = functools.partial(_read_file, kwargs=kwargs)
+
+    if workers == 1:
+        for path in paths:
+            for msg in reader(path):
+                yield msg
+        return
+
+    workers = workers or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers)
+    try:
+        for msgs in _imap_bounded(pool, reader, paths, 2 * workers, ordered=ordered):
+            for msg in msgs:
+                yield msg
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
 
 
 class GPSDIOReader(gpsdio.base.GPSDIOBaseStream):
@@ -166,6 +387,188 @@ class GPSDIOReader(gpsdio.base.GPSDIOBaseStream):
 
     next = __next__
 
+    def pushdown(self, expressions, batch_size=None):
+
+        """
+        Evaluate `gpsdio.ops.filter()` expressions against messages from the
+        driver before they are validated, so messages that fail never pay for
+        validation.  Only expressions that give the same result before and
+        after validation, according to `gpsdio.ops.pushdown_eligible()`, are
+        pushed down.  Cheap checks on fields like `type` and `mmsi` are ideal.
+        Every expression is pushed down when messages are not being validated.
+
+        Messages rejected by a pushed down expression are never validated, so
+        an invalid message may be skipped rather than raising an exception.
+        See `gpsdio.ops.prefilter()`.
+
+        With `batch_size`, pushed down expressions are evaluated against
+        batches of messages with NumPy, which requires `numpy`, so the
+        messages that fail are neither evaluated one at a time nor validated.
+        Messages are delayed until a batch fills.
+
+        Parameters
+        ----------
+        expressions : str or iter
+            A single expression or multiple expressions.
+        batch_size : int, optional
+            Evaluate pushed down expressions against batches of this many
+            messages.
+
+        Returns
+        -------
+        tuple
+            Expressions that were not pushed down and must still be applied
+            to the validated messages with `gpsdio.ops.filter()`.
+        """
+
+        import gpsdio.ops
+
+        if isinstance(expressions, six.string_types):
+            expressions = expressions,
+
+        pushed = []
+        remaining = []
+        for expr in expressions:
+            if not self._check or gpsdio.ops.pushdown_eligible(expr, self._validator):
+                pushed.append(expr)
+            else:
+                remaining.append(expr)
+
+        if pushed:
+            logger.debug("Pushing down filters: %s", pushed)
+            if self._check:
+                self._iterator = gpsdio.ops.prefilter(
+                    pushed, self._validator, self._iterator, batch_size=batch_size)
+            else:
+                self._iterator = gpsdio.ops.filter(
+                    pushed, self._iterator, batch_size=batch_size)
+
+        return tuple(remaining)
+
+    def read_batch(self, n):
+
+        """
+        Read and validate up to `n` messages at once.
+
+        Parameters
+        ----------
+        n : int
+            Maximum number of messages to read.
+
+        Returns
+        -------
+        list
+            GPSd messages.  Empty when the stream is exhausted.
+        """
+
+        return self.validate_msgs(itertools.islice(self._iterator, n))
+
+    def iter_batches(self, size=10000):
+
+        """
+        Iterate over the stream in batches of messages.
+
+        Parameters
+        ----------
+        size : int, optional
+            Maximum number of messages per batch.
+
+        Yields
+        ------
+        list
+            GPSd messages.
+        """
+
+        while True:
+            batch = self.read_batch(size)
+            if not batch:
+                break
+            yield batch
+
+    def read_columns(self, fields, types=(1, 2, 3, 18, 19), size=10000):
+
+        """
+        Read messages as NumPy structured arrays, one per chunk, without
+        building an intermediary validated message.  Requires `numpy`.
+
+        Column dtypes are derived from the field validators with
+        `gpsdio.validate.validator_dtype()`.  Fields a message does not have
+        are filled with the schema default, taken from
+        `gpsdio.schema.build_schema()` if the stream was opened with a
+        `validator` rather than a schema.  `None` becomes `NaN` in float
+        columns, `NaT` in datetime columns, and `-1` in integer columns.  Only
+        the requested fields are validated.
+
+        Parameters
+        ----------
+        fields : iter
+            Field names to include as columns.
+        types : iter or None, optional
+            Only include messages of these types.  `None` for all types.
+        size : int, optional
+            Number of messages to read from the stream per chunk.  Chunks may
+            contain fewer rows if messages are excluded by type.
+
+        Yields
+        ------
+        numpy.ndarray
+            Structured array with one column per field.
+        """
+
+        import numpy as np
+        import gpsdio.schema
+
+        fields = tuple(fields)
+        validator = self._validator
+        schema = self._schema or gpsdio.schema.build_schema()
+        types = tuple(validator.keys()) if types is None else tuple(types)
+
+        dtypes = []
+        defaults = []
+        for name in fields:
+            validators = [validator[t][name] for t in types if name in validator.get(t, {})]
+            dtypes.append(validator_dtype(validators[0]) if validators else 'O')
+            definitions = [schema[t][name] for t in types if name in schema.get(t, {})]
+            defaults.append(definitions[0].get('default') if definitions else None)
+        dtype = np.dtype(list(zip(fields, dtypes)))
+
+        # Validator for every field in every type, or `None` to use the default
+        specs = {}
+        for mtype in types:
+            mvalidator = validator.get(mtype, {})
+            specs[mtype] = tuple(
+                (name, mvalidator.get(name) if self._check else None, default)
+                for name, default in zip(fields, defaults))
+
+        while True:
+            columns = tuple([] for _ in fields)
+            count = 0
+            for msg in itertools.islice(self._iterator, size):
+                count += 1
+                spec = specs.get(msg.get('type'))
+                if spec is None:
+                    continue
+                for column, (name, validate, default) in zip(columns, spec):
+                    value = msg.get(name, default)
+                    if validate is not None and name in msg:
+                        value = validate(value)
+                    column.append(value)
+
+            if not count:
+                break
+            elif not columns[0]:
+                continue
+
+            out = np.empty(len(columns[0]), dtype=dtype)
+            for name, column, dt in zip(fields, columns, dtypes):
+                if dt == 'i8':
+                    column = [_NULL_INT if v is None else v for v in column]
+                elif dt == 'M8[us]':
+                    column = [v[:-1] if isinstance(v, six.string_types) and v.endswith('Z')
+                              else v for v in column]
+                out[name] = column
+            yield out
+
 
 class GPSDIOWriter(gpsdio.base.GPSDIOBaseStream):
 
@@ -174,6 +577,9 @@ class GPSDIOWriter(gpsdio.base.GPSDIOBaseStream):
     which can be significant when multiplied across a large number of messages.
     """
 
+    # Called with every validated message before it is written
+    _index_message = None
+
     def write(self, msg):
 
         """
@@ -185,4 +591,36 @@ class GPSDIOWriter(gpsdio.base.GPSDIOBaseStream):
             GPSd message.
         """
 
-        return self._stream.write(self.validate_msg(msg))
+        msg = self.validate_msg(msg)
+        if self._index_message is not None:
+            self._index_message(msg)
+        return self._stream.write(msg)
+
+    def flush(self):
+
+        """
+        Write any messages buffered by the driver and flush the underlying
+        file.  Drivers buffer messages, so use this when other readers need
+        to see messages before the stream is closed.
+        """
+
+        self._stream.flush()
+
+    def write_batch(self, msgs):
+
+        """
+        Validate a batch of messages and write them to disk.  Nothing is
+        written if any message fails validation.
+
+        Parameters
+        ----------
+        msgs : iter
+            GPSd messages.
+        """
+
+        write = self._stream.write
+        index_message = self._index_message
+        for msg in self.validate_msgs(msgs):
+            if index_message is not None:
+                index_message(msg)
+            write(msg)
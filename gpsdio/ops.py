@@ -3,14 +3,27 @@ Operations
 """
 
 
+import itertools
+import types
+
 import six
 
+from gpsdio.validate import preserves_value
+
 
-def sort(stream, field, default=None):
+def sort(stream, field, default=None, run_size=None, tmpdir=None, fan_in=64):
 
     """
-    A generator to sort data by the specified field.  Requires the entire stream
-    to be held in memory.  Messages lacking the specified field are dropped.
+    A generator to sort data by the specified field.  By default the entire
+    stream is held in memory.  Messages lacking the specified field are sorted
+    as if they had the `default` value.  The sort is stable.
+
+    Bounded memory sorting is available by setting `run_size`, in which case
+    sorted runs of `run_size` messages are written to temporary MsgPack files
+    and merged.  At most `run_size` messages plus one message per run being
+    merged are held in memory.  No more than `fan_in` runs are merged at once,
+    so when there are more runs they are merged in multiple passes, each
+    writing longer runs, to keep the number of open files bounded.
 
     Parameters
     ----------
@@ -18,21 +31,114 @@ def sort(stream, field, default=None):
         Iterator producing one message per iteration.
     field : str, optional
         Field to sort by.
+    default : object, optional
+        Sort value for messages lacking `field`.
+    run_size : int, optional
+        Perform an external sort with runs of this many messages.
+    tmpdir : str, optional
+        Directory for temporary files.  Defaults to the system's.
+    fan_in : int, optional
+        Maximum number of runs to merge at once.
+    """
+
+    def key(msg):
+        return msg.get(field, default)
+
+    if run_size is None:
+        for msg in sorted(stream, key=key):
+            yield msg
+        return
+    elif fan_in < 2:
+        raise ValueError("Cannot merge fewer than 2 runs at once.")
+
+    from gpsdio import _sort
+
+    for msg in _sort.external_sort(stream, key, run_size, tmpdir=tmpdir, fan_in=fan_in):
+        yield msg
+
+
+def merge(streams, field='timestamp', default=None, check=False):
+
+    """
+    A generator to merge streams that are already sorted by the specified
+    field into a single sorted stream.  Only one message per stream is held in
+    memory.  Messages lacking the field are merged as if they had the
+    `default` value, and values that are `None` sort after all others.  When
+    values are equal messages from earlier streams are yielded first.
+
+    Parameters
+    ----------
+    streams : iter
+        Iterators producing one message per iteration.
+    field : str, optional
+        Field the streams are sorted by.
+    default : object, optional
+        Sort value for messages lacking `field`.
+    check : bool, optional
+        Raise an exception if a stream is not sorted.  Like
+        `gpsdio info --sorted`, values that are `None` are not checked.
+
+    Raises
+    ------
+    ValueError
+        A stream is not sorted and `check` is `True`.
+
+    Yields
+    ------
+    dict
+        Messages sorted by `field`.
     """
 
-    for msg in sorted(stream, key=lambda x: x.get(field, default)):
+    def key(msg):
+        val = msg.get(field, default)
+        return val is None, val
+
+    def checked(idx, stream):
+        prev = None
+        for msg in stream:
+            val = msg.get(field, default)
+            if val is not None:
+                if prev is not None and val < prev:
+                    raise ValueError("Stream {} is not sorted by '{}': {} follows {}".format(
+                        idx, field, val, prev))
+                prev = val
+            yield msg
+
+    from gpsdio import _sort
+
+    streams = list(streams)
+    if check:
+        streams = [checked(idx, s) for idx, s in enumerate(streams)]
+
+    for msg in _sort.merge(streams, key):
         yield msg
 
 
-def filter(expressions, stream):
+def filter(expressions, stream, batch_size=None):
 
     """
     A generator to filter a stream of data with boolean Pythonic expressions.
     Multiple expressions can be provided but only messages that evaluate as
     `True` for all will be yielded.
 
-    `eval()` is used for expression evaluation but it is given a modified global
-    scope that doesn't include some blacklisted items like `exec()`, `eval()`, etc.
+    Expressions are compiled once and evaluated with `eval()` but are given a
+    modified global scope that doesn't include some blacklisted items like
+    `exec()`, `eval()`, etc.  Fields are looked up directly in each message
+    rather than copying it into a local scope.
+
+    Setting `batch_size` evaluates expressions against batches of messages
+    with NumPy, which requires `numpy`.  Comparisons between fields and
+    constants, `in`, `not in`, `and`, `or`, `not`, `'field' in msg`, and
+    datetime attributes like `timestamp.year` are vectorized.  Any expression
+    or batch that can't be vectorized, like a field containing `None`, falls
+    back to `eval()` for each message so the output is always identical.
+
+    Columns are built by pulling each referenced field out of every message,
+    which costs about as much as evaluating a simple expression, so batching
+    pays off for compound expressions and may be slower for a single simple
+    comparison.  The messages have also already been validated.  Use
+    `GPSDIOReader.pushdown()` with a `batch_size` to filter before messages
+    are validated instead.
 
     Example:
 
@@ -49,6 +155,8 @@ def filter(expressions, stream):
     expressions : str or tuple
         A single expression or multiple expressions to be applied to each
         message.  Only messages that pass all filters will be yielded
+    batch_size : int, optional
+        Evaluate expressions against batches of this many messages.
 
     Yields
     ------
@@ -59,32 +167,277 @@ def filter(expressions, stream):
     if isinstance(expressions, six.string_types):
         expressions = expressions,
 
+    global_scope = _filter_globals()
+    codes = [compile(expr, '<filter: {}>'.format(expr), 'eval') for expr in expressions]
+    local_scope = _MessageScope()
+
+    if batch_size is not None:
+
+        def fallback(code):
+            def evaluate(msg):
+                local_scope.msg = msg
+                try:
+                    return eval(code, global_scope, local_scope)
+                except NameError:
+                    return False
+            return evaluate
+
+        for msg in _filter_batches(expressions, [fallback(c) for c in codes], global_scope,
+                                   stream, batch_size):
+            yield msg
+        return
+
+    for msg in stream:
+        local_scope.msg = msg
+        for code in codes:
+            try:
+                result = eval(code, global_scope, local_scope)
+            except NameError:
+                # A message doesn't contain something in the expression so just
+                # force a failure since we don't need to check the other expressions.
+                result = False
+
+            if not result:
+                break
+        else:
+            yield msg
+
+
+def _filter_globals():
+
+    """
+    Global scope for `filter()` expressions, without some blacklisted builtins
+    like `exec()`, `eval()`, etc., or any modules imported by this one.
+    """
+
     scope_blacklist = ('eval', 'compile', 'exec', 'execfile', 'builtin', 'builtins',
-                       '__builtin__', '__builtins__', 'globals', 'locals')
+                       '__builtin__', '__builtins__', 'globals', 'locals', '__import__')
 
     global_scope = {
-        k: v for k, v in globals().items() if k not in ('builtins', '__builtins__')}
+        k: v for k, v in globals().items()
+        if k not in ('builtins', '__builtins__') and not isinstance(v, types.ModuleType)}
     global_scope['__builtins__'] = {
         k: v for k, v in globals()['__builtins__'].items() if k not in scope_blacklist}
     global_scope['builtins'] = global_scope['__builtins__']
+    return global_scope
+
+
+def _filter_batches(expressions, fallbacks, global_scope, stream, batch_size,
+                    fields_by_type=None):
+
+    """
+    Vectorized `filter()`, or `prefilter()` if given `fields_by_type`, in
+    which case messages of an unknown type are always kept.  `fallbacks`
+    evaluate each expression against a single message when it can't be
+    vectorized.
+    """
+
+    from gpsdio import _vfilter
+
+    global_names = set(global_scope) | set(global_scope['__builtins__'])
+    predicates = []
+    for expr in expressions:
+        try:
+            predicates.append(_vfilter.compile_expression(expr, global_names))
+        except _vfilter.Unsupported:
+            predicates.append(None)
+
+    stream = iter(stream)
+    while True:
+        batch = list(itertools.islice(stream, batch_size))
+        if not batch:
+            break
+        elif fields_by_type is None:
+            passed = _vfilter.filter_batch(batch, predicates, fallbacks)
+        else:
+            cols = _vfilter.RawColumns(batch, [_type_fields(fields_by_type, m) for m in batch])
+            passed = _vfilter.filter_batch(
+                batch, predicates, fallbacks, cols=cols, always=cols.unknown)
+        for msg in passed:
+            yield msg
+
+
+class _MessageScope(object):
+
+    """
+    Local scope for `filter()` expressions.  Resolves names to fields in the
+    current message and `msg` to the message itself without copying.  Names
+    that aren't fields raise a `KeyError`, so `eval()` falls back to the global
+    scope.
+    """
+
+    __slots__ = ('msg',)
+
+    def __getitem__(self, key):
+        if key == 'msg':
+            return self.msg
+        return self.msg[key]
+
+
+def pushdown_eligible(expression, validator):
+
+    """
+    Check if a `filter()` expression gives the same result when evaluated
+    against messages before they are validated as after.  Expressions can't
+    reference `msg` and every field they reference must be validated by a
+    validator that returns valid values unchanged, like `Int()` or `In()`,
+    rather than one that converts them, like `Float()` or `DateTime()`.
+
+    Parameters
+    ----------
+    expression : str
+        A `filter()` expression.
+    validator : dict
+        Output from `gpsdio.validate.build_validator()`.
+
+    Returns
+    -------
+    bool
+    """
+
+    import ast
+
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return False
+
+    names = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}
+    if 'msg' in names:
+        return False
+    for fields in validator.values():
+        for name in names.intersection(fields):
+            if not preserves_value(fields[name]):
+                return False
+    return True
+
+
+def prefilter(expressions, validator, stream, batch_size=None):
+
+    """
+    A generator to filter a stream of messages that have not been validated
+    yet, like those produced by a driver, with expressions that are eligible
+    according to `pushdown_eligible()`.  Messages are yielded unchanged.
+
+    Like validation, only fields in the validator for a message's type are
+    visible to the expressions.  Messages of an unknown type or lacking a field
+    an expression needs are always yielded so validation can raise an
+    exception.  Messages that fail an expression are never validated, so an
+    otherwise invalid message may be skipped silently.
+
+    Setting `batch_size` evaluates expressions against batches of messages
+    with NumPy, like `filter()`, but columns are built from the messages
+    before they are validated, so only messages that pass are ever
+    validated.
+
+    Parameters
+    ----------
+    expressions : str or tuple
+        A single expression or multiple expressions.
+    validator : dict
+        Output from `gpsdio.validate.build_validator()`.
+    stream : iter
+        An iterable producing one message per iteration.
+    batch_size : int, optional
+        Evaluate expressions against batches of this many messages.
+
+    Yields
+    ------
+    dict
+        Messages that pass all expressions or can't be checked.
+    """
+
+    if isinstance(expressions, six.string_types):
+        expressions = expressions,
+
+    global_scope = _filter_globals()
+    codes = [compile(expr, '<filter: {}>'.format(expr), 'eval') for expr in expressions]
+    fields_by_type = {mtype: frozenset(fields) for mtype, fields in six.iteritems(validator)}
+    local_scope = _RawMessageScope()
+
+    if batch_size is not None:
+
+        def fallback(code):
+            def evaluate(msg):
+                fields = _type_fields(fields_by_type, msg)
+                if fields is None:
+                    return True
+                local_scope.msg = msg
+                local_scope.fields = fields
+                try:
+                    return eval(code, global_scope, local_scope)
+                except NameError:
+                    return False
+                except _MissingField:
+                    return True
+            return evaluate
+
+        for msg in _filter_batches(expressions, [fallback(c) for c in codes], global_scope,
+                                   stream, batch_size, fields_by_type=fields_by_type):
+            yield msg
+        return
 
     for msg in stream:
-        local_scope = msg.copy()
-        local_scope['msg'] = msg
-        for expr in expressions:
+        fields = _type_fields(fields_by_type, msg)
+        if fields is None:
+            yield msg
+            continue
+
+        local_scope.msg = msg
+        local_scope.fields = fields
+        for code in codes:
             try:
-                result = eval(expr, global_scope, local_scope)
+                result = eval(code, global_scope, local_scope)
             except NameError:
-                # A message doesn't contain something in the expression so just
-                # force a failure since we don't need to check the other expressions.
                 result = False
-
+            except _MissingField:
+                result = True
             if not result:
                 break
         else:
             yield msg
 
 
+def _type_fields(fields_by_type, msg):
+
+    """
+    Get the fields for a message's type, or `None` if the type is unknown or
+    the message doesn't have one.
+    """
+
+    try:
+        return fields_by_type.get(msg['type'])
+    except (KeyError, TypeError):
+        return None
+
+
+class _MissingField(Exception):
+
+    """
+    Raised by `_RawMessageScope()` when a message lacks a field the schema
+    requires.
+    """
+
+
+class _RawMessageScope(object):
+
+    """
+    Like `_MessageScope()` but for messages that have not been validated.
+    Fields that are not in the validator for the message's type are hidden,
+    just like they would be after validation.
+    """
+
+    __slots__ = ('msg', 'fields')
+
+    def __getitem__(self, key):
+        if key not in self.fields:
+            raise KeyError(key)
+        try:
+            return self.msg[key]
+        except KeyError:
+            raise _MissingField(key)
+
+
 def msg2geojson(msg):
 
     """
@@ -16,7 +16,6 @@ Field Definitions
 from collections import defaultdict
 from itertools import chain
 import logging
-from pkg_resources import iter_entry_points
 
 import six
 
@@ -935,11 +934,56 @@ _HUMAN_TYPE_DESCRIPTION = {
 }
 
 
+# Schemas built from the module level definitions, keyed by whether extensions
+# are used, along with the `_extension_contents()` they were built with
+_SCHEMA_CACHE = {}
+_SCHEMA_CACHE_SIZE = 4
+
+
+def _extension_contents(extensions):
+
+    """
+    The module level extensions are replaced or updated when external
+    definitions are registered, so a schema built with them is only reused
+    while they compare equal to a copy taken when it was built.  Modifying
+    the built-in field definitions in place is not detected and requires a
+    call to `clear_cache()`.
+    """
+
+    if not extensions:
+        return None
+    return (
+        [(name, dict(definition)) for name, definition in six.iteritems(FIELD_EXTENSIONS)],
+        [(mtype, tuple(fields)) for mtype, fields in six.iteritems(FIELDS_BY_TYPE_EXTENSIONS)])
+
+
+def clear_cache():
+
+    """
+    Clear cached schemas and validators.  Only necessary if the built-in
+    field definitions or a validator object itself was modified in place.
+    Replacing a field's validator in a schema or validator is detected.
+    """
+
+    from gpsdio.validate import cached_build_validator
+    from gpsdio.validate import cached_compile_validator
+    from gpsdio.validate import cached_compile_inplace_validator
+
+    _SCHEMA_CACHE.clear()
+    cached_build_validator.clear()
+    cached_compile_validator.clear()
+    cached_compile_inplace_validator.clear()
+
+
 def build_schema(fields_by_type=None, fields=None, extensions=True):
 
     """
     Merge a fields-by-type dictionary and fields dictionary.
 
+    Schemas built from the module level definitions, which happens when
+    neither `fields_by_type` nor `fields` are given, are cached and should
+    not be modified.
+
     Parameters
     ----------
     fields_by_type : None or dict, optional
@@ -965,6 +1009,25 @@ def build_schema(fields_by_type=None, fields=None, extensions=True):
         }
     """
 
+    if extensions:
+        load_extensions()
+
+    if fields_by_type is None and fields is None:
+        contents = _extension_contents(extensions)
+        cached = _SCHEMA_CACHE.setdefault(bool(extensions), [])
+        for cached_contents, schema in cached:
+            if cached_contents == contents:
+                return schema
+        schema = _build_schema(None, None, extensions)
+        cached.append((contents, schema))
+        del cached[:-_SCHEMA_CACHE_SIZE]
+        return schema
+    else:
+        return _build_schema(fields_by_type, fields, extensions)
+
+
+def _build_schema(fields_by_type, fields, extensions):
+
     if fields_by_type is None:
         if extensions:
             fields_by_type = merge_fields_by_type(_FIELDS_BY_TYPE, FIELDS_BY_TYPE_EXTENSIONS)
@@ -1040,25 +1103,46 @@ def merge_fields_by_type(*fbt):
     return dict(out)
 
 
-for ep in iter_entry_points('gpsdio.field_extensions'):
-    try:
-        FIELD_EXTENSIONS = merge_fields(FIELD_EXTENSIONS, ep.load())
-        logger.info("Registered external fields from '%s'", ep.name)
-    except Exception:
-        logger.exception("Failed to load external fields from '%s': %s", ep.name)
+_EXTENSIONS_LOADED = False
+
+
+def load_extensions():
+
+    """
+    Register field, fields by type, and human type description extensions
+    from the `gpsdio.field_extensions`, `gpsdio.fields_by_type_extensions`,
+    and `gpsdio.human_type_descriptions` entry-points.  Extensions are loaded
+    on first use by `build_schema()` so importing `gpsdio` stays fast.  Only
+    the first call does anything.
+    """
+
+    global _EXTENSIONS_LOADED, FIELD_EXTENSIONS, FIELDS_BY_TYPE_EXTENSIONS
+
+    if _EXTENSIONS_LOADED:
+        return
+    _EXTENSIONS_LOADED = True
 
+    from gpsdio._entry_points import iter_entry_points
 
-for ep in iter_entry_points('gpsdio.fields_by_type_extensions'):
-    try:
-        FIELDS_BY_TYPE_EXTENSIONS = merge_fields_by_type(FIELDS_BY_TYPE_EXTENSIONS, ep.load())
-        logger.info("Registered external fields by type from: %s", ep.name)
-    except Exception:
-        logger.exception("Failed to load external fields by type from '%s'", ep.name)
+    for ep in iter_entry_points('gpsdio.field_extensions'):
+        try:
+            FIELD_EXTENSIONS = merge_fields(FIELD_EXTENSIONS, ep.load())
+            logger.info("Registered external fields from '%s'", ep.name)
+        except Exception:
+            logger.exception("Failed to load external fields from '%s'", ep.name)
 
+    for ep in iter_entry_points('gpsdio.fields_by_type_extensions'):
+        try:
+            FIELDS_BY_TYPE_EXTENSIONS = merge_fields_by_type(
+                FIELDS_BY_TYPE_EXTENSIONS, ep.load())
+            logger.info("Registered external fields by type from: %s", ep.name)
+        except Exception:
+            logger.exception("Failed to load external fields by type from '%s'", ep.name)
 
-for ep in iter_entry_points('gpsdio.human_type_descriptions'):
-    try:
-        _HUMAN_TYPE_DESCRIPTION.update(**ep.load())
-        logger.info("Registered external human type descriptions from: %s", ep.name)
-    except Exception:
-        logger.exception("Failed to load external human type descriptions from: %s", ep.name)
+    for ep in iter_entry_points('gpsdio.human_type_descriptions'):
+        try:
+            _HUMAN_TYPE_DESCRIPTION.update(**ep.load())
+            logger.info("Registered external human type descriptions from: %s", ep.name)
+        except Exception:
+            logger.exception(
+                "Failed to load external human type descriptions from: %s", ep.name)
@@ -3,14 +3,21 @@ Objects used to define
 """
 
 
+from collections import OrderedDict
 import datetime
+import functools
+import math
+import struct
+
 import six
 from gpsdio._validate import Int, Float, IntRange, FloatRange, IntIn
 from gpsdio.errors import SchemaError
 
 
 __all__ = (
-    'DATETIME_FORMAT', 'build_validator', 'str2datetime', 'datetime2str',
+    'DATETIME_FORMAT', 'build_validator', 'compile_validator', 'validator_dtype',
+    'preserves_value',
+    'str2datetime', 'datetime2str',
     'BaseValidator', 'All', 'Any', 'DateTime', 'Float', 'FloatRange', 'In',
     'Instance', 'IntIn', 'Int', 'IntRange'
 )
@@ -26,6 +33,397 @@ def build_validator(schema):
     return out
 
 
+# Bounds of the C int used by the Cython validators
+_C_INT_MIN = -2 ** 31
+_C_INT_MAX = 2 ** 31 - 1
+
+
+def _float32_step(value, up):
+
+    """
+    Get the single precision float adjacent to `value`.  The Cython float
+    validators compare in single precision, so the compiled checks need these
+    neighbors to decide when a double precision comparison is conclusive.
+
+    Parameters
+    ----------
+    value : float
+        A value that is exactly representable in single precision.
+    up : bool
+        Step towards positive infinity if `True`, otherwise negative infinity.
+
+    Returns
+    -------
+    float
+    """
+
+    if math.isinf(value) or math.isnan(value):
+        return value
+    elif value == 0:
+        smallest = struct.unpack('<f', struct.pack('<I', 1))[0]
+        return smallest if up else -smallest
+
+    bits = struct.unpack('<I', struct.pack('<f', value))[0]
+    bits += 1 if (value > 0) == up else -1
+    return struct.unpack('<f', struct.pack('<I', bits))[0]
+
+
+class _ValidatorCompiler(object):
+
+    """
+    Generates the source for a single message type's validation function.
+
+    Each field is given a fast path made of inlined checks that are known to
+    agree with the validator object.  Anything that is not conclusively valid,
+    like a value that needs coercion or one that is invalid, falls through to
+    the validator object itself so results and errors are identical to calling
+    the validators one by one.
+    """
+
+    def __init__(self):
+        self.namespace = {}
+
+    def const(self, value):
+
+        """
+        Bind an object into the generated function's namespace and return a
+        name that can be used to reference it.
+        """
+
+        name = '_c{}'.format(len(self.namespace))
+        self.namespace[name] = value
+        return name
+
+    def literal(self, value):
+        if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+            return self.const(value)
+        return repr(value)
+
+    def checks(self, validator, var):
+
+        """
+        Describe `validator` as Python expressions.
+
+        Returns
+        -------
+        tuple
+            `(passes, fails, call)` where `passes` is an expression that is
+            `True` when `var` definitely passes, `fails` is an expression that
+            is `True` when `var` definitely fails, and `call` indicates if a
+            passing value must still be passed through `validator` to get
+            the returned value.  Either expression can be `None` if it cannot
+            be expressed inline.
+        """
+
+        vtype = type(validator)
+
+        if vtype is Int:
+            in_range = "{lo} <= {v} <= {hi}".format(v=var, lo=_C_INT_MIN, hi=_C_INT_MAX)
+            return (
+                "{v}.__class__ is int and {r}".format(v=var, r=in_range),
+                "{v} is None or ({v}.__class__ is int and not {r})".format(v=var, r=in_range),
+                False)
+
+        elif vtype is IntRange:
+            in_range = "{lo} {lop} {v} {hop} {hi}".format(
+                v=var, lo=validator.minimum, hi=validator.maximum,
+                lop='<=' if validator.include_min else '<',
+                hop='<=' if validator.include_max else '<')
+            return (
+                "{v}.__class__ is int and {r}".format(v=var, r=in_range),
+                "{v} is None or ({v}.__class__ is int and not {r})".format(v=var, r=in_range),
+                False)
+
+        elif vtype is IntIn:
+            values = self.const(frozenset(validator.values))
+            return (
+                "{v}.__class__ is int and {v} in {c}".format(v=var, c=values),
+                "{v} is None or ({v}.__class__ is int and {v} not in {c})".format(
+                    v=var, c=values),
+                False)
+
+        # The Cython float validators return single precision values, so
+        # passing values still have to go through the validator.
+        elif vtype is Float:
+            return "{v}.__class__ is float".format(v=var), "{v} is None".format(v=var), True
+
+        elif vtype is FloatRange:
+            # Bounds are stored in single precision and values are cast to
+            # single precision before comparing, so only take a shortcut when
+            # the double precision comparison can't disagree.
+            minimum = validator.minimum
+            maximum = validator.maximum
+            if validator.include_min:
+                pass_min, fail_min = minimum, _float32_step(minimum, up=False)
+            else:
+                pass_min, fail_min = _float32_step(minimum, up=True), minimum
+            if validator.include_max:
+                pass_max, fail_max = maximum, _float32_step(maximum, up=True)
+            else:
+                pass_max, fail_max = _float32_step(maximum, up=False), maximum
+            return (
+                "{v}.__class__ is float and {lo} <= {v} <= {hi}".format(
+                    v=var, lo=self.literal(pass_min), hi=self.literal(pass_max)),
+                "{v} is None or ({v}.__class__ is float and ({v} {lop} {lo} or {v} {hop} {hi}))"
+                .format(
+                    v=var, lo=self.literal(fail_min), hi=self.literal(fail_max),
+                    lop='<' if validator.include_min else '<=',
+                    hop='>' if validator.include_max else '>='),
+                True)
+
+        elif vtype is In:
+            values = self.const(validator.values)
+            return (
+                "{v} in {c}".format(v=var, c=values),
+                "{v} not in {c}".format(v=var, c=values),
+                False)
+
+        elif vtype is Instance:
+            # `Instance()` doesn't actually check anything when called
+            return "True", None, False
+
+        else:
+            return None, None, False
+
+    def field(self, validator, key, var):
+
+        """
+        Generate the lines validating a single field.
+        """
+
+        is_any = type(validator) is Any
+        tests = validator.tests if is_any else (validator,)
+
+        # Each test's shortcut only applies if all previous tests are known
+        # to have failed, which mirrors `Any()` trying tests in order.
+        branches = []
+        failed = []
+        for test in tests:
+            passes, fails, call = self.checks(test, var)
+            if passes is None:
+                break
+            condition = ' and '.join(failed + ([] if passes == 'True' else [passes]))
+            branches.append((condition, test if call else None))
+            if fails is None:
+                break
+            failed.append('({})'.format(fails))
+
+        load = "    {v} = msg[{k}]".format(v=var, k=repr(key))
+        if not branches or (not is_any and branches[0][1] is not None):
+            return ["    {v} = {f}(msg[{k}])".format(
+                v=var, f=self.const(validator), k=repr(key))]
+        elif branches[0] == ('', None):
+            return [load]
+
+        lines = [load]
+        for idx, (condition, test) in enumerate(branches):
+            lines.append("    {kw} {c}:".format(kw='elif' if idx else 'if', c=condition))
+            if test is None:
+                lines.append("        pass")
+            else:
+                lines.append("        {v} = {c}({v})".format(v=var, c=self.const(test)))
+        lines.append("    else:")
+        lines.append("        {v} = {f}({v})".format(v=var, f=self.const(validator)))
+        return lines
+
+    def compile(self, mtype, fields, inplace=False):
+
+        """
+        Generate and compile a validation function for a single message type.
+        In place functions only store the fields whose value may change and
+        return the message itself, unless it has fields that are not in the
+        schema, which are removed by returning a validated copy instead.
+        """
+
+        name = 'validate_type_{}'.format(mtype) if isinstance(mtype, int) else 'validate_type'
+        lines = ["def {}(msg):".format(name)]
+        if inplace:
+            lines.append("    if len(msg) != {}:".format(len(fields)))
+            lines.append("        return {}(msg)".format(
+                self.const(_ValidatorCompiler().compile(mtype, fields))))
+        out = []
+        for idx, (key, validator) in enumerate(six.iteritems(fields)):
+            var = 'v{}'.format(idx)
+            field = self.field(validator, key, var)
+            if inplace:
+                # Only values passed through a validator can change
+                assign = "{} = ".format(var)
+                load = "{}msg[{}]".format(assign, repr(key))
+                field = [
+                    line.replace(assign, "msg[{}] = {}".format(repr(key), assign), 1)
+                    if line.lstrip().startswith(assign) and line.strip() != load else line
+                    for line in field]
+            lines.extend(field)
+            if not inplace:
+                out.append('{}: {}'.format(repr(key), var))
+        if inplace:
+            lines.append("    return msg")
+        else:
+            lines.append("    return {{{}}}".format(', '.join(out)))
+
+        source = '\n'.join(lines) + '\n'
+        code = compile(source, '<gpsdio validator: type {}>'.format(mtype), 'exec')
+        exec(code, self.namespace)
+        func = self.namespace[name]
+        func.source = source
+        return func
+
+
+def compile_validator(validator, inplace=False):
+
+    """
+    Compile the output of `build_validator()` into a single function per
+    message type.  Each function takes a message and returns a validated copy,
+    just like calling each field's validator, but range, membership, and type
+    checks for the builtin validators are inlined.
+
+    Parameters
+    ----------
+    validator : dict
+        Like: `{1: {'mmsi': Int(), ...}, 2: ...}`.
+    inplace : bool, optional
+        Validate messages in place rather than copying them when they only
+        contain schema fields.  Messages are modified even if validation
+        fails, so this is only suitable for messages that are discarded on
+        failure, like those that were just decoded.
+
+    Returns
+    -------
+    dict
+        Like: `{1: <function>, 2: ...}`.  Missing fields raise a `KeyError`.
+    """
+
+    return {mtype: _ValidatorCompiler().compile(mtype, fields, inplace=inplace)
+            for mtype, fields in six.iteritems(validator)}
+
+
+class _IdentityCache(object):
+
+    """
+    A small least recently used cache for a single argument function, keyed
+    on the identity of the argument.  Entries hold a reference to their
+    argument so an `id()` can't be reused while it is cached.  An entry is
+    only used if `contents()` of the argument, which should be cheap, still
+    compares equal to when it was cached, so replacing a field's validator in
+    place is detected.  Modifying a validator object itself is not.
+    """
+
+    def __init__(self, func, contents, size=16):
+        self.func = func
+        self.contents = contents
+        self.size = size
+        self._cache = OrderedDict()
+
+    def __call__(self, obj):
+        key = id(obj)
+        contents = self.contents(obj)
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] is obj and hit[1] == contents:
+            return hit[2]
+        value = self.func(obj)
+        self._cache[key] = (obj, contents, value)
+        while len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _schema_contents(schema):
+    return tuple((mtype, tuple((name, definition['validate'])
+                               for name, definition in six.iteritems(fields)))
+                 for mtype, fields in six.iteritems(schema))
+
+
+def _validator_contents(validator):
+    return tuple((mtype, tuple(six.iteritems(fields)))
+                 for mtype, fields in six.iteritems(validator))
+
+
+# Used by `GPSDIOBaseStream()` to avoid re-building and re-compiling the
+# validator when the same schema or validator is used for multiple streams.
+cached_build_validator = _IdentityCache(build_validator, _schema_contents)
+cached_compile_validator = _IdentityCache(compile_validator, _validator_contents)
+cached_compile_inplace_validator = _IdentityCache(
+    functools.partial(compile_validator, inplace=True), _validator_contents)
+
+
+def validator_dtype(validator):
+
+    """
+    Get the NumPy dtype that best holds the values produced by a validator.
+    `None` is ignored, so a field validated by `Any(Int(), Instance(type(None)))`
+    is still considered an integer.
+
+    Parameters
+    ----------
+    validator : callable
+        A field validator.
+
+    Returns
+    -------
+    str
+        NumPy dtype string: `i8`, `f8`, `M8[us]`, or `O` if the values can't
+        be stored as a single scalar type.
+    """
+
+    vtype = type(validator)
+
+    if vtype in (Int, IntRange, IntIn):
+        return 'i8'
+    elif vtype in (Float, FloatRange):
+        return 'f8'
+    elif vtype is DateTime:
+        return 'M8[us]'
+    elif vtype is In:
+        dtypes = {'i8' if isinstance(v, six.integer_types) and not isinstance(v, bool)
+                  else 'f8' if isinstance(v, float) else 'O' for v in validator.values}
+    elif vtype is Instance:
+        dtypes = {'i8' if t in six.integer_types else 'f8' if t is float else 'O'
+                  for t in validator.types if t is not type(None)}
+    elif vtype in (Any, All):
+        dtypes = {validator_dtype(t) for t in validator.tests
+                  if not (type(t) is Instance and t.types == (type(None),))}
+    else:
+        return 'O'
+
+    if len(dtypes) == 1:
+        return dtypes.pop()
+    elif dtypes == {'i8', 'f8'}:
+        return 'f8'
+    else:
+        return 'O'
+
+
+def preserves_value(validator):
+
+    """
+    Check if a validator returns valid values unchanged, aside from `bool`
+    becoming `int`, so expressions evaluate the same before and after
+    validation.  Float validators round to single precision and datetime
+    validators parse strings, so they do not.
+
+    Parameters
+    ----------
+    validator : callable
+        A field validator.
+
+    Returns
+    -------
+    bool
+    """
+
+    vtype = type(validator)
+
+    if vtype in (Int, IntRange, IntIn, Instance, In):
+        return True
+    elif vtype in (Any, All):
+        return all(preserves_value(t) for t in validator.tests)
+    else:
+        return False
+
+
 def str2datetime(string):
 
     """
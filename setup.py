@@ -65,6 +65,7 @@ setup(
         info=gpsdio.cli.info:info
         insp=gpsdio.cli.insp:insp
         load=gpsdio.cli.load:load
+        merge=gpsdio.cli.merge:merge
     ''',
     ext_modules=ext_modules,
     extras_require={
@@ -72,7 +73,12 @@ setup(
             'pytest>=3.6',
             'pytest-cov',
             'coveralls'
-        ]
+        ],
+        'lz4': ['lz4'],
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+        'parquet': ['pyarrow'],
+        'zstd': ['zstandard']
     },
     install_requires=[
         'click>=3',
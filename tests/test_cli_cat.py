@@ -48,3 +48,14 @@ def test_cat_geojson_non_posit(types_json_path, tmpdir):
     geojson = [json.loads(l) for l in result.splitlines()]
     assert len(geojson) is 1
     assert geojson[0]['properties']['type'] is 1
+
+
+def test_cat_filter(types_json_path):
+    result = subprocess.check_output([
+        'gpsdio', 'cat', '--filter', 'type == 1', '--filter', 'lat > 0', types_json_path
+    ]).decode('utf-8')
+    actual = [json.loads(line) for line in result.splitlines()]
+    with gpsdio.open(types_json_path) as src:
+        expected = list(gpsdio.ops.filter(("type == 1", "lat > 0"), src))
+    assert len(actual) == len(expected) > 0
+    assert all(m['type'] == 1 for m in actual)
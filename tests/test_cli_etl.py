@@ -4,10 +4,13 @@ Unittests for gpsdio etl
 
 
 from click.testing import CliRunner
+import pytest
 
 import gpsdio
 import gpsdio.cli
+import gpsdio.cli.etl
 import gpsdio.cli.main
+import gpsdio.ops
 
 
 def test_sort_time(types_msg_gz_path, tmpdir, runner):
@@ -80,3 +83,118 @@ def test_filter(types_msg_gz_path, tmpdir, runner):
                 prev = msg
             else:
                 assert msg['lat'] >= prev['lat']
+
+
+def test_jobs_byte_ranges(types_json_path, tmpdir, runner):
+    pth = str(tmpdir.mkdir('test').join('test_jobs.json'))
+    result = runner.invoke(gpsdio.cli.main.main_group, [
+        'etl', '--jobs', '3', '--filter', "type in (1, 2, 3)", types_json_path, pth])
+    assert result.exit_code == 0
+
+    with gpsdio.open(types_json_path) as src:
+        expected = [m for m in src if m['type'] in (1, 2, 3)]
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected
+
+
+def test_jobs_msgpack_byte_ranges(types_msg_path, tmpdir, runner):
+    assert len(gpsdio.cli.etl._etl_tasks([types_msg_path], 3, None, None)) > 1
+    pth = str(tmpdir.join('test_jobs.msg'))
+    result = runner.invoke(gpsdio.cli.main.main_group, [
+        'etl', '--jobs', '3', '--filter', "type in (1, 2, 3)", types_msg_path, pth])
+    assert result.exit_code == 0
+
+    with gpsdio.open(types_msg_path) as src:
+        expected = [m for m in src if m['type'] in (1, 2, 3)]
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected
+
+
+def test_jobs_multiple_files(types_json_path, types_msg_gz_path, tmpdir, runner):
+    inputs = [types_json_path, types_msg_gz_path, types_json_path]
+    expected = []
+    for p in inputs:
+        with gpsdio.open(p) as src:
+            expected.extend(src)
+
+    for jobs in ('1', '2'):
+        pth = str(tmpdir.join('test_jobs_{}.msg'.format(jobs)))
+        result = runner.invoke(
+            gpsdio.cli.main.main_group, ['etl', '--jobs', jobs] + inputs + [pth])
+        assert result.exit_code == 0
+        with gpsdio.open(pth) as actual:
+            assert list(actual) == expected
+
+    pth = str(tmpdir.join('test_jobs_unordered.msg'))
+    result = runner.invoke(
+        gpsdio.cli.main.main_group, ['etl', '--jobs', '2', '--unordered'] + inputs + [pth])
+    assert result.exit_code == 0
+    with gpsdio.open(pth) as actual:
+        assert len(list(actual)) == len(expected)
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_filter_batch_size(jobs, types_msg_gz_path, tmpdir, runner):
+    pytest.importorskip('numpy')
+    expressions = ("type in (1, 2, 3) and mmsi > 300000000", "lat > 0")
+    with gpsdio.open(types_msg_gz_path) as src:
+        expected = list(gpsdio.ops.filter(expressions, src))
+
+    pth = str(tmpdir.mkdir('test').join('test_filter_batch_size.json'))
+    args = ['etl', '--filter-batch-size', '4', '--jobs', jobs, types_msg_gz_path, pth]
+    for expr in expressions:
+        args += ['--filter', expr]
+    result = runner.invoke(gpsdio.cli.main.main_group, args)
+    assert result.exit_code == 0
+
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected
+
+
+def test_jobs_stdin(types_json_path, tmpdir, runner):
+    with open(types_json_path) as f:
+        stdin_input = f.read()
+    pth = str(tmpdir.mkdir('test').join('test_jobs_stdin.json'))
+    result = runner.invoke(gpsdio.cli.main.main_group, [
+        'etl', '--i-drv', 'NewlineJSON', '--jobs', '2', '-', pth
+    ], input=stdin_input)
+    assert result.exit_code == 2
+    assert 'stdin' in result.output
+
+
+def test_byte_ranges(types_json_path):
+    with open(types_json_path, 'rb') as f:
+        data = f.read()
+    for chunks in (1, 2, 5, 1000):
+        ranges = gpsdio.cli.etl._byte_ranges(types_json_path, chunks)
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        assert b''.join(data[start:stop] for start, stop in ranges) == data
+        for start, stop in ranges:
+            assert start == 0 or data[start - 1:start] == b'\n'
+
+
+def test_sort_run_size(types_msg_gz_path, tmpdir, runner):
+    expected_pth = str(tmpdir.join('expected.msg'))
+    actual_pth = str(tmpdir.join('actual.msg'))
+    for pth, extra in ((expected_pth, []), (actual_pth, ['--sort-run-size', '4'])):
+        result = runner.invoke(gpsdio.cli.main.main_group, [
+            'etl', '--sort', 'mmsi', types_msg_gz_path, pth] + extra)
+        assert result.exit_code == 0
+    with gpsdio.open(expected_pth) as expected, gpsdio.open(actual_pth) as actual:
+        assert list(expected) == list(actual)
+
+
+def test_prefetch_write_behind(types_msg_gz_path, tmpdir, runner):
+    pth = str(tmpdir.mkdir('test').join('test_prefetch_write_behind.json.gz'))
+    result = runner.invoke(gpsdio.cli.main.main_group, [
+        'etl',
+        '--prefetch', '2',
+        '--write-behind', '2',
+        types_msg_gz_path,
+        pth
+    ])
+    assert result.exit_code == 0
+
+    with gpsdio.open(types_msg_gz_path) as expected, gpsdio.open(pth) as actual:
+        assert list(expected) == list(actual)
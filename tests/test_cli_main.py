@@ -17,3 +17,54 @@ def test_version():
     print(result.output)
     assert result.exit_code is 0
     assert gpsdio.__version__ in result.output
+
+
+class _FakeEntryPoint(object):
+
+    def __init__(self, name, obj, value=None):
+        self.name = name
+        self.obj = obj
+        self.value = value
+
+    def load(self):
+        if isinstance(self.obj, Exception):
+            raise self.obj
+        return self.obj
+
+
+def test_plugins_are_lazy():
+    import click
+
+    @click.command()
+    def good():
+        pass
+
+    group = gpsdio.cli.main._PluginGroup()
+    group._entry_points = {
+        'good': _FakeEntryPoint('good', good, 'gpsdio.cli.merge:merge'),
+        'bad': _FakeEntryPoint('bad', ImportError("busted"))}
+    assert group.commands == {}
+    assert group.list_commands(None) == ['bad', 'good']
+    assert group.commands == {}
+
+    # Help is read from the docstring without loading the command, unless
+    # the entry-point can't be parsed
+    result = CliRunner().invoke(group, ['--help'])
+    assert result.exit_code == 0
+    assert 'good  Merge files that are already sorted' in result.output
+    assert list(group.commands) == ['bad']
+    group.commands.clear()
+
+    assert group.get_command(None, 'good') is good
+    assert list(group.commands) == ['good']
+    assert group.get_command(None, 'missing') is None
+
+    result = CliRunner().invoke(group, ['bad'])
+    assert result.exit_code != 0
+    assert 'could not be loaded' in result.output
+
+
+def test_builtin_commands_registered():
+    commands = gpsdio.cli.main.main_group.list_commands(None)
+    for name in ('cat', 'env', 'etl', 'info', 'insp', 'load'):
+        assert name in commands
@@ -0,0 +1,59 @@
+"""
+Unittests for gpsdio merge
+"""
+
+
+import gpsdio
+import gpsdio.cli.main
+import gpsdio.ops
+
+
+def test_merge(types_msg_gz_path, types_json_path, tmpdir, runner):
+
+    # Sort the inputs first
+    inputs = []
+    expected = []
+    for idx, path in enumerate((types_msg_gz_path, types_json_path)):
+        with gpsdio.open(path) as src:
+            msgs = list(gpsdio.ops.sort(src, 'mmsi'))
+        expected.extend(msgs)
+        pth = str(tmpdir.join('sorted{}.msg'.format(idx)))
+        with gpsdio.open(pth, 'w') as dst:
+            for msg in msgs:
+                dst.write(msg)
+        inputs.append(pth)
+
+    pth = str(tmpdir.join('merged.json'))
+    result = runner.invoke(gpsdio.cli.main.main_group, [
+        'merge', '--field', 'mmsi', '--check-sorted'] + inputs + [pth])
+    assert result.exit_code == 0
+
+    with gpsdio.open(pth) as src:
+        actual = list(src)
+    assert len(actual) == len(expected)
+    assert [m['mmsi'] for m in actual] == sorted(m['mmsi'] for m in expected)
+    assert actual == sorted(expected, key=lambda m: m['mmsi'])
+
+
+def test_merge_missing_field(types_json_path, tmpdir, runner):
+
+    # Type 5 messages lack 'heading' and are merged after all others
+    with gpsdio.open(types_json_path) as src:
+        msgs = {m['type']: m for m in src}
+    inputs = []
+    for idx, stream in enumerate((
+            [dict(msgs[1], mmsi=1, heading=10), dict(msgs[5], mmsi=2)],
+            [dict(msgs[1], mmsi=3, heading=5), dict(msgs[1], mmsi=4, heading=20)])):
+        pth = str(tmpdir.join('in{}.json'.format(idx)))
+        with gpsdio.open(pth, 'w') as dst:
+            for msg in stream:
+                dst.write(msg)
+        inputs.append(pth)
+
+    pth = str(tmpdir.join('merged.json'))
+    result = runner.invoke(gpsdio.cli.main.main_group, [
+        'merge', '--field', 'heading', '--check-sorted'] + inputs + [pth])
+    assert result.exit_code == 0
+
+    with gpsdio.open(pth) as src:
+        assert [m['mmsi'] for m in src] == [3, 1, 4, 2]
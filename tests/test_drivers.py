@@ -3,11 +3,18 @@ Unittests for gpsdio.drivers
 """
 
 
+import gzip
+import io
+import os
 import sys
+import time
 
 import pytest
+import six
 
+import gpsdio._nljson
 import gpsdio.drivers
+import gpsdio.schema
 
 
 def test_get_compression():
@@ -43,3 +50,730 @@ def test_open_gzip(types_json_gz_path):
                 assert 'mmsi' in msg
                 assert 'type' in msg
                 assert 'timestamp' in msg
+
+
+@pytest.mark.parametrize('ext', ['json', 'msg'])
+def test_zstd_round_robin(ext, types_json_path, tmpdir):
+    pytest.importorskip('zstandard')
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    pth = str(tmpdir.join('test_zstd_round_robin.{}.zst'.format(ext)))
+    co = {'level': 10, 'threads': 2, 'long_distance': True}
+    with gpsdio.open(pth, 'w', co=co) as dst:
+        for msg in expected:
+            dst.write(msg)
+    # Appending adds a second frame
+    with gpsdio.open(pth, 'a') as dst:
+        for msg in expected:
+            dst.write(msg)
+
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected * 2
+
+
+def test_zstd_dictionary(types_json_path, tmpdir):
+    pytest.importorskip('zstandard')
+    with open(types_json_path, 'rb') as f:
+        samples = f.readlines() * 20
+    dictionary = gpsdio.drivers.ZSTDDriver.train_dictionary(samples, size=4096)
+    dict_path = str(tmpdir.join('ais.dict'))
+    with open(dict_path, 'wb') as f:
+        f.write(dictionary)
+
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+    pth = str(tmpdir.join('test_zstd_dictionary.json.zst'))
+    with gpsdio.open(pth, 'w', co={'dictionary': dict_path}) as dst:
+        for msg in expected:
+            dst.write(msg)
+    with gpsdio.open(pth, co={'dictionary': dictionary}) as actual:
+        assert list(actual) == expected
+
+
+def test_zstd_cannot_read_from_stdin():
+    pytest.importorskip('zstandard')
+    with pytest.raises(IOError):
+        gpsdio.drivers.ZSTDDriver().open(name=sys.stdin, mode='r')
+
+
+@pytest.mark.parametrize('ext', ['json', 'msg'])
+@pytest.mark.parametrize('co', [{}, {'level': 9, 'block_size': '4MB'}, {'block_size': 262144}])
+def test_lz4_round_robin(ext, co, types_json_path, tmpdir):
+    pytest.importorskip('lz4')
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    pth = str(tmpdir.join('test_lz4_round_robin.{}.lz4'.format(ext)))
+    with gpsdio.open(pth, 'w', co=co) as dst:
+        for msg in expected:
+            dst.write(msg)
+    with gpsdio.open(pth, 'a') as dst:
+        for msg in expected:
+            dst.write(msg)
+
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected * 2
+
+
+def test_lz4_bad_block_size(tmpdir):
+    pytest.importorskip('lz4')
+    with pytest.raises(ValueError):
+        gpsdio.open(str(tmpdir.join('test.json.lz4')), 'w', co={'block_size': '2MB'})
+
+
+def test_xz_read_fixtures(types_json_path, types_json_xz_path, types_msg_xz_path):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+    for pth in (types_json_xz_path, types_msg_xz_path):
+        with gpsdio.open(pth) as actual:
+            assert list(actual) == expected
+        # Block reader
+        with gpsdio.open(pth, co={'threads': 2}) as actual:
+            assert list(actual) == expected
+        assert len(gpsdio.drivers.XZDriver.index(pth)) == 1
+
+
+@pytest.mark.parametrize('ext', ['json', 'msg'])
+def test_xz_blocks(ext, types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src) * 20
+
+    pth = str(tmpdir.join('test_xz_blocks.{}.xz'.format(ext)))
+    co = {'block_size': 4096, 'threads': 3, 'preset': 1, 'check': 'sha256'}
+    with gpsdio.open(pth, 'w', co=co) as dst:
+        for msg in expected:
+            dst.write(msg)
+    with gpsdio.open(pth, 'a', co={'block_size': 4096}) as dst:
+        for msg in expected:
+            dst.write(msg)
+    expected *= 2
+
+    blocks = gpsdio.drivers.XZDriver.index(pth)
+    assert len(blocks) > 10
+    for prev, block in zip(blocks, blocks[1:]):
+        assert block.offset > prev.offset + prev.size
+        assert block.uncompressed_offset == prev.uncompressed_offset + prev.uncompressed_size
+
+    for co in ({}, {'threads': 4}):
+        with gpsdio.open(pth, co=co) as actual:
+            assert list(actual) == expected
+
+    # Every block starts with a complete message
+    actual = []
+    for idx in range(0, len(blocks), 3):
+        with gpsdio.open(pth, co={'start_block': idx, 'num_blocks': 3}) as src:
+            actual.extend(src)
+    assert actual == expected
+
+
+def test_xz_invalid(types_json_path, tmpdir):
+    with pytest.raises(IOError):
+        gpsdio.drivers.XZDriver.index(types_json_path)
+    with pytest.raises(ValueError):
+        gpsdio.open(str(tmpdir.join('test.json.xz')), 'w', co={'check': 'md5'})
+
+
+@pytest.mark.parametrize('ext', ['json', 'msg'])
+def test_gzip_parallel(ext, types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src) * 20
+
+    pth = str(tmpdir.join('test_gzip_parallel.{}.gz'.format(ext)))
+    co = {'threads': 4, 'block_size': 4096, 'compresslevel': 6}
+    with gpsdio.open(pth, 'w', co=co) as dst:
+        for msg in expected:
+            dst.write(msg)
+    with gpsdio.open(pth, 'a', co={'threads': 1}) as dst:
+        for msg in expected:
+            dst.write(msg)
+
+    # A standard multi-member file
+    with open(pth, 'rb') as f:
+        assert f.read().count(b'\x1f\x8b\x08') > 10
+    with gzip.open(pth) as f:
+        assert len(f.read()) > 4096 * 10
+
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected * 2
+
+    # Without an index threads are ignored when reading
+    for path in (pth, types_json_path + '.gz'):
+        with gpsdio.open(path) as src:
+            messages = list(src)
+        with gpsdio.open(path, co={'threads': 4}) as actual:
+            assert list(actual) == messages
+
+
+@pytest.mark.parametrize('ext,co', [
+    ('json.gz', {'threads': 2}),
+    ('msg.gz', {'index': True}),
+    ('json.xz', {}),
+])
+def test_block_writer_flush(ext, co, types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    # Flushing ends the current block so everything written can be read
+    pth = str(tmpdir.join('test.' + ext))
+    with gpsdio.open(pth, 'w', co=co) as dst:
+        for msg in expected[:5]:
+            dst.write(msg)
+        dst.flush()
+        with gpsdio.open(pth) as src:
+            assert list(src) == expected[:5]
+        for msg in expected[5:]:
+            dst.write(msg)
+    with gpsdio.open(pth) as src:
+        assert list(src) == expected
+
+    # And so does flushing on a timer
+    with gpsdio.open(pth, 'w', co=co, do={'flush_interval': 0.01}) as dst:
+        dst.write(expected[0])
+        for _ in range(500):
+            if os.path.getsize(pth) > 0:
+                break
+            time.sleep(0.01)
+        with gpsdio.open(pth) as src:
+            assert list(src) == expected[:1]
+
+
+def test_block_writer_note_flush():
+    from gpsdio._blocks import BlockWriter
+
+    # A flush between noting a value and writing its message, like one from
+    # a timer, doesn't give the value to the block that was just ended
+    f = BlockWriter(io.BytesIO(), lambda b: b, 1024, closefd=False)
+    f.note(1)
+    f.write(b'a')
+    f.note(2)
+    f.flush()
+    f.write(b'b')
+    f.close()
+    assert [(b['first'], b['last'], b['count']) for b in f.blocks] == [(1, 1, 1), (2, 2, 1)]
+
+
+def test_gzip_parallel_bad_option(tmpdir):
+    with pytest.raises(TypeError):
+        gpsdio.open(str(tmpdir.join('test.json.gz')), 'w', co={'threads': 2, 'mtime': 0})
+
+
+@pytest.mark.parametrize('ext', ['json', 'msg'])
+def test_gzip_index(ext, types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        sample = [m for m in src if 'timestamp' in m]
+    expected = []
+    for idx in range(500):
+        msg = dict(sample[idx % len(sample)])
+        msg['timestamp'] = '2015-01-01T00:{:02d}:{:02d}.000000Z'.format(idx // 60, idx % 60)
+        expected.append(msg)
+
+    pth = str(tmpdir.join('test_gzip_index.{}.gz'.format(ext)))
+    with gpsdio.open(pth, 'w', co={'index': True, 'block_size': 4096}) as dst:
+        for msg in expected[:400]:
+            dst.write(msg)
+    with gpsdio.open(pth, 'a', co={'index': True, 'block_size': 4096, 'threads': 2}) as dst:
+        dst.write_batch(expected[400:])
+
+    # Still a normal GZIP file
+    with gpsdio.open(pth) as actual:
+        assert list(actual) == expected
+    with gpsdio.open(pth, co={'threads': 2}) as actual:
+        assert list(actual) == expected
+
+    index = gpsdio.drivers.GZIPDriver.index(pth)
+    assert len(index) > 10
+    assert sum(b['count'] for b in index) == len(expected)
+    for prev, block in zip(index, index[1:]):
+        assert block['offset'] == prev['offset'] + prev['size']
+        assert block['first_message'] == prev['first_message'] + prev['count']
+    for block in index:
+        first = block['first_message']
+        assert block['first_timestamp'] == expected[first]['timestamp']
+        assert block['last_timestamp'] == expected[first + block['count'] - 1]['timestamp']
+
+    # Seek by message number
+    for start in (0, 1, 123, 499, 500):
+        with gpsdio.open(pth, co={'start_message': start, 'threads': 2}) as actual:
+            assert list(actual) == expected[start:]
+
+    # Seek by time
+    start, end = '2015-01-01T00:03:20.000000Z', '2015-01-01T00:05:00.000000Z'
+    with gpsdio.open(pth, co={'start_time': start, 'end_time': end}) as src:
+        actual = list(src)
+    assert [m for m in actual if start <= m['timestamp'] <= end] \
+        == [m for m in expected if start <= m['timestamp'] <= end]
+    assert len(actual) < len(expected) / 2
+
+    # Split work by block
+    actual = []
+    for idx in range(0, len(index), 4):
+        with gpsdio.open(pth, co={'start_block': idx, 'num_blocks': 4}) as src:
+            actual.extend(src)
+    assert actual == expected
+
+
+def test_gzip_index_errors(types_json_gz_path, tmpdir):
+    with pytest.raises(IOError):
+        gpsdio.open(types_json_gz_path, co={'start_message': 10})
+    with pytest.raises(IOError):
+        gpsdio.open(types_json_gz_path, co={'index': True}, mode='a')
+
+
+def test_gzip_index_modified(types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+    pth = str(tmpdir.join('test_gzip_index_modified.json.gz'))
+
+    # Appending without the index option keeps the index up to date
+    with gpsdio.open(pth, 'w', co={'index': True}) as dst:
+        dst.write_batch(expected)
+    with gpsdio.open(pth, 'a') as dst:
+        dst.write_batch(expected)
+    assert sum(b['count'] for b in gpsdio.drivers.GZIPDriver.index(pth)) == len(expected) * 2
+    with gpsdio.open(pth, co={'threads': 2}) as src:
+        assert list(src) == expected * 2
+
+    # Overwriting without the index option removes it
+    with gpsdio.open(pth, 'w', co={'index': True}) as dst:
+        dst.write_batch(expected[:3])
+    with gpsdio.open(pth, 'w') as dst:
+        dst.write_batch(expected)
+    assert not os.path.exists(pth + '.idx')
+    with gpsdio.open(pth, co={'threads': 2}) as src:
+        assert list(src) == expected
+
+    # An index that doesn't match the file is only used when seeking
+    with gpsdio.open(pth, 'w', co={'index': True}) as dst:
+        dst.write_batch(expected)
+    with gzip.open(pth, 'ab') as f, open(types_json_path, 'rb') as data:
+        f.write(data.read())
+    with gpsdio.open(pth, co={'threads': 2}) as src:
+        assert list(src) == expected * 2
+    with pytest.raises(IOError):
+        gpsdio.open(pth, co={'start_message': 10})
+
+
+def test_gzip_index_append_new_file(types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+    pth = str(tmpdir.join('test_gzip_index_append_new_file.json.gz'))
+    with gpsdio.open(pth, 'a', co={'index': True}) as dst:
+        dst.write_batch(expected)
+    assert sum(b['count'] for b in gpsdio.drivers.GZIPDriver.index(pth)) == len(expected)
+    with gpsdio.open(pth, co={'threads': 2}) as src:
+        assert list(src) == expected
+
+
+def _typed(msgs):
+    return [{k: (type(v), v) for k, v in six.iteritems(m)} for m in msgs]
+
+
+def test_parquet_round_robin(types_json_path, tmpdir):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    pth = str(tmpdir.join('test_parquet_round_robin.parquet'))
+    with gpsdio.open(pth, 'w', do={'row_group_size': 2}) as dst:
+        for msg in expected:
+            dst.write(msg)
+    with gpsdio.open(pth) as src:
+        assert list(src) == expected
+
+    # Fields like 'gnss' hold either bools or ints and keep their type
+    gnss = next(m for m in expected if 'gnss' in m)
+    typed = [dict(gnss, gnss=v) for v in (True, False, 1, 0)]
+    with gpsdio.open(pth, 'w') as dst:
+        dst.write_batch(typed)
+    with gpsdio.open(pth) as src:
+        assert _typed(src) == _typed(typed)
+    with gpsdio.open(pth, do={'columns': ['gnss']}) as src:
+        actual = [m['gnss'] for m in src]
+    assert [(type(v), v) for v in actual] == [(type(m['gnss']), m['gnss']) for m in typed]
+
+    # Row groups can be written by type, which reorders messages
+    with gpsdio.open(pth, 'w', do={'row_group_size': 2, 'per_type': True}) as dst:
+        for msg in expected:
+            dst.write(msg)
+    f = pq.ParquetFile(pth)
+    types = set()
+    for idx in range(f.num_row_groups):
+        stats = f.metadata.row_group(idx).column(0).statistics
+        assert stats.min == stats.max
+        types.add(stats.min)
+    assert types == set(m['type'] for m in expected)
+
+    with gpsdio.open(pth) as src:
+        actual = list(src)
+    assert actual != expected
+    assert actual == sorted(expected, key=lambda m: m['type'])
+
+
+def test_parquet_projection_and_pruning(types_json_path, tmpdir):
+    pytest.importorskip('pyarrow')
+    with gpsdio.open(types_json_path) as src:
+        sample = [m for m in src if m['type'] == 1]
+    expected = []
+    for idx in range(100):
+        msg = dict(sample[0])
+        msg.update(
+            mmsi=100 + idx, lon=float(idx), lat=0.0,
+            timestamp='2015-01-01T00:{:02d}:{:02d}.000000Z'.format(idx // 60, idx % 60))
+        expected.append(msg)
+
+    pth = str(tmpdir.join('test_parquet_pruning.parquet'))
+    with gpsdio.open(pth, 'w', do={'row_group_size': 10}) as dst:
+        dst.write_batch(expected)
+
+    with gpsdio.open(pth, do={'mmsi': [125, 126]}) as src:
+        assert list(src) == expected[20:30]
+    with gpsdio.open(pth, do={'bbox': [45.5, -1, 65, 1]}) as src:
+        assert list(src) == expected[40:70]
+    with gpsdio.open(pth, do={'start_time': '2015-01-01T00:01:35.000000Z'}) as src:
+        assert list(src) == expected[90:]
+    with gpsdio.open(pth, do={'end_time': expected[0]['timestamp']}) as src:
+        assert list(src) == expected[:10]
+
+    # Other fields get their schema default and still validate
+    with gpsdio.open(pth, do={'columns': ['mmsi', 'lon']}) as src:
+        actual = list(src)
+        default = src.schema[1]['lat']['default']
+    assert [m['mmsi'] for m in actual] == [m['mmsi'] for m in expected]
+    assert [m['lon'] for m in actual] == [m['lon'] for m in expected]
+    assert all(m['lat'] == default for m in actual)
+
+
+def test_parquet_errors(types_json_path, tmpdir):
+    pytest.importorskip('pyarrow')
+    pth = str(tmpdir.join('test_parquet_errors.parquet'))
+    with pytest.raises(IOError):
+        gpsdio.open(pth, 'w', compression='GZIP')
+    with pytest.raises(ValueError):
+        gpsdio.open(pth, 'a')
+
+
+@pytest.mark.parametrize('ext', ['arrow', 'feather'])
+@pytest.mark.parametrize('do', [{}, {'batch_size': 5}, {'compression': 'zstd'}])
+def test_arrow_round_robin(ext, do, types_json_path, tmpdir):
+    pytest.importorskip('pyarrow')
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    # Fields like 'gnss' hold either bools or ints and keep their type
+    gnss = next(m for m in expected if 'gnss' in m)
+    expected += [dict(gnss, gnss=v) for v in (True, False, 1, 0)]
+
+    pth = str(tmpdir.join('test_arrow_round_robin.' + ext))
+    with gpsdio.open(pth, 'w', do=do) as dst:
+        dst.write_batch(expected)
+
+    for memory_map in (True, False):
+        with gpsdio.open(pth, do={'memory_map': memory_map}) as src:
+            assert _typed(src) == _typed(expected)
+    with open(pth, 'rb') as f, gpsdio.open(f, driver='Arrow') as src:
+        assert _typed(src) == _typed(expected)
+
+
+@pytest.mark.parametrize('ext', ['parquet', 'arrow'])
+def test_arrow_unknown_fields(ext, types_json_path, tmpdir):
+    pytest.importorskip('pyarrow')
+    with gpsdio.open(types_json_path) as src:
+        msg = next(m for m in src if m['type'] == 1)
+    pth = str(tmpdir.join('test_arrow_unknown_fields.' + ext))
+
+    # Fields outside the schema are never silently dropped
+    with pytest.raises(ValueError):
+        with gpsdio.open(pth, 'w', _check=False) as dst:
+            dst.write(dict(msg, foo=1))
+
+    # Types outside the schema keep their stored fields
+    unknown = {'type': 1000, 'mmsi': 1, 'timestamp': msg['timestamp']}
+    with gpsdio.open(pth, 'w', _check=False) as dst:
+        dst.write_batch([msg, unknown])
+    with gpsdio.open(pth, _check=False) as src:
+        assert list(src) == [msg, unknown]
+
+
+def test_arrow_read_table(types_json_path, tmpdir):
+    pa = pytest.importorskip('pyarrow')
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    pth = str(tmpdir.join('test_arrow_read_table.arrow'))
+    with gpsdio.open(pth, 'w') as dst:
+        dst.write_batch(expected)
+
+    # Memory mapped and not copied
+    allocated = pa.total_allocated_bytes()
+    table = gpsdio.drivers.ArrowDriver.read_table(pth, columns=['mmsi', 'lat'])
+    assert pa.total_allocated_bytes() == allocated
+    assert table.column_names == ['mmsi', 'lat']
+    assert table.column('mmsi').to_pylist() == [m['mmsi'] for m in expected]
+
+    with gpsdio.open(pth, do={'columns': ['lat']}) as src:
+        assert [m.get('lat') for m in src] == [m.get('lat') for m in expected]
+
+    with pytest.raises(IOError):
+        gpsdio.open(pth, 'w', compression='GZIP')
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_msgpack_byte_ranges(mmap, types_msg_path, tmpdir):
+    with gpsdio.open(types_msg_path) as src:
+        expected = list(src)
+    with gpsdio.open(types_msg_path, do={'mmap': mmap}) as src:
+        assert list(src) == expected
+
+    ranges = gpsdio.drivers.MsgPackDriver.byte_ranges(types_msg_path, 4)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0
+    for prev, rng in zip(ranges, ranges[1:]):
+        assert prev[1] == rng[0]
+
+    actual = []
+    counts = []
+    for start, stop in ranges:
+        with gpsdio.open(types_msg_path, do={'mmap': mmap, 'start': start, 'stop': stop}) as src:
+            actual.extend(src)
+        counts.append(len(actual))
+    assert actual == expected
+
+    # Resume from a message boundary
+    with gpsdio.open(types_msg_path, do={'mmap': mmap, 'start': ranges[2][0]}) as src:
+        assert list(src) == expected[counts[1]:]
+
+    # Ranges must end on a message boundary
+    with pytest.raises(IOError):
+        with gpsdio.open(types_msg_path, do={'mmap': mmap, 'stop': ranges[0][1] + 1}) as src:
+            list(src)
+
+    empty = str(tmpdir.join('empty.msg'))
+    open(empty, 'w').close()
+    with gpsdio.open(empty, do={'mmap': mmap}) as src:
+        assert list(src) == []
+
+
+def test_msgpack_mmap_closed_early(types_msg_path, monkeypatch):
+    import mmap
+
+    closed = []
+
+    class Recording(mmap.mmap):
+        def close(self):
+            closed.append(self)
+            super(Recording, self).close()
+
+    # Closing before every message is read still releases the map
+    monkeypatch.setattr(mmap, 'mmap', Recording)
+    with gpsdio.open(types_msg_path, do={'mmap': True}) as src:
+        next(src)
+        assert closed == []
+    assert len(closed) == 1
+
+
+@pytest.mark.parametrize('compression', [False, 'GZIP', 'BZ2'])
+@pytest.mark.parametrize('buffer_size', [7, 1024 ** 2])
+def test_nljson_bulk(compression, buffer_size, types_json_path, tmpdir):
+    pytest.importorskip('orjson')
+    with gpsdio.open(types_json_path, do={'bulk': False}) as src:
+        expected = list(src)
+
+    pth = str(tmpdir.join('test_nljson_bulk.json'))
+    with gpsdio.open(pth, 'w', compression=compression) as dst:
+        dst.write_batch(expected)
+
+    do = {'buffer_size': buffer_size}
+    with gpsdio.open(pth, compression=compression, do=do) as src:
+        assert isinstance(src._stream.f, gpsdio._nljson.BulkReader)
+        assert list(src) == expected
+
+
+def test_nljson_bulk_lines():
+    pytest.importorskip('orjson')
+    from gpsdio._nljson import BulkReader
+
+    text = '{"a": 1}\n\n{"a": 2}\r\n  \n{"a": 3}'
+    for data in (text, text.encode('utf-8')):
+        for size in (1, 4, 1024):
+            f = io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data)
+            assert list(BulkReader(f, buffer_size=size)) == [{'a': 1}, {'a': 2}, {'a': 3}]
+
+    with pytest.raises(ValueError):
+        list(BulkReader(io.BytesIO(b'{"a": 1}\n{"a": \n{"a": 3}\n')))
+
+    # Several values on one line are an error rather than several messages
+    for data in (b'{"a": 1}, {"a": 2}\n{"a": 3}\n', b'{"a": 0}\n{"a": 1}, {"a": 2}'):
+        with pytest.raises(ValueError):
+            list(BulkReader(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize('mode', ['r', 'rb'])
+def test_nljson_bulk_pipe(mode, types_json_path):
+    pytest.importorskip('orjson')
+    import threading
+
+    with open(types_json_path, 'rb') as f:
+        line = f.readline()
+
+    # Messages are decoded as they arrive rather than when the buffer fills
+    rfd, wfd = os.pipe()
+    with io.open(rfd, mode) as r, io.open(wfd, 'wb') as w:
+        w.write(line)
+        w.flush()
+        src = gpsdio.open(r, driver='NewlineJSON', compression=False)
+        received = []
+        thread = threading.Thread(target=lambda: received.append(next(src)))
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        assert len(received) == 1
+        w.close()
+        assert list(src) == []
+
+
+def test_msgpack_fused_validation(types_msg_path, tmpdir):
+    inplace = gpsdio.validate.cached_compile_inplace_validator
+    with gpsdio.open(types_msg_path, do={'fuse': False}) as src:
+        assert src._compiled is not inplace(src._validator)
+        expected = list(src)
+    with gpsdio.open(types_msg_path) as src:
+        assert src._compiled is inplace(src._validator)
+        assert list(src) == expected
+    with gpsdio.open(types_msg_path, do={'object_hook': dict}) as src:
+        assert src._compiled is not inplace(src._validator)
+        assert list(src) == expected
+
+    # Unvalidated messages still raise
+    pth = str(tmpdir.join('test_msgpack_fused_validation.msg'))
+    for msg in ({'mmsi': 1}, dict(expected[0], lat='invalid')):
+        with gpsdio.open(pth, 'w', _check=False) as dst:
+            dst.write(msg)
+        for fuse in (False, True):
+            with gpsdio.open(pth, do={'fuse': fuse}) as src:
+                with pytest.raises((gpsdio.errors.SchemaError, ValueError)):
+                    next(src)
+
+
+def test_msgpack_fused_validation_nested(types_msg_path, tmpdir):
+
+    # Only the message itself is validated, not maps nested in its fields
+    schema = dict(gpsdio.schema.build_schema())
+    schema[1] = dict(schema[1], ext={'validate': dict, 'default': None})
+    with gpsdio.open(types_msg_path) as src:
+        msg = next(m for m in src if m['type'] == 1)
+    msg['ext'] = {'type': 'foo', 'x': 1}
+
+    pth = str(tmpdir.join('test_msgpack_fused_validation_nested.msg'))
+    with gpsdio.open(pth, 'w', schema=schema) as dst:
+        dst.write(msg)
+    for fuse in (False, True):
+        with gpsdio.open(pth, schema=schema, do={'fuse': fuse}) as src:
+            assert list(src) == [msg]
+
+
+def test_msgpack_fused_validation_clear_cache(types_msg_path):
+
+    # Validator objects modified in place are picked up after clearing the
+    # cache
+    validator = gpsdio.validate.build_validator(gpsdio.schema.build_schema())
+    validator[1]['heading'] = gpsdio.validate.Any(gpsdio.validate.Int())
+    with gpsdio.open(types_msg_path, validator=validator, do={'fuse': True}) as src:
+        msg = next(m for m in src if m['type'] == 1)
+    assert isinstance(msg['heading'], int)
+
+    validator[1]['heading'].tests = (str,)
+    gpsdio.schema.clear_cache()
+    with gpsdio.open(types_msg_path, validator=validator, do={'fuse': True}) as src:
+        msg = next(m for m in src if m['type'] == 1)
+    assert msg['heading'] == '511'
+
+
+def test_msgpack_fused_validation_pushdown(types_msg_path, tmpdir):
+    with gpsdio.open(types_msg_path) as src:
+        messages = list(src)
+    expected = [m for m in messages if m['type'] == 5]
+
+    # Messages rejected by a pushed down filter are never validated, like
+    # they are for other drivers
+    pth = str(tmpdir.join('test_msgpack_fused_validation_pushdown.msg'))
+    with gpsdio.open(pth, 'w', _check=False) as dst:
+        dst.write(dict(messages[0], lat='invalid'))
+        for msg in messages:
+            dst.write(msg)
+    for fuse in (False, True):
+        with gpsdio.open(pth, do={'fuse': fuse}) as src:
+            assert src.pushdown("type == 5") == ()
+            assert list(src) == expected
+
+
+@pytest.mark.parametrize('ext', ['json', 'msg', 'json.gz', 'msg.bz2'])
+def test_buffered_writes(ext, types_json_path, tmpdir):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    # Compressed streams can't necessarily be read until closed
+    compressed = '.' in ext
+    pth = str(tmpdir.join('test_buffered_writes.' + ext))
+    with gpsdio.open(pth, 'w') as dst:
+        dst.write_batch(expected)
+        if not compressed:
+            assert os.path.getsize(pth) == 0
+            dst.flush()
+            with gpsdio.open(pth) as src:
+                assert list(src) == expected
+    with gpsdio.open(pth) as src:
+        assert list(src) == expected
+
+    # Appending is also buffered and small buffers are written as they fill
+    with gpsdio.open(pth, 'a', do={'buffer_size': 100}) as dst:
+        dst.write_batch(expected)
+    with gpsdio.open(pth) as src:
+        assert list(src) == expected * 2
+
+    # Time based flushing, even when nothing else is written
+    with gpsdio.open(pth, 'w', do={'flush_interval': 0.01}) as dst:
+        dst.write(expected[0])
+        if not compressed:
+            for _ in range(500):
+                if os.path.getsize(pth):
+                    break
+                time.sleep(0.01)
+            with gpsdio.open(pth) as src:
+                assert list(src) == expected[:1]
+        dst.write_batch(expected[1:])
+    with gpsdio.open(pth) as src:
+        assert list(src) == expected
+
+    with gpsdio.open(pth, 'w', do={'buffer_size': 0}) as dst:
+        dst.write_batch(expected)
+    with gpsdio.open(pth) as src:
+        assert list(src) == expected
+
+
+def test_timed_write_buffer_errors():
+    from gpsdio._buffer import TimedWriteBuffer
+
+    class Broken(io.BytesIO):
+        def write(self, data):
+            raise IOError("broken")
+
+    # Errors from flushing in the background are raised by the next call
+    f = TimedWriteBuffer(Broken(), flush_interval=0.01)
+    f.write(b'data')
+    for _ in range(500):
+        if f._timer is None:
+            break
+        time.sleep(0.01)
+    with pytest.raises(IOError):
+        f.write(b'data')
+
+    # And by every call after that
+    with pytest.raises(IOError):
+        f.write(b'data')
+    with pytest.raises(IOError):
+        f.flush()
+    with pytest.raises(IOError):
+        f.close()
+    assert f.closed
+    assert f._chunks == []
@@ -3,7 +3,10 @@ Unittests for gpsdio.io
 """
 
 
+import io
 import json
+import subprocess
+import sys
 
 import pytest
 import six
@@ -12,7 +15,9 @@ from six.moves import StringIO
 import gpsdio
 import gpsdio.drivers
 import gpsdio.errors
+import gpsdio.ops
 import gpsdio.schema
+import gpsdio.validate
 
 
 def test_no_detect_compression(types_msg_path):
@@ -122,3 +127,331 @@ def test_validate_msg(types_json_path):
         msg['other'] = None
         with pytest.raises(gpsdio.errors.SchemaError):
             src.validate_msg(msg)
+
+
+def test_read_batch(types_msg_gz_path):
+    with gpsdio.open(types_msg_gz_path) as src:
+        expected = list(src)
+    with gpsdio.open(types_msg_gz_path) as src:
+        batch = src.read_batch(5)
+        assert batch == expected[:5]
+        assert src.read_batch(len(expected)) == expected[5:]
+        assert src.read_batch(5) == []
+
+
+def test_iter_batches(types_json_path):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+    with gpsdio.open(types_json_path) as src:
+        batches = list(src.iter_batches(3))
+    assert all(len(b) == 3 for b in batches[:-1])
+    assert 0 < len(batches[-1]) <= 3
+    assert [m for b in batches for m in b] == expected
+
+
+def test_validate_msgs_error(types_json_path):
+    with gpsdio.open(types_json_path) as src:
+        msgs = src.read_batch(3)
+        with pytest.raises(gpsdio.errors.SchemaError):
+            src.validate_msgs(msgs + [{'type': 1}])
+
+
+def test_write_batch(types_msg_gz_path, tmpdir):
+    pth = str(tmpdir.mkdir('test').join('batch.msg'))
+    with gpsdio.open(types_msg_gz_path) as src, gpsdio.open(pth, 'w') as dst:
+        for batch in src.iter_batches(4):
+            dst.write_batch(batch)
+    with gpsdio.open(types_msg_gz_path) as expected, gpsdio.open(pth) as actual:
+        assert list(expected) == list(actual)
+
+
+def test_read_columns(types_msg_gz_path):
+    np = pytest.importorskip('numpy')
+    fields = ('type', 'mmsi', 'lat', 'lon', 'timestamp', 'speed', 'imo')
+    with gpsdio.open(types_msg_gz_path) as src:
+        expected = [m for m in src if m['type'] in (1, 2, 3, 18, 19)]
+    with gpsdio.open(types_msg_gz_path) as src:
+        chunks = list(src.read_columns(fields, size=10))
+    assert len(chunks) > 1
+    actual = np.concatenate(chunks)
+
+    assert actual.dtype['type'] == np.dtype('i8')
+    assert actual.dtype['lat'] == np.dtype('f8')
+    assert actual.dtype['timestamp'] == np.dtype('M8[us]')
+    assert len(actual) == len(expected)
+    for row, msg in zip(actual, expected):
+        assert row['type'] == msg['type']
+        assert row['mmsi'] == msg['mmsi']
+        assert round(row['lat'], 5) == round(msg['lat'], 5)
+        assert str(row['timestamp']) == msg['timestamp'][:-1]
+        # Not a field for positional messages
+        assert row['imo'] is None
+
+
+def test_read_columns_defaults(tmpdir):
+    pytest.importorskip('numpy')
+    pth = str(tmpdir.join('test.json'))
+    with gpsdio.open(pth, 'w', _check=False) as dst:
+        dst.write({'type': 1, 'mmsi': 1})
+
+    # Missing fields are filled with schema defaults, even without a schema
+    validator = gpsdio.validate.build_validator(gpsdio.schema.build_schema())
+    for kwargs in ({}, {'validator': validator}):
+        with gpsdio.open(pth, **kwargs) as src:
+            actual = next(src.read_columns(['mmsi', 'heading', 'speed']))
+        assert actual['mmsi'][0] == 1
+        assert actual['heading'][0] == 511
+        assert actual['speed'][0] == 1023.0
+
+
+def test_read_columns_all_types(types_json_path):
+    np = pytest.importorskip('numpy')
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+    with gpsdio.open(types_json_path) as src:
+        actual = np.concatenate(list(src.read_columns(['type'], types=None)))
+    assert list(actual['type']) == [m['type'] for m in expected]
+
+
+def test_open_with_validator(types_msg_gz_path):
+    validator = gpsdio.validate.build_validator(gpsdio.schema.build_schema())
+    with gpsdio.open(types_msg_gz_path) as expected, \
+            gpsdio.open(types_msg_gz_path, validator=validator) as actual:
+        assert actual._validator is validator
+        assert list(actual) == list(expected)
+    with pytest.raises(ValueError):
+        gpsdio.open(types_msg_gz_path, validator=validator, schema=gpsdio.schema.build_schema())
+
+
+def test_validator_is_cached(types_msg_gz_path, types_json_path):
+    with gpsdio.open(types_msg_gz_path) as src1, gpsdio.open(types_json_path) as src2:
+        assert src1.schema is src2.schema
+        assert src1._validator is src2._validator
+        # MsgPack messages are validated in place
+        assert src1._compiled is gpsdio.validate.cached_compile_inplace_validator(
+            src1._validator)
+        assert src2._compiled is gpsdio.validate.cached_compile_validator(src2._validator)
+
+
+def test_validator_cache_sees_replaced_validators(types_msg_gz_path):
+
+    # Replacing a field's validator in place doesn't change the size of the
+    # schema but still isn't served from the cache
+    schema = dict(gpsdio.schema.build_schema())
+    schema[1] = dict(schema[1])
+    with gpsdio.open(types_msg_gz_path, schema=schema) as src:
+        msg = next(m for m in src if m['type'] == 1)
+    assert isinstance(msg['heading'], int)
+
+    schema[1]['heading'] = dict(schema[1]['heading'], validate=str)
+    with gpsdio.open(types_msg_gz_path, schema=schema) as src:
+        msg = next(m for m in src if m['type'] == 1)
+    assert msg['heading'] == '511'
+
+    validator = gpsdio.validate.build_validator(gpsdio.schema.build_schema())
+    with gpsdio.open(types_msg_gz_path, validator=validator) as src:
+        assert isinstance(next(m for m in src if m['type'] == 1)['heading'], int)
+    validator[1]['heading'] = str
+    with gpsdio.open(types_msg_gz_path, validator=validator) as src:
+        assert next(m for m in src if m['type'] == 1)['heading'] == '511'
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_imap_bounded(ordered):
+    import multiprocessing
+    from gpsdio.io import _call_catching
+    from gpsdio.io import _imap_bounded
+
+    # Workers return exceptions rather than relying on error_callback
+    assert _call_catching(abs, -1) == (True, 1)
+    ok, error = _call_catching(abs, 'a')
+    assert not ok and isinstance(error, TypeError)
+
+    submitted = []
+
+    def tasks():
+        for i in range(20):
+            submitted.append(i)
+            yield -i
+
+    pool = multiprocessing.Pool(2)
+    try:
+        results = []
+        for result in _imap_bounded(pool, abs, tasks(), 3, ordered=ordered):
+            results.append(result)
+            # Never more than 3 tasks submitted beyond those consumed
+            assert len(submitted) <= len(results) + 3
+        assert (results if ordered else sorted(results)) == list(range(20))
+
+        # Errors are raised in the current process
+        with pytest.raises(TypeError):
+            list(_imap_bounded(pool, abs, ['a'], 3, ordered=ordered))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_open_many(workers, types_json_path, types_msg_gz_path, types_json_bz2_path):
+    paths = [types_json_path, types_msg_gz_path, types_json_bz2_path]
+    expected = []
+    for p in paths:
+        with gpsdio.open(p) as src:
+            expected.extend(src)
+
+    assert list(gpsdio.open_many(paths, workers=workers)) == expected
+
+    unordered = list(gpsdio.open_many(paths, workers=workers, ordered=False))
+
+    def key(msg):
+        return sorted((k, str(v)) for k, v in msg.items())
+
+    assert sorted(unordered, key=key) == sorted(expected, key=key)
+
+
+def test_open_many_options(types_json_path):
+    with gpsdio.open(types_json_path, _check=False) as src:
+        expected = list(src)
+    actual = list(gpsdio.open_many([types_json_path], workers=2, _check=False))
+    assert actual == expected
+    with pytest.raises(ValueError):
+        list(gpsdio.open_many([types_json_path], mode='w'))
+
+
+def test_pushdown(types_json_path):
+    expressions = ("type in (1, 2, 3)", "lat > 0", "mmsi != 0")
+    with gpsdio.open(types_json_path) as src:
+        expected = list(gpsdio.ops.filter(expressions, src))
+    assert expected
+
+    with gpsdio.open(types_json_path) as src:
+        assert src.pushdown(expressions) == ("lat > 0",)
+        assert list(gpsdio.ops.filter("lat > 0", src)) == expected
+
+    # Rejected messages are never validated
+    invalid = StringIO('{"type": 5, "mmsi": "bad"}\n{"type": 1, "mmsi": 1}\n')
+    with gpsdio.open(invalid, driver='NewlineJSON', compression=False) as src:
+        assert src.pushdown("type == 5 and mmsi == 2") == ()
+        assert list(src) == []
+
+    # Everything is pushed down when not validating
+    with gpsdio.open(types_json_path, _check=False) as src:
+        assert src.pushdown(expressions) == ()
+        assert len(list(src)) == len(expected)
+
+
+def test_pushdown_batch_size(types_msg_path):
+    pytest.importorskip('numpy')
+    expressions = ("type in (1, 2, 3) and mmsi > 300000000", "lat > 0")
+    with gpsdio.open(types_msg_path) as src:
+        expected = list(gpsdio.ops.filter(expressions, src))
+    assert expected
+
+    with gpsdio.open(types_msg_path) as src:
+        assert src.pushdown(expressions, batch_size=4) == ("lat > 0",)
+        assert list(gpsdio.ops.filter("lat > 0", src, batch_size=4)) == expected
+
+
+@pytest.mark.parametrize('fixture', [
+    'types_json_gz_path', 'types_msg_gz_path', 'types_json_bz2_path', 'types_json_xz_path'])
+def test_prefetch(fixture, request):
+    path = request.getfixturevalue(fixture)
+    with gpsdio.open(path) as src:
+        expected = list(src)
+    with gpsdio.open(path, prefetch=2) as src:
+        assert list(src) == expected
+
+    # Closing before the end stops the background thread
+    with gpsdio.open(path, prefetch=1) as src:
+        next(src)
+
+
+def test_read_ahead():
+    from gpsdio._blocks import ReadAhead
+
+    data = bytes(bytearray(range(256))) * 100
+    with ReadAhead(io.BytesIO(data), 2, chunk_size=1000) as f:
+        assert f.read() == data
+
+    class Broken(io.BytesIO):
+        def read(self, size=-1):
+            raise IOError("broken")
+
+    with ReadAhead(Broken(), 2) as f:
+        with pytest.raises(IOError):
+            f.read()
+
+
+@pytest.mark.parametrize('ext', ['json.gz', 'msg.bz2', 'json.xz'])
+def test_write_behind(types_json_path, tmpdir, ext):
+    with gpsdio.open(types_json_path) as src:
+        expected = list(src)
+
+    outfile = str(tmpdir.mkdir('test').join('out.' + ext))
+    with gpsdio.open(outfile, 'w', write_behind=2) as dst:
+        for msg in expected:
+            dst.write(msg)
+        dst.flush()
+    with gpsdio.open(outfile) as src:
+        assert list(src) == expected
+
+    # Compression drivers writing blocks in parallel are not wrapped
+    if not ext.endswith('bz2'):
+        with gpsdio.open(outfile, 'w', write_behind=2, co={'threads': 2}) as dst:
+            for msg in expected:
+                dst.write(msg)
+        with gpsdio.open(outfile) as src:
+            assert list(src) == expected
+
+
+def test_write_behind_errors():
+    from gpsdio._blocks import WriteBehind
+
+    f = io.BytesIO()
+    with WriteBehind(f, 2) as wb:
+        for _ in range(10):
+            wb.write(b'data')
+        wb.flush()
+        assert f.getvalue() == b'data' * 10
+
+    class Broken(io.BytesIO):
+        def write(self, data):
+            raise IOError("broken")
+
+    broken = Broken()
+    wb = WriteBehind(broken, 1)
+    wb.write(b'data')
+    with pytest.raises(IOError):
+        wb.close()
+    assert broken.closed
+
+    # The error is raised by every call after it and nothing else is written
+    class BrokenLater(io.BytesIO):
+        def write(self, data):
+            if self.tell():
+                raise IOError("broken")
+            return super(BrokenLater, self).write(data)
+
+        def close(self):
+            self.written = self.getvalue()
+            super(BrokenLater, self).close()
+
+    broken = BrokenLater()
+    wb = WriteBehind(broken, 1)
+    wb.write(b'first')
+    wb.flush()
+    wb.write(b'second')
+    wb._queue.join()
+    for call in (lambda: wb.write(b'third'), lambda: wb.write(b'fourth'), wb.flush, wb.close):
+        with pytest.raises(IOError):
+            call()
+    assert broken.written == b'first'
+
+
+def test_lazy_imports():
+    # Modules only needed by some features aren't imported with gpsdio
+    loaded = subprocess.check_output([
+        sys.executable, '-c',
+        "import sys, gpsdio; print(' '.join(sorted(sys.modules)))"]).decode('utf-8').split()
+    for name in ('gpsdio.ops', 'gpsdio._blocks'):
+        assert name not in loaded
@@ -3,7 +3,14 @@ Unittests for gpsdio.ops
 """
 
 
+import datetime
+import functools
+
+import pytest
+
 import gpsdio.ops
+import gpsdio.schema
+import gpsdio.validate
 
 
 def test_filter(types_msg_gz_path, types_json_gz_path):
@@ -41,3 +48,222 @@ def test_filter(types_msg_gz_path, types_json_gz_path):
             passed.append(msg)
             assert 'lat' in msg
     assert len(passed) >= 9
+
+
+def test_sort(types_msg_gz_path):
+    with gpsdio.open(types_msg_gz_path) as src:
+        msgs = list(src)
+    expected = sorted(msgs, key=lambda m: m.get('mmsi'))
+    assert list(gpsdio.ops.sort(msgs, 'mmsi')) == expected
+
+    # External sort with several runs, a single run, and a partial last run
+    for run_size in (1, 3, 7, len(msgs), len(msgs) + 1):
+        assert list(gpsdio.ops.sort(iter(msgs), 'mmsi', run_size=run_size)) == expected
+
+
+def test_sort_external_default_and_types(tmpdir):
+    msgs = [
+        {'id': 0, 'val': 3, 'timestamp': datetime.datetime(2015, 1, 1, 1, 2, 3, 4)},
+        {'id': 1},
+        {'id': 2, 'val': 1, 'data': b'bytes'},
+        {'id': 3, 'val': 3},
+        {'id': 4, 'val': 2},
+        {'id': 5},
+    ]
+    expected = sorted(msgs, key=lambda m: m.get('val', 0))
+    actual = list(gpsdio.ops.sort(msgs, 'val', default=0, run_size=2, tmpdir=str(tmpdir)))
+    assert actual == expected
+    assert [m['id'] for m in actual] == [1, 5, 2, 4, 0, 3]
+
+    # Temporary files are removed
+    assert tmpdir.listdir() == []
+
+
+def test_sort_external_fan_in(types_msg_gz_path, tmpdir):
+    with gpsdio.open(types_msg_gz_path) as src:
+        msgs = list(src) * 3
+    expected = sorted(msgs, key=lambda m: m.get('mmsi'))
+
+    # Many more runs than can be merged at once take several stable passes
+    for fan_in in (2, 3, 5, 100):
+        actual = gpsdio.ops.sort(iter(msgs), 'mmsi', run_size=1, fan_in=fan_in,
+                                 tmpdir=str(tmpdir))
+        assert list(actual) == expected
+        assert tmpdir.listdir() == []
+
+    # Stopping early still removes the temporary files
+    actual = gpsdio.ops.sort(iter(msgs), 'mmsi', run_size=2, fan_in=2, tmpdir=str(tmpdir))
+    next(actual)
+    actual.close()
+    assert tmpdir.listdir() == []
+
+    with pytest.raises(ValueError):
+        next(gpsdio.ops.sort(msgs, 'mmsi', run_size=2, fan_in=1))
+
+
+def test_merge():
+    s1 = [{'id': 0, 'val': 1}, {'id': 1, 'val': 3}, {'id': 2, 'val': 5}]
+    s2 = [{'id': 3, 'val': 1}, {'id': 4}, {'id': 5, 'val': 4}]
+    s2_sorted = [{'id': 4}, {'id': 3, 'val': 1}, {'id': 5, 'val': 4}]
+    actual = list(gpsdio.ops.merge([iter(s1), iter(s2_sorted)], field='val', default=0))
+    assert [m['id'] for m in actual] == [4, 0, 3, 1, 5, 2]
+
+    # Unsorted input passes through unless checked
+    assert len(list(gpsdio.ops.merge([s1, s2], field='val', default=0))) == 6
+    with pytest.raises(ValueError):
+        list(gpsdio.ops.merge([s1, s2], field='val', default=0, check=True))
+
+    # None values are skipped when checking
+    s3 = [{'val': 1}, {'val': None}, {'val': 2}]
+    assert len(list(gpsdio.ops.merge([s3], field='val', check=True))) == 3
+
+    # Messages lacking the field sort last when there is no default
+    s4 = [{'id': 6, 'val': 2}, {'id': 7}]
+    actual = list(gpsdio.ops.merge([s1, s4], field='val', check=True))
+    assert [m['id'] for m in actual] == [0, 6, 1, 2, 7]
+
+
+def test_filter_scope():
+    msgs = [{'type': 1, 'mmsi': 1}, {'type': 5, 'shipname': 'boat'}, {'type': 1, 'mmsi': 2}]
+
+    # Messages are yielded as-is
+    actual = list(gpsdio.ops.filter("mmsi > 1", msgs))
+    assert actual == [msgs[2]]
+    assert actual[0] is msgs[2]
+
+    # Missing fields fail the expression, builtins and the whole message are available
+    assert list(gpsdio.ops.filter("len(shipname) == 4", msgs)) == [msgs[1]]
+    assert list(gpsdio.ops.filter("'mmsi' not in msg", msgs)) == [msgs[1]]
+
+    # Blacklisted builtins are unavailable
+    assert list(gpsdio.ops.filter("eval('True')", msgs)) == []
+    assert list(gpsdio.ops.filter("__import__('os') is not None", msgs)) == []
+
+    # Modules imported by gpsdio.ops are unavailable
+    assert list(gpsdio.ops.filter("os.getpid() > 0 and shutil is not None", msgs)) == []
+    for name in ('ast', 'os', 'shutil', 'tempfile', 'itertools', 'six', '__import__'):
+        with pytest.raises(NameError):
+            eval(name, gpsdio.ops._filter_globals(), {})
+
+
+@pytest.mark.parametrize("expressions", [
+    "type in (1, 2, 3)",
+    "type not in [1, 2, 3]",
+    "mmsi > 1 and speed <= 10.5",
+    "mmsi == 2 or shipname == 'boat'",
+    "not (lat > -45.5)",
+    "'mmsi' in msg",
+    "'shipname' not in msg",
+    "lat and lon",
+    "speed",
+    "shipname >= 'a'",
+    "lat < lon",
+    "status == 1",
+    "speed > 5",
+    "shipname or speed",
+    "when.year == 2015 and when.hour > 1",
+    ("type == 1", "mmsi != 1"),
+    # Not vectorized
+    "isinstance(mmsi, int)",
+    "len(shipname) == 4",
+    "1 < mmsi < 3",
+])
+def test_filter_batch_size(expressions):
+    pytest.importorskip('numpy')
+    msgs = [
+        {'type': 1, 'mmsi': 1, 'lat': 10.5, 'lon': -1, 'speed': 0, 'status': 1,
+         'when': datetime.datetime(2015, 1, 1, 2)},
+        {'type': 5, 'mmsi': 3, 'shipname': 'boat', 'status': 'moored',
+         'when': datetime.datetime(2014, 12, 31, 23)},
+        {'type': 1, 'mmsi': 2, 'lat': -50.25, 'lon': 0.0, 'speed': 10.5, 'status': 1},
+        {'type': 2, 'mmsi': 4, 'lat': 0, 'lon': 1.5, 'speed': None, 'shipname': ''},
+        {'mmsi': 5, 'lat': 0.0, 'lon': 0.0, 'speed': 11,
+         'when': datetime.datetime(2015, 6, 1, 12)},
+    ]
+
+    # Exceptions like comparing None to a number are raised identically
+    try:
+        expected = list(gpsdio.ops.filter(expressions, msgs))
+    except Exception as e:
+        expected = type(e)
+    for batch_size in (1, 2, 100):
+        try:
+            actual = list(gpsdio.ops.filter(expressions, msgs, batch_size=batch_size))
+        except Exception as e:
+            actual = type(e)
+        assert actual == expected
+
+
+def test_filter_batch_size_file(types_msg_gz_path):
+    pytest.importorskip('numpy')
+    expressions = ("type in (1, 2, 3)", "lat > 0 or 'shipname' in msg")
+    with gpsdio.open(types_msg_gz_path) as stream:
+        expected = list(gpsdio.ops.filter(expressions, stream))
+    with gpsdio.open(types_msg_gz_path) as stream:
+        assert list(gpsdio.ops.filter(expressions, stream, batch_size=4)) == expected
+
+
+def test_filter_batch_vectorized():
+    pytest.importorskip('numpy')
+    from gpsdio import _vfilter
+
+    msgs = [{'type': 1, 'mmsi': 1}, {'type': 5, 'shipname': 'boat'}]
+    cols = _vfilter.Columns(msgs)
+    predicate = _vfilter.compile_expression("shipname == 'boat' or mmsi > 0", ())
+    assert predicate(cols).tolist() == [False, True]
+
+    # Expressions that can't be vectorized
+    for expr in ("len(shipname)", "1 < mmsi < 3", "msg", "mmsi +"):
+        with pytest.raises(_vfilter.Unsupported):
+            _vfilter.compile_expression(expr, ('len',))
+
+    # Data that can't be vectorized
+    cols = _vfilter.Columns([{'mmsi': 1}, {'mmsi': None}])
+    with pytest.raises(_vfilter.Unsupported):
+        _vfilter.compile_expression("mmsi > 0", ())(cols)
+
+
+def test_pushdown_eligible():
+    validator = gpsdio.validate.build_validator(gpsdio.schema.build_schema())
+    assert gpsdio.ops.pushdown_eligible("type in (1, 2, 3)", validator)
+    assert gpsdio.ops.pushdown_eligible("mmsi == 366268061 and isinstance(mmsi, int)", validator)
+    assert gpsdio.ops.pushdown_eligible("shipname == 'boat'", validator)
+    # Floats are rounded and datetimes parsed by validation
+    assert not gpsdio.ops.pushdown_eligible("lat > 0", validator)
+    assert not gpsdio.ops.pushdown_eligible("timestamp.year == 2015", validator)
+    # The message differs after validation
+    assert not gpsdio.ops.pushdown_eligible("'lat' in msg", validator)
+    assert not gpsdio.ops.pushdown_eligible("type ==", validator)
+
+
+@pytest.mark.parametrize('batch_size', [None, 1, 2, 100])
+def test_prefilter(batch_size):
+    if batch_size is not None:
+        pytest.importorskip('numpy')
+    validator = {1: {'type': gpsdio.validate.Int(), 'mmsi': gpsdio.validate.Int()},
+                 5: {'type': gpsdio.validate.Int(), 'shipname': gpsdio.validate.Instance(str)}}
+    msgs = [
+        {'type': 1, 'mmsi': 1},
+        # Fields outside the validator are hidden like they are after validation
+        {'type': 5, 'mmsi': 1, 'shipname': 'boat'},
+        # Can't be checked so validation can raise an exception
+        {'type': 1},
+        {'type': 9, 'mmsi': 1},
+        {'mmsi': 1},
+        {'type': 1, 'mmsi': 2},
+    ]
+    prefilter = functools.partial(gpsdio.ops.prefilter, batch_size=batch_size)
+    actual = list(prefilter("mmsi == 1", validator, msgs))
+    assert actual == [msgs[0], msgs[2], msgs[3], msgs[4]]
+    assert actual[0] is msgs[0]
+
+    # Batches where every message can be checked are vectorized
+    assert list(prefilter(("type == 1", "mmsi > 1"), validator, msgs[:2] + msgs[-1:])) \
+        == [msgs[-1]]
+    assert list(prefilter("shipname == 'boat' or mmsi == 2", validator, msgs[:2] + msgs[-1:])) \
+        == [msgs[1]]
+
+    # Builtins are still available and blacklisted builtins are not
+    assert list(prefilter("type == 5 and len(shipname) == 4", validator, msgs[:2])) \
+        == [msgs[1]]
+    assert list(prefilter("eval('True')", validator, msgs[:2])) == []
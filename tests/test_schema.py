@@ -8,3 +8,37 @@ from gpsdio import schema
 
 def test_build_schema():
     assert sorted(schema.build_schema().keys())[:3] == [1, 2, 3]
+
+
+def test_build_schema_cache():
+    assert schema.build_schema() is schema.build_schema()
+    assert schema.build_schema(extensions=False) is schema.build_schema(extensions=False)
+    assert schema.build_schema(fields=schema._FIELDS) is not schema.build_schema(
+        fields=schema._FIELDS)
+
+
+def test_build_schema_cache_invalidation(monkeypatch):
+    original = schema.build_schema()
+    monkeypatch.setattr(schema, 'FIELD_EXTENSIONS', {
+        'new_field': {'validate': schema.Int(), 'default': 0}})
+    monkeypatch.setattr(schema, 'FIELDS_BY_TYPE_EXTENSIONS', {1: ('new_field',)})
+    extended = schema.build_schema()
+    assert extended is not original
+    assert 'new_field' in extended[1]
+    monkeypatch.undo()
+    assert schema.build_schema() is original
+
+    schema.clear_cache()
+    assert schema.build_schema() is not original
+
+
+def test_build_schema_cache_extension_modified(monkeypatch):
+    extensions = {'new_field': {'validate': schema.Int(), 'default': 0}}
+    monkeypatch.setattr(schema, 'FIELD_EXTENSIONS', extensions)
+    monkeypatch.setattr(schema, 'FIELDS_BY_TYPE_EXTENSIONS', {1: ('new_field',)})
+    original = schema.build_schema()
+    assert original[1]['new_field']['default'] == 0
+
+    # Definitions modified in place are detected
+    extensions['new_field']['default'] = 1
+    assert schema.build_schema()[1]['new_field']['default'] == 1
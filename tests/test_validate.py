@@ -168,3 +168,80 @@ def test_In():
     assert v(0) is 0
     with pytest.raises(SchemaError):
         v('bad')
+
+
+def _call_or_exception(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize('validator', [
+    schema.Int(),
+    schema.IntRange(0, 3),
+    schema.IntRange(0, 3, include_min=False, include_max=False),
+    schema.FloatRange(0, 102),
+    schema.FloatRange(0, 360, include_max=False),
+    schema.FloatRange(-1.5, 1.5, include_min=False),
+    schema.IntIn([0, 1]),
+    schema.In([1022.0, 1023.0]),
+    schema.Instance(int, float),
+    schema.Any(schema.FloatRange(0, 102), schema.In([1022.0, 1023.0])),
+    schema.Any(schema.IntRange(0, 359), schema.IntIn([511])),
+    schema.Any(schema.Int(), schema.Instance(type(None))),
+    schema.Any(schema.Instance(type(None)), schema.DateTime()),
+])
+@pytest.mark.parametrize('inplace', [False, True])
+def test_compile_validator_matches_validators(validator, inplace):
+    compiled = validate.compile_validator({1: {'field': validator}}, inplace=inplace)[1]
+    values = [
+        None, True, False, -1, 0, 1, 2, 3, 4, 359, 360, 511, 2 ** 40, -2 ** 40,
+        -1.5, -0.0, 0.0, 1.5, 3.0, 101.99, 102.0, 102.000001, 102.1, 359.99999999, 360.0,
+        1022.0, 1023, 1023.0, float('inf'), float('nan'), 'string', '1']
+    for value in values:
+        expected = _call_or_exception(validator, value)
+        actual = _call_or_exception(lambda v: compiled({'field': v})['field'], value)
+        if isinstance(expected, float) and expected != expected:
+            assert actual != actual
+        else:
+            assert type(actual) is type(expected)
+            assert actual == expected
+
+
+def test_compile_validator_schema(types_msg_path):
+    validator = validate.build_validator(schema.build_schema())
+    compiled = validate.compile_validator(validator)
+    assert sorted(compiled.keys()) == sorted(validator.keys())
+
+    import gpsdio
+    with gpsdio.open(types_msg_path, _check=False) as src:
+        for msg in src:
+            expected = {n: v(msg[n]) for n, v in validator[msg['type']].items()}
+            assert compiled[msg['type']](msg) == expected
+
+
+def test_compile_validator_inplace(types_msg_path):
+    validator = validate.build_validator(schema.build_schema())
+    compiled = validate.compile_validator(validator)
+    inplace = validate.compile_validator(validator, inplace=True)
+
+    import gpsdio
+    with gpsdio.open(types_msg_path, _check=False) as src:
+        for msg in src:
+            expected = compiled[msg['type']](msg)
+            actual = inplace[msg['type']](msg)
+            assert actual is msg
+            assert actual == expected
+
+            # Extra fields are dropped by returning a copy
+            msg = dict(msg, extra=1)
+            actual = inplace[msg['type']](msg)
+            assert actual is not msg
+            assert actual == expected
+
+
+def test_compile_validator_missing_field():
+    compiled = validate.compile_validator({1: {'type': schema.Int(), 'mmsi': schema.Int()}})
+    with pytest.raises(KeyError):
+        compiled[1]({'type': 1})